@@ -0,0 +1,184 @@
+"""
+Synthetic sysfs/procfs tree and stub tools for benchmarking AppLogic
+without touching real hardware.
+"""
+
+import os
+import stat
+from typing import Any, Dict
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+GOVERNORS = "performance powersave schedutil"
+EPPS = "default performance balance_performance balance_power power"
+UPOWER_CONF = """[UPower]
+UsePercentageForPolicy=true
+PercentageLow=20
+PercentageCritical=5
+PercentageAction=2
+CriticalPowerAction=HybridSleep
+"""
+
+# C tools are replaced by scripts that answer like the real ones.
+STUB_TOOLS: Dict[str, str] = {
+    "brightness_tool": 'echo 50',
+    "governor_tool": 'echo powersave',
+    "status_tool": 'echo online',
+    "battery_saver_tool": 'exit 0',
+    "notifier_tool": 'exit 0',
+    "nmcli": 'echo enabled',
+    "rfkill": 'printf "0: hci0: Bluetooth\\n\\tSoft blocked: no\\n\\tHard blocked: no\\n"',
+}
+
+
+def _write(path: str, value) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(f"{value}\n")
+
+
+def _build_cpus(sys_root: str, cpus: int, cluster_size: int):
+    cpu_dir = os.path.join(sys_root, "devices/system/cpu")
+    policies = max(1, cpus // cluster_size)
+    performance = []
+    for p in range(policies):
+        first = p * cluster_size
+        members = range(first, min(cpus, first + cluster_size))
+        # Two clusters, like a hybrid part: the first half tops out higher.
+        peak = 4800000 if p < max(1, policies // 2) else 3200000
+        policy = os.path.join(cpu_dir, "cpufreq", f"policy{first}")
+        for name, value in {
+            "related_cpus": " ".join(map(str, members)),
+            "affected_cpus": " ".join(map(str, members)),
+            "cpuinfo_min_freq": 400000,
+            "cpuinfo_max_freq": peak,
+            "scaling_min_freq": 400000,
+            "scaling_max_freq": peak,
+            "scaling_cur_freq": 1200000,
+            "scaling_governor": "powersave",
+            "scaling_available_governors": GOVERNORS,
+            "energy_performance_preference": "balance_performance",
+            "energy_performance_available_preferences": EPPS,
+        }.items():
+            _write(os.path.join(policy, name), value)
+        if peak == 4800000:
+            performance += members
+        for cpu in members:
+            os.makedirs(os.path.join(cpu_dir, f"cpu{cpu}"), exist_ok=True)
+            # As on a real kernel, cpuN/cpufreq links to its policy directory.
+            os.symlink(os.path.join("..", "cpufreq", f"policy{first}"), os.path.join(cpu_dir, f"cpu{cpu}", "cpufreq"))
+    _write(os.path.join(cpu_dir, "cpufreq", "boost"), 1)
+    if policies > 1:
+        # Hybrid PMUs, as registered by the kernel on Alder Lake and later.
+        efficiency = [cpu for cpu in range(cpus) if cpu not in set(performance)]
+        _write(os.path.join(sys_root, "devices/cpu_core/cpus"), f"{performance[0]}-{performance[-1]}")
+        _write(os.path.join(sys_root, "devices/cpu_atom/cpus"), f"{efficiency[0]}-{efficiency[-1]}")
+
+
+def _build_usb(sys_root: str, devices: int):
+    usb_dir = os.path.join(sys_root, "bus/usb/devices")
+    entries = [("usb1", "1d6b", "0002", "09", "xHCI Host Controller")]
+    entries += [(f"1-{i + 1}", "046d", f"{0xc000 + i:04x}", "00", f"Device {i + 1}") for i in range(devices)]
+    for name, vendor, product, cls, label in entries:
+        device = os.path.join(usb_dir, name)
+        _write(os.path.join(device, "idVendor"), vendor)
+        _write(os.path.join(device, "idProduct"), product)
+        _write(os.path.join(device, "bDeviceClass"), cls)
+        _write(os.path.join(device, "product"), label)
+        _write(os.path.join(device, "power/control"), "on")
+        _write(os.path.join(device, "power/runtime_status"), "active")
+        _write(os.path.join(device, "power/autosuspend_delay_ms"), 2000)
+        _write(os.path.join(device, "power/runtime_suspended_time"), 0)
+        _write(os.path.join(device, "power/runtime_active_time"), 100000)
+
+
+def _build_runtime_pm(sys_root: str):
+    # A handful of PCI functions, one AHCI host and HDA audio, all untuned.
+    for slot, (pci_class, device_id) in enumerate((("0x060000", "0x9a14"), ("0x030000", "0x9a49"),
+                                                   ("0x040300", "0xa0c8"), ("0x0c0330", "0xa0ed"))):
+        device = os.path.join(sys_root, f"bus/pci/devices/0000:00:{slot:02x}.0")
+        for name, value in {"class": pci_class, "vendor": "0x8086", "device": device_id,
+                            "power/control": "on", "power/runtime_status": "active",
+                            "power/runtime_suspended_time": 0, "power/runtime_active_time": 100000}.items():
+            _write(os.path.join(device, name), value)
+    _write(os.path.join(sys_root, "class/scsi_host/host0/link_power_management_policy"), "max_performance")
+    _write(os.path.join(sys_root, "module/snd_hda_intel/parameters/power_save"), 0)
+    _write(os.path.join(sys_root, "module/snd_hda_intel/parameters/power_save_controller"), "N")
+
+
+def _build_supply(supplies: str, name: str, attributes: Dict[str, Any]):
+    # Individual attributes plus the uevent file that carries all of them.
+    lines = [f"POWER_SUPPLY_NAME={name}"]
+    for attribute, value in attributes.items():
+        _write(os.path.join(supplies, name, attribute), value)
+        lines.append(f"POWER_SUPPLY_{attribute.upper()}={value}")
+    _write(os.path.join(supplies, name, "uevent"), "\n".join(lines))
+
+
+def _build_processes(proc_root: str, processes: int):
+    for pid in range(1, processes + 1):
+        _write(os.path.join(proc_root, str(pid), "stat"),
+               f"{pid} (worker {pid}) S 1 {pid} {pid} 0 -1 4194560 100 0 0 0 "
+               f"{pid * 3} {pid} 0 0 20 0 1 0 {1000 + pid} 12345678 1234 18446744073709551615")
+        _write(os.path.join(proc_root, str(pid), "schedstat"), f"{pid * 1000} {pid * 10} {pid * 2}")
+
+
+def build_tree(root: str, cpus: int = 8, usb_devices: int = 8, cluster_size: int = 1,
+               processes: int = 0) -> Dict[str, str]:
+    """
+    Populate `root` with sys/, proc/, etc/UPower/UPower.conf and bin/ (stub
+    tools). Returns the paths AppLogic needs.
+    """
+    sys_root = os.path.join(root, "sys")
+    backlight = os.path.join(sys_root, "class/backlight/intel_backlight")
+    _write(os.path.join(backlight, "max_brightness"), 19393)
+    _write(os.path.join(backlight, "brightness"), 9696)
+    _build_cpus(sys_root, cpus, cluster_size)
+    _build_usb(sys_root, usb_devices)
+    _build_runtime_pm(sys_root)
+
+    supplies = os.path.join(sys_root, "class/power_supply")
+    _build_supply(supplies, "AC", {"type": "Mains", "online": 1})
+    _build_supply(supplies, "BAT0", {"type": "Battery", "status": "Discharging", "present": 1, "capacity": 76,
+                                     "energy_now": 38000000, "energy_full": 50000000, "power_now": 9500000})
+    for index, (kind, name) in enumerate((("bluetooth", "hci0"), ("wlan", "phy0"))):
+        rfkill = os.path.join(sys_root, f"class/rfkill/rfkill{index}")
+        for attribute, value in {"type": kind, "name": name, "soft": 0, "hard": 0}.items():
+            _write(os.path.join(rfkill, attribute), value)
+    thermal = os.path.join(sys_root, "class/thermal/thermal_zone0")
+    for name, value in {"type": "x86_pkg_temp", "temp": 52000, "trip_point_0_type": "passive",
+                        "trip_point_0_temp": 95000, "trip_point_1_type": "critical",
+                        "trip_point_1_temp": 105000}.items():
+        _write(os.path.join(thermal, name), value)
+    hwmon = os.path.join(sys_root, "class/hwmon/hwmon0")
+    for name, value in {"name": "thinkpad", "temp1_input": 48000, "fan1_input": 2400, "pwm1": 128}.items():
+        _write(os.path.join(hwmon, name), value)
+    powercap = os.path.join(sys_root, "class/powercap")
+    for zone, name, energy in (("intel-rapl:0", "package-0", 81234567), ("intel-rapl:0:0", "core", 41234567)):
+        _write(os.path.join(powercap, zone, "name"), name)
+        _write(os.path.join(powercap, zone, "energy_uj"), energy)
+        _write(os.path.join(powercap, zone, "max_energy_range_uj"), 262143328850)
+
+    proc_root = os.path.join(root, "proc")
+    _write(os.path.join(proc_root, "loadavg"), "0.52 0.58 0.59 1/1024 4242")
+    stat_lines = [f"cpu  {cpus * 1000} 0 {cpus * 500} {cpus * 8000} 0 0 0 0 0 0"]
+    stat_lines += [f"cpu{i} 1000 0 500 8000 0 0 0 0 0 0" for i in range(cpus)]
+    _write(os.path.join(proc_root, "stat"), "\n".join(stat_lines))
+    _build_processes(proc_root, processes)
+
+    upower = os.path.join(root, "etc/UPower/UPower.conf")
+    os.makedirs(os.path.dirname(upower), exist_ok=True)
+    with open(upower, "w") as f:
+        f.write(UPOWER_CONF)
+
+    bin_path = os.path.join(root, "bin")
+    os.makedirs(bin_path, exist_ok=True)
+    for name, body in STUB_TOOLS.items():
+        path = os.path.join(bin_path, name)
+        with open(path, "w") as f:
+            f.write(f"#!/bin/sh\n{body}\n")
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    return {"sys": sys_root, "proc": proc_root, "upower": upower, "bin": bin_path}
@@ -0,0 +1,228 @@
+"""
+Latency benchmarks for AppLogic operations against a synthetic sysfs tree.
+
+    python -m benchmarks.run                                # default scales
+    python -m benchmarks.run --scale 4,256,4096 --iterations 100 --output results.json
+    python -m benchmarks.run --compare results.json         # regression check against a baseline
+
+For every scale N the tree gets N CPUs, N USB devices and N processes, so operations
+that grow with N stand out. Results are printed as a table and, with
+--output, written as JSON.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from core.app import AppLogic
+from core.sampler import Sampler
+from .fake_tree import build_tree
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+DEFAULT_SCALES = [4, 64, 1024]
+DEFAULT_ITERATIONS = 50
+# Operations slower than this fraction over the baseline are flagged by --compare.
+REGRESSION_THRESHOLD = 0.20
+
+PROFILES = {
+    "Power Saver": {"brightness": 30, "governor": "powersave", "usb_autosuspend": True},
+    "Balanced": {"brightness": 70, "governor": "schedutil", "usb_autosuspend": False},
+}
+
+
+def _alternate(a, b) -> Callable[[int], Any]:
+    return lambda i: a if i % 2 else b
+
+
+def operations(logic: AppLogic, sampler: Sampler) -> Dict[str, Callable[[int], Any]]:
+    """Operation name -> fn(iteration). Setters alternate so every call writes."""
+    brightness = _alternate(40, 60)
+    governor = _alternate("performance", "powersave")
+    autosuspend = _alternate(True, False)
+    profile = _alternate("Power Saver", "Balanced")
+    return {
+        "get_brightness": lambda i: logic.get_brightness(),
+        "set_brightness": lambda i: logic.set_brightness(brightness(i)),
+        "get_cpu_governor": lambda i: logic.get_cpu_governor(),
+        "set_cpu_governor": lambda i: logic.set_cpu_governor(governor(i)),
+        "get_cpufreq_state": lambda i: logic.get_cpufreq_state(),
+        "get_cpu_frequencies": lambda i: logic.get_cpu_frequencies(),
+        "get_usb_devices": lambda i: logic.get_usb_devices(),
+        "set_usb_autosuspend": lambda i: logic.set_usb_autosuspend(autosuspend(i), notify=False),
+        "get_power_status": lambda i: logic.get_power_status(),
+        "get_battery_percentage": lambda i: logic.get_battery_percentage(),
+        "get_battery_energy": lambda i: logic.get_battery_energy(),
+        "get_wifi_status": lambda i: logic.get_wifi_status(),
+        "get_bluetooth_status": lambda i: logic.get_bluetooth_status(),
+        "get_upower_config": lambda i: logic.get_upower_config(),
+        "apply_profile": lambda i: logic.apply_profile(profile(i)),
+        "get_top_processes": lambda i: logic.get_top_processes(refresh=True),
+        "sampler_tick": lambda i: sampler.sample_now(),
+    }
+
+
+# ================================================================
+#  Measurement
+# ================================================================
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def measure(fn: Callable[[int], Any], iterations: int) -> Dict[str, float]:
+    # The first call pays for cold caches (enumeration, helper start-up).
+    start = time.perf_counter()
+    fn(0)
+    cold = time.perf_counter() - start
+
+    samples = []
+    for i in range(1, iterations + 1):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    total = sum(samples)
+    return {
+        "cold_ms": cold * 1000,
+        "mean_ms": total / len(samples) * 1000,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p90_ms": percentile(samples, 0.90) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "max_ms": samples[-1] * 1000,
+        "ops_per_s": len(samples) / total if total else float("inf"),
+    }
+
+
+def run_scale(scale: int, iterations: int, selected: Optional[List[str]], verbose: bool) -> List[Dict[str, Any]]:
+    root = tempfile.mkdtemp(prefix=f"lpm-bench-{scale}-")
+    old_path = os.environ.get("PATH", "")
+    try:
+        paths = build_tree(root, cpus=scale, usb_devices=scale, processes=scale)
+        os.environ["PATH"] = paths["bin"] + os.pathsep + old_path  # stub nmcli/rfkill
+        sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with sink:
+            logic = AppLogic(sysfs_root=paths["sys"], upower_config_path=paths["upower"], bin_path=paths["bin"],
+                             use_sudo=False, profiles_file=os.path.join(root, "profiles.json"),
+                             proc_root=paths["proc"])
+            logic.uevents = _NullMonitor()
+            for name, settings in PROFILES.items():
+                logic.save_settings_to_profile(name, settings)
+            sampler = Sampler(logic)
+            logic.attach_sampler(sampler, automation=False)
+
+            results = []
+            for name, fn in operations(logic, sampler).items():
+                if selected and name not in selected:
+                    continue
+                stats = measure(fn, iterations)
+                results.append({"op": name, "scale": scale, "iterations": iterations, **stats})
+            logic.close()
+        return results
+    finally:
+        os.environ["PATH"] = old_path
+        shutil.rmtree(root, ignore_errors=True)
+
+
+class _NullMonitor:
+    """Stands in for the netlink monitor: benchmarks must not depend on kernel events."""
+
+    def subscribe(self, subsystem, callback):
+        pass
+
+    def stop(self):
+        pass
+
+
+# ================================================================
+#  Reporting
+# ================================================================
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results: List[Dict[str, Any]]):
+    print(f"{'operation':<24}{'N':>6}{'cold':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'ops/s':>11}")
+    for r in results:
+        print(f"{r['op']:<24}{r['scale']:>6}{r['cold_ms']:>10.3f}{r['p50_ms']:>10.3f}"
+              f"{r['p90_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['ops_per_s']:>11.0f}")
+    print("(latencies in ms)")
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> int:
+    """Print p50 ratios against a baseline file. Returns the number of regressions."""
+    with open(baseline_path) as f:
+        baseline = {(r["op"], r["scale"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\nCompared with {baseline_path}:")
+    for r in results:
+        base = baseline.get((r["op"], r["scale"]))
+        if base is None or not base["p50_ms"]:
+            continue
+        ratio = r["p50_ms"] / base["p50_ms"]
+        flag = ""
+        if ratio > 1 + REGRESSION_THRESHOLD:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"  {r['op']:<24}{r['scale']:>6}  {base['p50_ms']:9.3f} -> {r['p50_ms']:9.3f} ms  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark AppLogic operations on a synthetic sysfs tree.")
+    parser.add_argument("--scale", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="comma-separated CPU/USB device counts (default: %(default)s)")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--ops", help="comma-separated operation names to run (default: all)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare p50 latencies with a previous --output file")
+    parser.add_argument("--verbose", action="store_true", help="keep AppLogic's log output")
+    args = parser.parse_args(argv)
+
+    selected = args.ops.split(",") if args.ops else None
+    results = []
+    for scale in (int(s) for s in args.scale.split(",")):
+        results += run_scale(scale, args.iterations, selected, args.verbose)
+    print_table(results)
+
+    if args.output:
+        report = {
+            "meta": {
+                "revision": _git_revision(),
+                "timestamp": time.time(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        return 1 if compare(results, args.compare) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+DEFAULT_RATE_HZ = 10.0
+_UNSET = object()
+
+
+# ================================================================
+#  Coalescing Actuator Queue
+# ================================================================
+
+class _Knob:
+    __slots__ = ("apply_fn", "min_interval", "pending", "last_value", "next_allowed", "counters")
+
+    def __init__(self, apply_fn: Callable[[Any], Any], rate_hz: float):
+        self.apply_fn = apply_fn
+        self.min_interval = 1.0 / rate_hz if rate_hz > 0 else 0.0
+        self.pending = _UNSET
+        self.last_value = _UNSET
+        self.next_allowed = 0.0
+        self.counters = {"submitted": 0, "applied": 0, "coalesced": 0, "dropped": 0, "errors": 0}
+
+
+class ActuatorQueue:
+    """
+    Asynchronous, latest-wins write queue for continuous controls.
+
+    submit() only records the newest value for a knob and returns at once;
+    a worker thread applies it, at most rate_hz times per second per knob.
+    A value submitted while an older one is still pending replaces it
+    (counted as "coalesced"); a value equal to what the knob already holds
+    is skipped (counted as "dropped"). A knob only "holds" a value once its
+    apply_fn succeeded, so a failed write is retried on the next submit.
+    """
+
+    def __init__(self, rate_hz: float = DEFAULT_RATE_HZ):
+        self.rate_hz = rate_hz
+        self._knobs: Dict[str, _Knob] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._busy = 0
+        self._stopped = False
+
+    def register(self, knob: str, apply_fn: Callable[[Any], Any], rate_hz: Optional[float] = None):
+        """
+        Declare a control and the (blocking) function that writes it. The
+        function signals failure by raising or by returning False.
+        """
+        with self._cond:
+            self._knobs[knob] = _Knob(apply_fn, self.rate_hz if rate_hz is None else rate_hz)
+
+    def submit(self, knob: str, value: Any):
+        """Queue a new target value for a knob. Never blocks on I/O."""
+        with self._cond:
+            state = self._knobs.get(knob)
+            if state is None or self._stopped:
+                if state is not None:
+                    state.counters["dropped"] += 1
+                print(f"[ACTUATOR] Dropping write to {knob}: {'queue stopped' if state else 'unknown knob'}")
+                return
+            state.counters["submitted"] += 1
+            if state.pending is not _UNSET:
+                state.counters["coalesced"] += 1
+            if value == state.last_value:
+                state.pending = _UNSET
+                state.counters["dropped"] += 1
+                return
+            state.pending = value
+            self._ensure_worker()
+            self._cond.notify()
+
+    def note_applied(self, knob: str, value: Any):
+        """Record a value written to a knob outside the queue (e.g. by a profile)."""
+        with self._cond:
+            state = self._knobs.get(knob)
+            if state is not None:
+                state.last_value = value
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="actuator-queue", daemon=True)
+            self._thread.start()
+
+    def _next_ready(self):
+        """Return (knob name, value) ready to apply, or the seconds to wait."""
+        now = time.monotonic()
+        wait = None
+        for name, state in self._knobs.items():
+            if state.pending is _UNSET:
+                continue
+            if state.next_allowed <= now:
+                value, state.pending = state.pending, _UNSET
+                state.next_allowed = now + state.min_interval
+                return name, value
+            delay = state.next_allowed - now
+            wait = delay if wait is None else min(wait, delay)
+        return wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                ready = self._next_ready()
+                while not isinstance(ready, tuple):
+                    if self._stopped:
+                        return
+                    self._cond.notify_all()  # wake flush() waiters when idle
+                    self._cond.wait(ready)
+                    ready = self._next_ready()
+                name, value = ready
+                state = self._knobs[name]
+                self._busy += 1
+            try:
+                ok = state.apply_fn(value) is not False
+                if not ok:
+                    print(f"[ACTUATOR ERROR] {name}={value!r}: write failed")
+            except Exception as e:
+                print(f"[ACTUATOR ERROR] {name}={value!r}: {e}")
+                ok = False
+            with self._cond:
+                self._busy -= 1
+                if ok:
+                    state.last_value = value
+                    state.counters["applied"] += 1
+                else:
+                    state.counters["errors"] += 1
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every pending write has been applied. For shutdown and tests."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._busy or any(s.pending is not _UNSET for s in self._knobs.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-knob counters: submitted, applied, coalesced, dropped, errors."""
+        with self._cond:
+            return {name: dict(state.counters) for name, state in self._knobs.items()}
+
+    def stop(self, flush: bool = True):
+        if flush:
+            self.flush(timeout=2.0)
+        with self._cond:
+            self._stopped = True
+            for state in self._knobs.values():
+                if state.pending is not _UNSET:
+                    state.pending = _UNSET
+                    state.counters["dropped"] += 1
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
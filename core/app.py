@@ -1,20 +1,36 @@
 import os
-import re
 import subprocess
-from typing import List, Dict, Any
-from .profile_manager import ProfileManager
+from dataclasses import asdict
+from typing import List, Dict, Any, Optional
+from .actuator import ActuatorQueue
+from .backlight import PROFILE_FADE_MS, Backlight
+from .cpufreq import Cpufreq
+from .energy import EnergyMeter
+from .estimator import BatteryEstimate, BatteryEstimator
+from .helper import (HelperClient, OpResult, SetBrightness, SetGovernor, SetRfkill, UpdateUPowerConfig, WriteSysfs,
+                     encode_op)
+from .instrumentation import metrics
+from .load_governor import LoadGovernor, PolicyLoad
+from .power_supply import DEFAULT_MAX_AGE, PowerSupplies, PowerSupplyState
+from .procstat import PROC_ROOT, ProcessSampler, ProcessUsage
+from .profile_manager import CONFIG_FILE, ProfileManager
+from .rfkill import RFKILL_DEVICE, RadioWatcher, Rfkill, RfkillMonitor
+from .reconciler import DesiredState, Reconciler, ReconcileReport, StepResult, desired_from_plan
+from .runtime_pm import Residency, RuntimePmTuner, Tunable
+from .rules import RULES_FILE, Rule, RuleEngine, inputs_from_snapshot, load_rules
+from .sysfs import SysfsReader, SYSFS_ROOT
+from .telemetry import TelemetryStore
+from .thermal import Thermal, ThermalController, ThermalReading, TripPoint
+from .uevents import PowerSupplyWatcher, UeventMonitor
+from .upower import UPOWER_CONFIG_KEYS, UPOWER_CONFIG_PATH, UPowerConfigFile, validate as validate_upower
+from .usb import UsbDeviceIndex
 
 # ================================================================
 #  Constants & Global Configuration
 # ================================================================
 
-UPOWER_CONFIG_PATH = "/etc/UPower/UPower.conf"
-UPOWER_CONFIG_KEYS = [
-    "PercentageLow",
-    "PercentageCritical",
-    "PercentageAction",
-    "CriticalPowerAction",
-]
+# Processes published with every sampler snapshot.
+TOP_PROCESSES = 10
 
 
 # ================================================================
@@ -28,15 +44,64 @@ class AppLogic:
     device autosuspend, connectivity toggles, and UPower management.
     """
 
-    # --- Configuration ---
-    TARGET_DEVICES = ["3-10", "usb1", "usb2", "usb3", "usb4"]
-    DEFAULT_DEVICE_PATH = "3-10"
-    # ---------------------
-
-    def __init__(self):
+    def __init__(self, sysfs_root: str = SYSFS_ROOT, upower_config_path: str = UPOWER_CONFIG_PATH,
+                 native_io: bool = True, uevent_source=None, telemetry_dir: Optional[str] = None,
+                 bin_path: Optional[str] = None, use_sudo: Optional[bool] = None,
+                 profiles_file: str = CONFIG_FILE, proc_root: str = PROC_ROOT,
+                 rfkill_device: str = RFKILL_DEVICE):
         self.project_root = os.path.realpath(os.path.join(os.path.dirname(__file__), ".."))
-        self.bin_path = os.path.join(self.project_root, "bin")
-        self.profile_manager = ProfileManager()
+        self.bin_path = bin_path or os.path.join(self.project_root, "bin")
+        # None: sudo for privileged tools unless already root (False for test trees).
+        self.use_sudo = (os.geteuid() != 0) if use_sudo is None else use_sudo
+        self.profile_manager = ProfileManager(profiles_file)
+        # Reads go through sysfs in-process; the C tools are only used as a
+        # fallback when native_io is off or the native read fails.
+        self.sysfs = SysfsReader(sysfs_root)
+        self.native_io = native_io
+        self.upower_config_path = upower_config_path
+        self.upower = UPowerConfigFile(upower_config_path, self._sudo_cat)
+        # All backlight devices, perceptual (gamma) percent <-> raw mapping.
+        self.backlight = Backlight(self.sysfs)
+        # Radio state from sysfs; toggles and change events via /dev/rfkill.
+        self.rfkill = Rfkill(self.sysfs, rfkill_device)
+        self.rfkill_monitor: Optional[RfkillMonitor] = None
+        # All privileged writes are batched through one long-lived helper.
+        self.helper = HelperClient(self.project_root, sysfs_root, use_sudo=self.use_sudo,
+                                   upower_config_path=upower_config_path)
+        # With a daemon attached (GUI mode), writes go to it instead.
+        self.daemon = None
+        # Continuous controls (sliders, menus) are written asynchronously.
+        self.actuators = ActuatorQueue()
+        self.actuators.register("brightness", self.set_brightness)
+        self.actuators.register("governor", self.set_cpu_governor)
+        # Kernel uevents (netlink, or an injected source for tests); started on first use.
+        self._uevent_source = uevent_source
+        self.uevents: Optional[UeventMonitor] = None
+        self.usb_index: Optional[UsbDeviceIndex] = None
+        # PCI/SATA/audio/USB runtime-PM knobs and measured suspend residency.
+        self.runtime_pm = RuntimePmTuner(self.sysfs)
+        # History of sampled readings; memory-mapped when telemetry_dir is set.
+        self.telemetry = TelemetryStore(telemetry_dir)
+        self.estimator = BatteryEstimator()
+        # Every AC adapter and battery, one uevent read per supply.
+        self.power_supplies = PowerSupplies(self.sysfs)
+        # RAPL + battery energy, attributed to the active profile per interval.
+        self.energy = EnergyMeter(self.sysfs, self.power_supplies)
+        # Per-process CPU/wakeup attribution, refreshed on every sampler tick.
+        self.processes = ProcessSampler(proc_root)
+        self.active_profile: Optional[str] = None
+        self._cpufreq_cpus = None
+        self.cpufreq = Cpufreq(self.sysfs)
+        # Thermal zones and hwmon sensors; the controller is opt-in.
+        self.thermal = Thermal(self.sysfs)
+        self.thermal_controller: Optional[ThermalController] = None
+        # Load-following governor/EPP switching; also opt-in.
+        self.proc_root = proc_root
+        self.load_governor: Optional[LoadGovernor] = None
+        # Profile switches only write the knobs that differ from the hardware.
+        self.reconciler = Reconciler(self)
+        self.rules_file = RULES_FILE
+        self.rule_engine: Optional[RuleEngine] = None
 
     # ================================================================
     #  Internal Helpers
@@ -48,105 +113,247 @@ class AppLogic:
         Example: self._run_c_tool('brightness_tool', ['1', '80'])
         """
         tool_path = os.path.join(self.bin_path, tool_name)
-        if not os.path.exists(tool_path):
-            print(f"[ERROR] Missing C tool: {tool_path}")
-            return None
+        with metrics.track("c_tool", tool_name) as tracked:
+            if not os.path.exists(tool_path):
+                tracked.fail()
+                print(f"[ERROR] Missing C tool: {tool_path}")
+                return None
 
-        command = (["sudo"] if use_sudo else []) + [tool_path] + args
-        print(f"[RUN] {' '.join(command)}")
+            command = (["sudo"] if use_sudo and self.use_sudo else []) + [tool_path] + args
+            print(f"[RUN] {' '.join(command)}")
 
-        try:
-            result = subprocess.run(command, capture_output=True, text=True, check=True)
-            return result
-        except subprocess.CalledProcessError as e:
-            print(f"[C TOOL ERROR] {tool_name}: {e.stderr.strip()}")
-            return None
+            try:
+                result = subprocess.run(command, capture_output=True, text=True, check=True)
+                return result
+            except subprocess.CalledProcessError as e:
+                tracked.fail()
+                print(f"[C TOOL ERROR] {tool_name}: {e.stderr.strip()}")
+                return None
 
     def _run_system_command(self, args: List[str]):
         """Helper to run standard Linux shell commands."""
-        try:
-            return subprocess.run(args, capture_output=True, text=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            print(f"[SYSTEM ERROR] {' '.join(args)} → {e}")
-            return None
+        program = args[1] if args[0] == "sudo" and len(args) > 1 else args[0]
+        with metrics.track("command", program) as tracked:
+            try:
+                return subprocess.run(args, capture_output=True, text=True, check=True)
+            except (subprocess.CalledProcessError, FileNotFoundError) as e:
+                tracked.fail()
+                print(f"[SYSTEM ERROR] {' '.join(args)} → {e}")
+                return None
 
     def _write_to_sys_file(self, sys_path: str, value: str):
-        """Helper to write a value to kernel sysfs files (requires sudo)."""
-        command = f'echo "{value}" | sudo tee {sys_path}'
-        print(f"[WRITE] {command}")
+        """Helper to write a value to kernel sysfs files (requires privileges)."""
+        print(f"[WRITE] {value} → {sys_path}")
+        with metrics.track("sysfs_write", os.path.basename(sys_path)) as tracked:
+            result = self.apply_batch([WriteSysfs(sys_path, value)])[0]
+            if not result.ok:
+                tracked.fail()
+        if not result.ok:
+            print(f"[WRITE ERROR] Could not write '{value}' → {sys_path}: {result.error}")
+        return result.ok
+
+    def _tee_to_sys_file(self, sys_path: str, value: str) -> bool:
+        """Fallback write through `sudo tee`, without a shell in between."""
         try:
-            subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
+            command = (["sudo"] if self.use_sudo else []) + ["tee", sys_path]
+            subprocess.run(command, input=value, check=True, capture_output=True, text=True)
             return True
-        except subprocess.CalledProcessError:
-            print(f"[WRITE ERROR] Could not write '{value}' → {sys_path}")
+        except (subprocess.CalledProcessError, FileNotFoundError):
             return False
 
+    def _apply_op_fallback(self, op) -> OpResult:
+        """Apply a single operation the pre-helper way (one process per call)."""
+        with metrics.track("fallback", op.op) as tracked:
+            result = self._run_op_fallback(op)
+            if not result.ok:
+                tracked.fail()
+            return result
+
+    def _run_op_fallback(self, op) -> OpResult:
+        if isinstance(op, SetBrightness):
+            ok = self._run_c_tool("brightness_tool", ["1", str(op.percent)]) is not None
+        elif isinstance(op, SetGovernor):
+            ok = self._run_c_tool("governor_tool", ["set", op.governor]) is not None
+        elif isinstance(op, WriteSysfs):
+            ok = self._tee_to_sys_file(op.path, op.value)
+        elif isinstance(op, SetRfkill):
+            ok = self._run_system_command(["rfkill", "block" if op.blocked else "unblock", op.kind]) is not None
+        elif isinstance(op, UpdateUPowerConfig):
+            # battery_saver_tool rewrites all four keys and always restarts upowerd.
+            settings = {**self.get_upower_config(), **op.settings}
+            if any(key not in settings for key in UPOWER_CONFIG_KEYS):
+                return OpResult(ok=False, error="battery_saver_tool needs all four UPower keys")
+            args = [settings[key] for key in UPOWER_CONFIG_KEYS]
+            ok = self._run_c_tool("battery_saver_tool", args, use_sudo=False) is not None
+        else:
+            return OpResult(ok=False, error=f"unsupported operation: {op!r}")
+        return OpResult(ok=ok, error=None if ok else "fallback failed")
+
+    def attach_daemon(self, client):
+        """
+        Route hardware writes and profile switches through a running daemon
+        (a DaemonClient), so its reconciler sees every change.
+        """
+        self.daemon = client
+
+    def _apply_via_daemon(self, operations: List[Any]) -> Optional[List[OpResult]]:
+        try:
+            results = self.daemon.request("apply_ops", ops=[encode_op(op) for op in operations])
+            return [OpResult(**result) for result in results]
+        except (OSError, RuntimeError, TypeError) as e:
+            print(f"[DAEMON ERROR] Could not apply through the daemon, writing directly: {e}")
+            return None
+
+    def apply_batch(self, operations: List[Any]) -> List[OpResult]:
+        """
+        Apply privileged operations in one helper round trip (through the
+        daemon when one is attached). Falls back to the per-call tools if
+        the helper is unavailable.
+        """
+        if not operations:
+            return []
+        results = self._apply_via_daemon(operations) if self.daemon is not None else None
+        if results is None:
+            results = self.helper.execute(operations)
+        if results is None:
+            results = [self._apply_op_fallback(op) for op in operations]
+        return results
+
+    def _apply_all(self, operations: List[Any]) -> bool:
+        """apply_batch for setters: True only if every operation succeeded."""
+        ok = True
+        for op, result in zip(operations, self.apply_batch(operations)):
+            if not result.ok:
+                print(f"[WRITE ERROR] {op!r}: {result.error}")
+                ok = False
+        return ok
+
+    def _usb_sys_path(self, device_path: str, attribute: str) -> str:
+        return self.sysfs.path("bus/usb/devices", device_path, attribute)
+
     # ================================================================
     #  USB Autosuspend
     # ================================================================
 
+    def _get_usb_index(self) -> UsbDeviceIndex:
+        if self.usb_index is None:
+            self.usb_index = UsbDeviceIndex(self.sysfs)
+            # Keep the index current from hotplug events instead of rescanning.
+            self.get_uevent_monitor().subscribe("usb", self.usb_index.handle_uevent)
+        return self.usb_index
+
     def get_usb_devices(self) -> List[Dict[str, Any]]:
-        """Retrieve a list of USB devices with their current autosuspend status."""
-        device_statuses = []
-
-        for device_path in self.TARGET_DEVICES:
-            sys_path = f"/sys/bus/usb/devices/{device_path}/power/control"
-            control = "N/A"
-            name = f"USB Device {device_path}"
-
-            if os.path.exists(sys_path):
-                try:
-                    result = subprocess.run(
-                        f"sudo cat {sys_path}",
-                        shell=True,
-                        capture_output=True,
-                        text=True,
-                        check=True,
-                    )
-                    control = result.stdout.strip()
-                except subprocess.CalledProcessError:
-                    control = "unknown (read failed)"
-
-                # Try to read device name
-                product_path = f"/sys/bus/usb/devices/{device_path}/product"
-                if os.path.exists(product_path):
-                    try:
-                        with open(product_path, "r") as f:
-                            name = f.read().strip()
-                    except Exception:
-                        pass
-
-            device_statuses.append({"path": device_path, "name": name, "control": control})
-        return device_statuses
-    
+        """Retrieve all USB devices with their current autosuspend status."""
+        return [device.as_dict() for device in self._get_usb_index().devices()]
+
+    def get_usb_ids(self) -> List[str]:
+        """vendor:product of every connected USB device."""
+        return sorted({f"{d.vendor_id}:{d.product_id}" for d in self._get_usb_index().devices()
+                       if d.vendor_id and d.product_id})
+
+    def refresh_usb_devices(self):
+        """Force a full rescan (e.g. to pick up runtime_status changes)."""
+        self._get_usb_index().refresh()
+
+    def set_usb_autosuspend(self, enable: bool, paths: Optional[List[str]] = None,
+                            device_class: Optional[str] = None, notify: bool = True) -> int:
+        """
+        Enable or disable autosuspend on every matching device in one
+        privileged batch. Returns the number of devices updated.
+        """
+        devices = self._get_usb_index().select(paths=paths, device_class=device_class)
+        if not devices:
+            print(f"[WARN] No USB devices matched: {paths or device_class or 'all'}")
+            return 0
+
+        control = "auto" if enable else "on"
+        ops = [WriteSysfs(self._usb_sys_path(d.path, "power/control"), control) for d in devices]
+        updated = []
+        for device, result in zip(devices, self.apply_batch(ops)):
+            if result.ok:
+                self.usb_index.update_control(device.path, control)
+                updated.append(device.path)
+            else:
+                print(f"[ERROR] Setting autosuspend for {device.path}: {result.error}")
+
+        if notify and updated:
+            state = "ENABLED" if enable else "DISABLED"
+            target = updated[0] if len(updated) == 1 else f"{len(updated)} devices"
+            self.send_notification("USB Control", f"Autosuspend {state} for {target}")
+        return len(updated)
+
     def enable_autosuspend(self, device_path):
         """Enable autosuspend for a specific USB device."""
-        path = f"/sys/bus/usb/devices/{device_path}/power/control"
-        if os.path.exists(path):
-            try:
-                self._write_to_sys_file(path, "auto")
-                self.send_notification("USB Control", f"Autosuspend ENABLED for {device_path}")
-            except Exception as e:
-                print(f"[ERROR] Enabling autosuspend for {device_path}: {e}")
-        else:
-            print(f"[WARN] Device not found: {device_path}")
+        self.set_usb_autosuspend(True, paths=[device_path])
 
     def disable_autosuspend(self, device_path):
         """Disable autosuspend for a specific USB device."""
-        path = f"/sys/bus/usb/devices/{device_path}/power/control"
-        if os.path.exists(path):
-            try:
-                self._write_to_sys_file(path, "on")
-                self.send_notification("USB Control", f"Autosuspend DISABLED for {device_path}")
-            except Exception as e:
-                print(f"[ERROR] Disabling autosuspend for {device_path}: {e}")
-        else:
-            print(f"[WARN] Device not found: {device_path}")
+        self.set_usb_autosuspend(False, paths=[device_path])
+
+    # ================================================================
+    #  Runtime Power Management
+    # ================================================================
+
+    def get_power_tunables(self, categories: Optional[List[str]] = None) -> List[Tunable]:
+        """Every runtime-PM knob with its current and recommended value."""
+        return self.runtime_pm.scan(categories)
+
+    def apply_power_tunables(self, keys: Optional[List[str]] = None,
+                             categories: Optional[List[str]] = None) -> List[Tunable]:
+        """
+        Apply the recommended value of every untuned knob (or the filtered
+        subset) in one privileged batch. The batch can be undone with
+        rollback_power_tunables(). Returns the tunables that were changed.
+        """
+        pending = self.runtime_pm.select(self.runtime_pm.scan(categories), keys=keys)
+        if not pending:
+            print("[RUNTIME PM] Nothing to tune.")
+            return []
+        ops = [WriteSysfs(self.sysfs.path(t.path), t.recommended) for t in pending]
+        applied = []
+        for tunable, result in zip(pending, self.apply_batch(ops)):
+            if result.ok:
+                applied.append(tunable)
+                if tunable.category == "usb" and self.usb_index is not None:
+                    self.usb_index.update_control(tunable.key[4:], tunable.recommended)
+            else:
+                print(f"[ERROR] Tuning {tunable.key}: {result.error}")
+        self.runtime_pm.record_applied(applied)
+        # Measure residency from the moment the new settings took effect.
+        self.runtime_pm.mark()
+        print(f"[RUNTIME PM] Applied {len(applied)}/{len(pending)} recommendations.")
+        return applied
+
+    def rollback_power_tunables(self) -> bool:
+        """Restore every value changed by the last apply_power_tunables() call."""
+        undo = self.runtime_pm.pending_rollback()
+        if not undo:
+            return True
+        results = self.apply_batch([WriteSysfs(self.sysfs.path(path), previous) for _, path, previous in undo])
+        for (key, path, previous), result in zip(undo, results):
+            if not result.ok:
+                print(f"[ERROR] Rolling back {key}: {result.error}")
+            elif key.startswith("usb:") and self.usb_index is not None:
+                self.usb_index.update_control(key[4:], previous)
+        ok = all(result.ok for result in results)
+        if ok:
+            self.runtime_pm.clear_rollback()
+        return ok
+
+    def get_runtime_pm_residency(self) -> List[Residency]:
+        """Time each PCI/USB device spent runtime-suspended since the last apply (or first call)."""
+        return self.runtime_pm.residency()
+
     # =========================================
     #  Brightness & CPU Governor
     # ================================================================
 
     def get_brightness(self):
+        if self.native_io:
+            percent = self.backlight.get_percent()
+            if percent is not None:
+                return percent
+
         result = self._run_c_tool("brightness_tool", ["0"])
         if result and result.stdout:
             try:
@@ -155,99 +362,462 @@ class AppLogic:
                 return None
         return None
 
-    def set_brightness(self, value: int):
-        self._run_c_tool("brightness_tool", ["1", str(value)])
+    def set_brightness(self, value: int, fade_ms: int = 0) -> bool:
+        return self._apply_all([SetBrightness(int(value), fade_ms)])
 
     def get_cpu_governor(self):
+        """Governor shared by all cpufreq policies ("mixed" if they differ)."""
+        if self.native_io:
+            governor = self.cpufreq.governor()
+            if governor:
+                return governor
+
         result = self._run_c_tool("governor_tool", ["get"])
         return result.stdout.strip() if result and result.stdout else "schedutil"
 
-    def set_cpu_governor(self, governor: str):
-        self._run_c_tool("governor_tool", ["set", governor])
+    def set_cpu_governor(self, governor: str, targets: Optional[List[str]] = None) -> bool:
+        """Set the governor on all policies, or on the given policies/clusters."""
+        return self._apply_all(self._cpufreq_ops({"governor": governor}, targets))
+
+    def _cpufreq_ops(self, settings: Dict[str, Any], targets: Optional[List[str]] = None) -> List[Any]:
+        """Translate {governor, epp, min_freq, max_freq} into per-policy writes."""
+        if not self.cpufreq.policies():
+            # No policy directories (very old kernel or fake tree): use the
+            # helper's per-CPU governor write and ignore the rest.
+            return [SetGovernor(settings["governor"])] if settings.get("governor") else []
+        ops = []
+        if settings.get("governor"):
+            ops += self.cpufreq.governor_ops(settings["governor"], targets)
+        if settings.get("epp"):
+            ops += self.cpufreq.epp_ops(settings["epp"], targets)
+        if settings.get("min_freq") is not None or settings.get("max_freq") is not None:
+            ops += self.cpufreq.freq_limit_ops(settings.get("min_freq"), settings.get("max_freq"), targets)
+        return ops
+
+    def get_cpufreq_state(self) -> List[Dict[str, Any]]:
+        """Per-policy cpufreq state, including which cluster each policy belongs to."""
+        states = {s.policy: s for s in self.cpufreq.states()}
+        return [
+            {
+                "policy": p.name,
+                "cluster": p.cluster,
+                "cpus": list(p.cpus),
+                "cpuinfo_min_freq": p.cpuinfo_min_freq,
+                "cpuinfo_max_freq": p.cpuinfo_max_freq,
+                "available_governors": list(p.available_governors),
+                "available_epps": list(p.available_epps),
+                **{k: v for k, v in asdict(states[p.name]).items() if k != "policy"},
+            }
+            for p in self.cpufreq.policies()
+        ]
+
+    def set_cpu_epp(self, epp: str, targets: Optional[List[str]] = None) -> bool:
+        return self._apply_all(self._cpufreq_ops({"epp": epp}, targets))
+
+    def set_cpu_freq_limits(self, min_freq: Optional[int] = None, max_freq: Optional[int] = None,
+                            targets: Optional[List[str]] = None) -> bool:
+        return self._apply_all(self._cpufreq_ops({"min_freq": min_freq, "max_freq": max_freq}, targets))
+
+    def get_cpu_boost(self) -> Optional[bool]:
+        return self.cpufreq.boost()
+
+    def set_cpu_boost(self, enable: bool) -> bool:
+        return self._apply_all(self.cpufreq.boost_ops(enable))
+
+    def apply_settings(self, brightness: Optional[int] = None, governor: Optional[str] = None,
+                       profile_name: Optional[str] = None, cpufreq=()) -> bool:
+        """
+        Apply several hardware settings in a single privileged round trip.
+        `cpufreq` is a sequence of (policy or cluster, settings) pairs
+        applied after the global governor.
+        """
+        if profile_name is not None:
+            self._set_active_profile(profile_name)
+        ops = []
+        if brightness is not None:
+            ops.append(SetBrightness(int(brightness), PROFILE_FADE_MS))
+            self.actuators.note_applied("brightness", int(brightness))
+        if governor:
+            ops += self._cpufreq_ops({"governor": governor})
+            self.actuators.note_applied("governor", governor)
+        for target, settings in cpufreq:
+            ops += self._cpufreq_ops(dict(settings), [target])
+        return all(result.ok for result in self.apply_batch(ops))
+
+    def apply_desired_state(self, desired: DesiredState) -> ReconcileReport:
+        """Bring the hardware to `desired`, writing only what changed."""
+        report = self.reconciler.apply(desired)
+        for step in report.steps:
+            if not step.ok:
+                print(f"[RECONCILE ERROR] {step.knob}: {step.error}")
+            elif step.knob == "brightness":
+                self.actuators.note_applied("brightness", step.desired)
+            elif step.knob.startswith("usb:") and self.usb_index is not None:
+                self.usb_index.update_control(step.knob[4:], step.desired)
+        governors = set(desired.governors.values())
+        if len(governors) == 1:
+            self.actuators.note_applied("governor", governors.pop())
+        return report
+
+    def apply_profile(self, profile_name: str) -> Optional[ReconcileReport]:
+        """Apply a saved profile through the reconciler. None if it does not exist."""
+        if self.daemon is not None:
+            return self._apply_profile_via_daemon(profile_name)
+        plan = self.get_profile_plan(profile_name)
+        if plan is None:
+            print(f"[WARN] Profile '{profile_name}' not found.")
+            return None
+        usb_paths = ()
+        if isinstance(plan.usb_autosuspend, bool):
+            usb_paths = [d.path for d in self._get_usb_index().select()]
+        report = self.apply_desired_state(desired_from_plan(plan, self.cpufreq, usb_paths))
+        self._set_active_profile(profile_name)
+        print(f"[PROFILE] Applied '{profile_name}': {report.summary()}")
+        return report
+
+    def _apply_profile_via_daemon(self, profile_name: str) -> Optional[ReconcileReport]:
+        try:
+            result = self.daemon.request("apply_profile", name=profile_name)
+        except RuntimeError as e:  # the daemon's error, e.g. unknown profile
+            print(f"[WARN] Daemon could not apply '{profile_name}': {e}")
+            return None
+        self._set_active_profile(profile_name)
+        report = ReconcileReport([StepResult(**step) for step in result["steps"]], result["skipped"],
+                                 result["plan_ms"], result["apply_ms"])
+        print(f"[PROFILE] Applied '{profile_name}' through the daemon: {report.summary()}")
+        return report
+
+    def _set_active_profile(self, profile_name: str):
+        if profile_name != self.active_profile:
+            # Close the energy interval so it is charged to the outgoing profile.
+            self.energy.checkpoint(self.active_profile)
+            self.active_profile = profile_name
+
+    def submit_setting(self, knob: str, value: Any):
+        """Queue a write for a continuous control without blocking the caller."""
+        self.actuators.submit(knob, value)
+
+    def get_cpu_frequencies(self) -> Dict[str, int]:
+        """Current frequency (kHz) of every cpufreq-capable CPU."""
+        if self._cpufreq_cpus is None:
+            self._cpufreq_cpus = [
+                name for name in self.sysfs.listdir("devices/system/cpu")
+                if name.startswith("cpu") and name[3:].isdigit()
+                and self.sysfs.exists(f"devices/system/cpu/{name}/cpufreq/scaling_cur_freq")
+            ]
+        freqs = {}
+        for name in self._cpufreq_cpus:
+            freq = self.sysfs.read_int(f"devices/system/cpu/{name}/cpufreq/scaling_cur_freq")
+            if freq is not None:
+                freqs[name[3:]] = freq
+        return freqs
 
     # ================================================================
     #  Connectivity Controls
     # ================================================================
 
+    def _radio_enabled(self, kind: str) -> Optional[bool]:
+        return self.rfkill.enabled(kind) if self.native_io else None
+
+    def _set_radio(self, kind: str, enable: bool) -> bool:
+        """/dev/rfkill first, then the privileged helper (sysfs soft attribute)."""
+        if self.native_io and self.daemon is None and self.rfkill.set_blocked(kind, not enable):
+            return True
+        return self.apply_batch([SetRfkill(kind, blocked=not enable)])[0].ok
+
     def get_wifi_status(self):
+        enabled = self._radio_enabled("wlan")
+        if enabled is not None:
+            return enabled
         result = self._run_system_command(["nmcli", "radio", "wifi"])
         return "enabled" in (result.stdout.strip() if result else "")
 
-    def set_wifi_status(self, enable: bool):
-        self._run_system_command(["nmcli", "radio", "wifi", "on" if enable else "off"])
+    def set_wifi_status(self, enable: bool) -> bool:
+        if self._set_radio("wlan", enable):
+            return True
+        return self._run_system_command(["nmcli", "radio", "wifi", "on" if enable else "off"]) is not None
 
     def get_bluetooth_status(self):
+        enabled = self._radio_enabled("bluetooth")
+        if enabled is not None:
+            return enabled
         result = self._run_system_command(["rfkill", "list", "bluetooth"])
         if not result or not result.stdout:
             return False
         output = result.stdout.lower()
         return "soft blocked: no" in output and "hard blocked: no" in output
 
-    def set_bluetooth_status(self, enable: bool):
-        self._run_system_command(["rfkill", "unblock" if enable else "block", "bluetooth"])
+    def set_bluetooth_status(self, enable: bool) -> bool:
+        return self._set_radio("bluetooth", enable)
 
+    def watch_radios(self, callback) -> Optional[RadioWatcher]:
+        """
+        Call back with (kind, enabled) whenever a radio changes state,
+        including hardware kill switches. None if /dev/rfkill is unreadable.
+        """
+        if self.rfkill_monitor is None:
+            try:
+                self.rfkill_monitor = RfkillMonitor(self.rfkill.device_path)
+            except OSError as e:
+                print(f"[RFKILL] Event stream unavailable: {e}")
+                return None
+            # Radio state changed behind the reconciler's back.
+            self.rfkill_monitor.subscribe(lambda event: self.reconciler.invalidate())
+        return RadioWatcher(self.rfkill_monitor, self.rfkill, callback)
 
     # ================================================================
     #  Power Status
     # ================================================================
 
-    def get_power_status(self):
+    def get_power_supplies(self, max_age: float = DEFAULT_MAX_AGE) -> PowerSupplyState:
+        """Every supply's state plus the aggregate over the system batteries."""
+        return self.power_supplies.read(max_age)
+
+    def get_power_status(self, max_age: float = DEFAULT_MAX_AGE):
         """Returns whether the system is on AC or battery."""
+        if self.native_io:
+            online = self.power_supplies.read(max_age).ac_online
+            if online is not None:
+                return "online" if online else "offline"
+
         result = self._run_c_tool("status_tool", [], use_sudo=False)
         return result.stdout.strip() if result and result.stdout else "online"
+
+    def get_uevent_monitor(self) -> UeventMonitor:
+        if self.uevents is None:
+            if self._uevent_source is not None:
+                self.uevents = UeventMonitor(self._uevent_source)
+            else:
+                self.uevents = UeventMonitor.create(self.sysfs)
+        return self.uevents
+
+    def watch_power_status(self, callback) -> PowerSupplyWatcher:
+        """Call back with "online"/"offline" as soon as the kernel reports an AC change."""
+        monitor = self.get_uevent_monitor()
+        # Registered first, so the watcher below sees hot-plugged supplies.
+        monitor.subscribe("power_supply", self._on_power_supply_event)
+        return PowerSupplyWatcher(monitor, lambda: self.get_power_status(max_age=0), callback)
+
+    def _on_power_supply_event(self, event):
+        if event.action in ("add", "remove"):
+            self.power_supplies.invalidate()
+
+    def get_cpu_load(self) -> Optional[float]:
+        """1-minute load average as a fraction of the online CPUs."""
+        try:
+            return os.getloadavg()[0] / (os.cpu_count() or 1)
+        except OSError:
+            return None
+
+    def get_temperature(self) -> Optional[float]:
+        """Hottest thermal zone or hwmon sensor in degrees Celsius."""
+        return self.thermal.read().hottest
+
+    # ================================================================
+    #  Thermal Monitoring & Control
+    # ================================================================
+
+    def get_thermal_state(self) -> ThermalReading:
+        """Temperatures, fan speeds (RPM) and PWM duty cycles from every sensor."""
+        return self.thermal.read()
+
+    def get_trip_points(self) -> List[TripPoint]:
+        return self.thermal.trip_points()
+
+    def _sample_thermal(self) -> Dict[str, Any]:
+        return self.thermal.read().as_dict()
+
+    def enable_thermal_control(self, mode: str = "max_freq") -> ThermalController:
+        """
+        Start capping scaling_max_freq ("max_freq") or EPP ("epp") as the CPU
+        nears its throttle trip point. Driven by sampler snapshots.
+        """
+        self.disable_thermal_control()
+        self.thermal_controller = ThermalController(self.cpufreq, self.thermal, self.apply_batch, mode)
+        print(f"[THERMAL] Control enabled ({mode}): capping from {self.thermal_controller.start_c:.1f}°C, "
+              f"trip at {self.thermal_controller.limit_c:.1f}°C")
+        return self.thermal_controller
+
+    def disable_thermal_control(self):
+        """Stop the controller and restore the limits it found."""
+        controller, self.thermal_controller = self.thermal_controller, None
+        if controller is not None:
+            controller.restore()
+
+    # ================================================================
+    #  Load-Aware Governor
+    # ================================================================
+
+    def enable_load_governor(self, **options) -> LoadGovernor:
+        """
+        Start following CPU load: each policy goes to performance (or a
+        performance EPP) under load and back to powersave when idle.
+        `options` are passed to LoadGovernor (interval, thresholds, ...).
+        """
+        self.disable_load_governor()
+        self.load_governor = LoadGovernor(self.cpufreq, self.apply_batch, self.proc_root, **options)
+        self.load_governor.start()
+        print(f"[LOAD GOVERNOR] Enabled: sampling every {self.load_governor.interval * 1000:.0f} ms, "
+              f"up at {self.load_governor.up_threshold:.0%}, down at {self.load_governor.down_threshold:.0%}")
+        return self.load_governor
+
+    def disable_load_governor(self):
+        """Stop switching and restore the governors/EPP found on enable."""
+        governor, self.load_governor = self.load_governor, None
+        if governor is not None:
+            governor.stop()
+
+    def get_load_governor_state(self) -> List[PolicyLoad]:
+        return self.load_governor.policies() if self.load_governor is not None else []
+
+    def get_load_governor_stats(self) -> Optional[Dict[str, Any]]:
+        """Tick overhead, decision latency and switch rate; None when disabled."""
+        return self.load_governor.stats() if self.load_governor is not None else None
+
     def get_battery_percentage(self):
-        """"Returns the battery percentage."""
+        """"Returns the charge level across all batteries, weighted by their energy."""
+        percentage = self.power_supplies.read().percentage
+        return round(percentage) if percentage is not None else 0 # Default if there is no battery
+
+    def get_battery_energy(self) -> Dict[str, Optional[int]]:
+        """Summed energy_now/energy_full (µWh) and power_now (µW), None where unsupported."""
+        state = self.power_supplies.read()
+        return {
+            "energy_now": state.energy_now,
+            "energy_full": state.energy_full,
+            "power_now": state.power_now,
+        }
+
+    def attach_sampler(self, sampler, automation: bool = True):
+        """
+        Register the extra readings this controller consumes and record every
+        snapshot. With `automation`, snapshots also drive the rule engine
+        (leave it off when another process, e.g. the daemon, already does).
+        """
+        sampler.add_source("battery_energy", self.get_battery_energy)
+        sampler.add_source("cpu_frequencies", self.get_cpu_frequencies)
+        sampler.add_source("cpu_load", self.get_cpu_load)
+        sampler.add_source("thermal", self._sample_thermal)
+        sampler.add_source("usb_ids", self.get_usb_ids)
+        sampler.add_source("energy", self.energy.read)
+        sampler.add_source("top_processes", self._sample_processes)
+        if automation and self.rule_engine is None:
+            self.rule_engine = self._load_rule_engine()
+        sampler.subscribe(self._on_snapshot)
+
+    def _load_rule_engine(self) -> Optional[RuleEngine]:
         try:
-            with open("/sys/class/power_supply/BAT0/capacity", "r") as f:
-                return int(f.read().strip())
-        except Exception:
-            return 0 # Default if path doesn't exist or BAT0 isn't found
+            engine = RuleEngine(load_rules(self.rules_file), self._on_rule_switch)
+        except (OSError, ValueError) as e:
+            print(f"[RULES ERROR] Could not load {self.rules_file}: {e}")
+            return None
+        engine.check_profiles(self.get_all_profiles())
+        return engine
+
+    def _on_rule_switch(self, profile: str, rule: Rule):
+        report = self.apply_profile(profile)
+        if report is None:
+            self.send_notification("Power Rules", f"Rule '{rule.name}' wants missing profile '{profile}'")
+        else:
+            self.send_notification("Power Rules", f"Rule '{rule.name}': applying '{profile}'")
+
+    def _on_snapshot(self, snapshot):
+        self.telemetry.record_snapshot(snapshot)
+        self.estimator.add_snapshot(snapshot, self.active_profile)
+        reading = snapshot.get("energy")
+        if reading:
+            for domain, watts in self.energy.account(reading, self.active_profile).items():
+                self.telemetry.record(f"watts.{domain}", watts, snapshot.timestamp)
+        thermal = snapshot.get("thermal")
+        if self.thermal_controller is not None and thermal:
+            self.thermal_controller.update(thermal["cpu_temp"])
+        if self.rule_engine is not None:
+            self.rule_engine.update(inputs_from_snapshot(snapshot))
+
+    def get_energy_report(self) -> Dict[str, Dict[str, Any]]:
+        """Joules and average watts (RAPL domains and battery) per profile."""
+        return self.energy.report()
+
+    def get_power_draw(self) -> Dict[str, float]:
+        """Average watts per RAPL domain and battery over the last sampler interval."""
+        return self.energy.power_draw()
+
+    def reset_energy_report(self):
+        self.energy.reset()
+
+    def _sample_processes(self) -> List[Dict[str, Any]]:
+        self.processes.sample()
+        return [asdict(usage) for usage in self.processes.top(TOP_PROCESSES)]
+
+    def get_top_processes(self, n: int = TOP_PROCESSES, refresh: bool = False) -> List[ProcessUsage]:
+        """
+        Processes using the most CPU since the previous /proc walk. With
+        `refresh` (or before the first walk) /proc is walked now; otherwise
+        the last sampler tick is reused.
+        """
+        if refresh or not self.processes.interval:
+            self.processes.sample()
+        return self.processes.top(n)
+
+    def get_battery_estimate(self) -> BatteryEstimate:
+        """Fitted charge/discharge rate with time-to-empty/full and confidence bounds."""
+        return self.estimator.estimate()
+
+    def get_profile_drain(self) -> Dict[str, Dict[str, float]]:
+        """Average battery drain (W) observed under each profile."""
+        return self.estimator.profile_drain()
 
     # ================================================================
     #  UPower Configuration Management
     # ================================================================
 
-    def get_upower_config(self) -> Dict[str, str]:
-        """Parse /etc/UPower/UPower.conf to read current thresholds and actions."""
-        settings = {}
-        if not os.path.exists(UPOWER_CONFIG_PATH):
-            return settings
+    def _sudo_cat(self, path: str) -> Optional[str]:
+        # UPower.conf is world-readable on stock installs; this is only
+        # used when the local policy has locked it down.
+        result = self._run_system_command(["sudo", "cat", path])
+        return result.stdout if result is not None else None
 
-        try:
-            result = subprocess.run(
-                f"sudo cat {UPOWER_CONFIG_PATH}",
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            content = result.stdout
-        except subprocess.CalledProcessError as e:
-            print(f"[ERROR] Failed to read UPower config: {e.stderr.strip()}")
-            return settings
-
-        for key in UPOWER_CONFIG_KEYS:
-            match = re.search(rf"^\s*{re.escape(key)}=(.*?)(?:\s*#.*)?$", content, re.MULTILINE)
-            if match:
-                settings[key] = match.group(1).strip()
-
-        return settings
+    def get_upower_config(self) -> Dict[str, str]:
+        """Thresholds and action from UPower.conf (re-parsed only when the file changes)."""
+        return {k: v for k, v in self.upower.values().items() if k in UPOWER_CONFIG_KEYS}
 
-    def set_upower_config(self, low: int, critical: int, action_pct: int, action_type: str) -> bool:
+    def update_upower_config(self, settings: Dict[str, Any], notify: bool = True) -> bool:
         """
-        Update UPower.conf via the compiled 'battery_saver_tool'.
-        Args are passed as CLI arguments to the C tool.
+        Merge `settings` into UPower.conf. Nothing is written, and upowerd is
+        not restarted, when the effective values are already in place.
         """
-        args = [str(low), str(critical), str(action_pct), action_type]
-        result = self._run_c_tool("battery_saver_tool", args, use_sudo=False)
+        settings = {k: str(v) for k, v in settings.items()}
+        current = self.get_upower_config()
+        error = validate_upower({**current, **settings})
+        if error:
+            print(f"[ERROR] Invalid UPower config: {error}")
+            if notify:
+                self.send_notification("UPower Config Error", error)
+            return False
+        if all(current.get(k) == v for k, v in settings.items()):
+            print("[UPOWER] Configuration unchanged; skipping write and restart.")
+            return True
 
-        if result and result.returncode == 0:
+        result = self.apply_batch([UpdateUPowerConfig(settings)])[0]
+        self.upower.invalidate()
+        if not result.ok:
+            print(f"[ERROR] Failed to update UPower config: {result.error}")
+            if notify:
+                self.send_notification("UPower Config Error", "Failed to update configuration.")
+            return False
+        if isinstance(result.value, dict) and result.value.get("changed") and not result.value.get("restarted"):
+            print("[UPOWER] Config written, but upower.service was not restarted.")
+        if notify:
             self.send_notification("UPower Config", "Configuration updated successfully.")
-            return True
+        return True
 
-        print("[ERROR] Failed to update UPower config.")
-        self.send_notification("UPower Config Error", "Failed to update configuration.")
-        return False
+    def set_upower_config(self, low: int, critical: int, action_pct: int, action_type: str) -> bool:
+        return self.update_upower_config({
+            "PercentageLow": low,
+            "PercentageCritical": critical,
+            "PercentageAction": action_pct,
+            "CriticalPowerAction": action_type,
+        })
 
     # ================================================================
     #  Profile Management & Notifications
@@ -256,10 +826,44 @@ class AppLogic:
     def get_all_profiles(self):
         return self.profile_manager.get_profiles()
 
+    def get_profile_plan(self, profile_name: str):
+        return self.profile_manager.get_plan(profile_name)
+
     def save_settings_to_profile(self, profile_name: str, settings: Dict[str, Any]):
         self.profile_manager.save_profile(profile_name, settings)
 
     def send_notification(self, title: str, message: str):
         """Trigger a system notification via notifier_tool."""
-        self._run_c_tool("notifier_tool", [title, message], use_sudo=False)
+        with metrics.track("notification", title) as tracked:
+            if self._run_c_tool("notifier_tool", [title, message], use_sudo=False) is None:
+                tracked.fail()
+
+    # ================================================================
+    #  Instrumentation
+    # ================================================================
+
+    def set_metrics_enabled(self, enabled: bool):
+        metrics.enable(enabled)
+
+    def get_metrics(self, fmt: str = "json") -> str:
+        """Operation counters and latency histograms as JSON or Prometheus text."""
+        return metrics.to_prometheus() if fmt == "prometheus" else metrics.to_json()
+
+    def write_metrics_file(self, path: str):
+        metrics.write_prometheus(path)
+
+    def close(self):
+        """Restore what the controllers changed, then release the helper and sysfs handles."""
+        self.actuators.stop()
+        self.disable_load_governor()
+        self.disable_thermal_control()
+        if self.uevents is not None:
+            self.uevents.stop()
+        if self.rfkill_monitor is not None:
+            self.rfkill_monitor.stop()
+        self.helper.close()
+        self.telemetry.close()
+        self.processes.close()
+        self.backlight.close()
+        self.sysfs.close()
 
@@ -0,0 +1,225 @@
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .sysfs import SysfsReader
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+BACKLIGHT_DIR = "class/backlight"
+# Perceived brightness is roughly a power law of luminance; percentages are
+# mapped through this exponent so equal slider steps look like equal steps.
+GAMMA = 2.2
+FADE_FPS = 60
+# Fade length used for profile switches; direct slider moves are instant.
+PROFILE_FADE_MS = 300
+# When several interfaces drive the same panel, the first type listed wins
+# (the same order as systemd-backlight and gsd-backlight).
+TYPE_PRIORITY = ("firmware", "platform", "raw")
+
+
+def percent_to_raw(percent: float, maximum: int, gamma: float = GAMMA) -> int:
+    if percent <= 0:
+        return 0
+    # Never round a non-zero request down to "panel off".
+    return max(1, round(maximum * (min(percent, 100) / 100) ** gamma))
+
+
+def raw_to_percent(raw: int, maximum: int, gamma: float = GAMMA) -> int:
+    if raw <= 0 or maximum <= 0:
+        return 0
+    return round(min(1.0, raw / maximum) ** (1 / gamma) * 100)
+
+
+@dataclass(frozen=True)
+class BacklightDevice:
+    name: str
+    type: str                   # "firmware", "platform" or "raw"
+    max_brightness: int
+    connector: Optional[str]    # DRM connector (e.g. "card1-eDP-1") for native raw devices
+
+
+# ================================================================
+#  Backlight
+# ================================================================
+
+class Backlight:
+    """
+    Every backlight device, enumerated once with its max_brightness cached.
+    Writes go through fds kept open for the object's lifetime; fades run on
+    one timer thread at a fixed frame rate, and a new target replaces the
+    fade in progress from wherever it had got to.
+    """
+
+    def __init__(self, sysfs: SysfsReader, gamma: float = GAMMA, fps: int = FADE_FPS):
+        self.sysfs = sysfs
+        self.gamma = gamma
+        self.period = 1.0 / fps
+        self._devices: Optional[List[BacklightDevice]] = None
+        self._write_fds: Dict[str, int] = {}
+        self._written: Dict[str, int] = {}
+        self._cond = threading.Condition()
+        self._fade: Optional[Dict[str, float]] = None   # start/end percent, start time, duration
+        self._generation = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    # --- Discovery ---
+    def devices(self) -> List[BacklightDevice]:
+        if self._devices is None:
+            devices = []
+            for name in self.sysfs.listdir(BACKLIGHT_DIR):
+                maximum = self.sysfs.read_int(f"{BACKLIGHT_DIR}/{name}/max_brightness")
+                if not maximum or maximum <= 0:
+                    continue
+                parent = os.path.realpath(self.sysfs.path(BACKLIGHT_DIR, name, "device"))
+                connector = os.path.basename(parent) if "/drm/" in parent else None
+                devices.append(BacklightDevice(name, self.sysfs.read(f"{BACKLIGHT_DIR}/{name}/type") or "raw",
+                                               maximum, connector))
+            self._devices = devices
+        return self._devices
+
+    def controlled(self) -> List[BacklightDevice]:
+        """
+        The devices to drive: one per panel. Native devices tied to a DRM
+        connector each own a panel; otherwise the firmware/platform/raw
+        interfaces are assumed to be aliases of the built-in panel and only
+        the highest-priority type is used.
+        """
+        devices = self.devices()
+        panels = [d for d in devices if d.connector is not None]
+        if len(panels) > 1:
+            return panels
+        for kind in TYPE_PRIORITY:
+            matching = [d for d in devices if d.type == kind]
+            if matching:
+                return matching
+        return devices[:1]
+
+    def invalidate(self):
+        """Re-enumerate on next use (a backlight device was added or removed)."""
+        with self._cond:
+            self._devices = None
+            fds, self._write_fds = list(self._write_fds.values()), {}
+            self._written = {}
+        for fd in fds:
+            os.close(fd)
+
+    # --- Reading ---
+    def current_raw(self) -> Dict[str, Optional[int]]:
+        return {d.name: self.sysfs.read_int(f"{BACKLIGHT_DIR}/{d.name}/brightness") for d in self.controlled()}
+
+    def raw_for(self, percent: float) -> Dict[str, int]:
+        return {d.name: percent_to_raw(percent, d.max_brightness, self.gamma) for d in self.controlled()}
+
+    def get_percent(self) -> Optional[int]:
+        """Perceptual brightness of the primary (first controlled) device."""
+        devices = self.controlled()
+        if not devices:
+            return None
+        raw = self.sysfs.read_int(f"{BACKLIGHT_DIR}/{devices[0].name}/brightness")
+        if raw is None:
+            return None
+        return raw_to_percent(raw, devices[0].max_brightness, self.gamma)
+
+    # --- Writing ---
+    def _write(self, device: BacklightDevice, raw: int):
+        if self._written.get(device.name) == raw:
+            return
+        fd = self._write_fds.get(device.name)
+        if fd is None:
+            fd = os.open(self.sysfs.path(BACKLIGHT_DIR, device.name, "brightness"), os.O_WRONLY | os.O_CLOEXEC)
+            self._write_fds[device.name] = fd
+        data = str(raw).encode()
+        os.pwrite(fd, data, 0)
+        try:
+            os.ftruncate(fd, len(data))  # no-op on sysfs; keeps plain-file trees clean
+        except OSError:
+            pass
+        self._written[device.name] = raw
+
+    def _write_percent(self, percent: float):
+        for device in self.controlled():
+            self._write(device, percent_to_raw(percent, device.max_brightness, self.gamma))
+
+    def set_percent(self, percent: int, fade_ms: int = 0) -> Dict[str, int]:
+        """
+        Move every controlled device to `percent`, over `fade_ms` if > 0.
+        Returns the raw target per device; fades complete in the background.
+        """
+        if not 0 <= percent <= 100:
+            raise ValueError("percentage must be between 0 and 100")
+        if not self.controlled():
+            raise FileNotFoundError("no backlight device found")
+        with self._cond:
+            self._generation += 1
+            start = self.get_percent() if fade_ms > 0 else None
+            if start is None or start == percent:
+                self._fade = None
+                self._written = {}  # the hardware may have changed behind our back
+                self._write_percent(percent)
+            else:
+                self._fade = {"from": start, "to": percent, "start": time.monotonic(), "duration": fade_ms / 1000}
+                self._ensure_thread()
+            self._cond.notify()
+        return self.raw_for(percent)
+
+    def cancel(self):
+        """Stop a fade in progress where it is."""
+        with self._cond:
+            self._generation += 1
+            self._fade = None
+            self._cond.notify()
+
+    # --- Fade Thread ---
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="backlight-fade", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        with self._cond:
+            while not self._stopped:
+                fade = self._fade
+                if fade is None:
+                    self._cond.wait()
+                    continue
+                generation = self._generation
+                self._written = {}
+                frame = 0
+                while generation == self._generation and not self._stopped:
+                    # Frames are scheduled on absolute deadlines so a late
+                    # frame does not push every later one back.
+                    elapsed = frame * self.period
+                    progress = min(1.0, elapsed / fade["duration"]) if fade["duration"] else 1.0
+                    try:
+                        self._write_percent(fade["from"] + (fade["to"] - fade["from"]) * progress)
+                    except OSError as e:
+                        print(f"[BACKLIGHT ERROR] Fade aborted: {e}", file=sys.stderr)
+                        break
+                    if progress >= 1.0:
+                        break
+                    # Drop frames we are already too late for instead of
+                    # stretching the fade.
+                    frame = max(frame + 1, int((time.monotonic() - fade["start"]) / self.period) + 1)
+                    delay = fade["start"] + frame * self.period - time.monotonic()
+                    if delay > 0:
+                        self._cond.wait(delay)  # set_percent()/cancel() wake us early
+                if generation == self._generation:
+                    self._fade = None
+
+    def close(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for fd in self._write_fds.values():
+            os.close(fd)
+        self._write_fds = {}
@@ -0,0 +1,242 @@
+import threading
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from .helper import WriteSysfs
+from .sysfs import SysfsReader
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+CPUFREQ_DIR = "devices/system/cpu/cpufreq"
+CPU_DIR = "devices/system/cpu"
+# Hybrid Intel parts register one PMU per core type, each listing its CPUs.
+HYBRID_PMUS = (("cpu_core", "performance"), ("cpu_atom", "efficiency"))
+# Labels of the fastest and slowest cluster; any in between are "clusterN".
+CLUSTER_LABELS = ("performance", "efficiency")
+# Without hybrid PMUs, capacities/peak frequencies within this fraction of
+# each other are one cluster, so Turbo Boost Max 3.0 "favoured" cores (a few
+# hundred MHz above their siblings) do not look like a separate core type.
+CLUSTER_TOLERANCE = 0.15
+
+
+# ================================================================
+#  Policy Model
+# ================================================================
+
+@dataclass(frozen=True)
+class CpufreqPolicy:
+    """Static description of one cpufreq policy (read once at enumeration)."""
+    name: str                 # e.g. "policy0"
+    cpus: Tuple[int, ...]     # related_cpus
+    cpuinfo_min_freq: Optional[int]
+    cpuinfo_max_freq: Optional[int]
+    available_governors: Tuple[str, ...]
+    available_epps: Tuple[str, ...]
+    cluster: str = ""
+
+
+@dataclass(frozen=True)
+class PolicyState:
+    """Current, mutable settings of a policy."""
+    policy: str
+    governor: Optional[str]
+    epp: Optional[str]
+    min_freq: Optional[int]
+    max_freq: Optional[int]
+    cur_freq: Optional[int]
+
+
+def _parse_cpu_list(text: Optional[str]) -> Tuple[int, ...]:
+    """Parse "0 1 2" (related_cpus) or "0-3,8" (cpulist) notation."""
+    cpus: List[int] = []
+    for part in (text or "").replace(",", " ").split():
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            cpus.extend(range(int(lo), int(hi) + 1))
+        elif part.isdigit():
+            cpus.append(int(part))
+    return tuple(cpus)
+
+
+# ================================================================
+#  Cpufreq Subsystem
+# ================================================================
+
+class Cpufreq:
+    """
+    Per-policy view of CPU frequency scaling. Policies are enumerated once
+    from /sys/devices/system/cpu/cpufreq/policy* and cached, so every
+    operation touches one file per policy instead of one per CPU.
+    """
+
+    def __init__(self, sysfs: SysfsReader):
+        self.sysfs = sysfs
+        self._policies: Optional[Dict[str, CpufreqPolicy]] = None
+        self._lock = threading.Lock()
+
+    def _attr(self, policy: str, name: str) -> str:
+        return f"{CPUFREQ_DIR}/{policy}/{name}"
+
+    def _enumerate(self) -> Dict[str, CpufreqPolicy]:
+        names = [n for n in self.sysfs.listdir(CPUFREQ_DIR) if n.startswith("policy") and n[6:].isdigit()]
+        names.sort(key=lambda n: int(n[6:]))
+        policies = []
+        for name in names:
+            read = lambda attr: self.sysfs.read(self._attr(name, attr))
+            cpus = _parse_cpu_list(read("related_cpus")) or _parse_cpu_list(read("affected_cpus"))
+            policies.append(CpufreqPolicy(
+                name=name,
+                cpus=cpus,
+                cpuinfo_min_freq=self.sysfs.read_int(self._attr(name, "cpuinfo_min_freq")),
+                cpuinfo_max_freq=self.sysfs.read_int(self._attr(name, "cpuinfo_max_freq")),
+                available_governors=tuple((read("scaling_available_governors") or "").split()),
+                available_epps=tuple((read("energy_performance_available_preferences") or "").split()),
+            ))
+        labels = self._hybrid_labels(policies) or self._ranked_labels(policies)
+        return {p.name: replace(p, cluster=labels[p.name]) for p in policies}
+
+    def _hybrid_labels(self, policies: List[CpufreqPolicy]) -> Optional[Dict[str, str]]:
+        """Core type from the hybrid PMUs' CPU lists; None if this is not a hybrid part."""
+        types = {}
+        for pmu, label in HYBRID_PMUS:
+            for cpu in _parse_cpu_list(self.sysfs.read(f"devices/{pmu}/cpus")):
+                types[cpu] = label
+        if len(set(types.values())) < 2:
+            return None
+        labels = {}
+        for p in policies:
+            found = {types.get(cpu) for cpu in p.cpus} - {None}
+            labels[p.name] = found.pop() if len(found) == 1 else "all"
+        return labels
+
+    def _ranked_labels(self, policies: List[CpufreqPolicy]) -> Dict[str, str]:
+        """
+        Rank policies by cpu_capacity (the scheduler's own notion of core
+        size, on ARM and others), falling back to cpuinfo_max_freq. Values
+        within CLUSTER_TOLERANCE of each other group together; one group is "all".
+        """
+        capacities = {}
+        for p in policies:
+            values = [self.sysfs.read_int(f"{CPU_DIR}/cpu{cpu}/cpu_capacity") for cpu in p.cpus]
+            if values and all(v is not None for v in values):
+                capacities[p.name] = max(values)
+        if len(capacities) == len(policies):
+            keys = capacities
+        else:
+            keys = {p.name: p.cpuinfo_max_freq or 0 for p in policies}
+        # Walk the distinct values downwards, starting a new group whenever a
+        # value falls more than CLUSTER_TOLERANCE below the top of the current one.
+        groups: List[int] = []
+        rank_of: Dict[int, int] = {}
+        for value in sorted(set(keys.values()), reverse=True):
+            if not groups or value < groups[-1] * (1 - CLUSTER_TOLERANCE):
+                groups.append(value)
+            rank_of[value] = len(groups) - 1
+        labels = {}
+        for name, value in keys.items():
+            rank = rank_of[value]
+            if len(groups) == 1:
+                labels[name] = "all"
+            elif rank == 0:
+                labels[name] = CLUSTER_LABELS[0]
+            elif rank == len(groups) - 1:
+                labels[name] = CLUSTER_LABELS[1]
+            else:
+                labels[name] = f"cluster{rank}"
+        return labels
+
+    def policies(self) -> List[CpufreqPolicy]:
+        with self._lock:
+            if self._policies is None:
+                self._policies = self._enumerate()
+            return list(self._policies.values())
+
+    def invalidate(self):
+        """Forget the cached enumeration (e.g. after CPU hotplug)."""
+        with self._lock:
+            self._policies = None
+
+    def cpu_to_policy(self) -> Dict[int, str]:
+        return {cpu: p.name for p in self.policies() for cpu in p.cpus}
+
+    def clusters(self) -> Dict[str, List[str]]:
+        """Cluster label -> policy names."""
+        result: Dict[str, List[str]] = {}
+        for p in self.policies():
+            result.setdefault(p.cluster, []).append(p.name)
+        return result
+
+    def is_heterogeneous(self) -> bool:
+        return len(self.clusters()) > 1
+
+    def resolve(self, targets: Optional[List[str]] = None) -> List[CpufreqPolicy]:
+        """Policies selected by name ("policy4") or cluster label; all when None."""
+        policies = self.policies()
+        if targets is None or "all" in targets:
+            return policies
+        wanted = set(targets)
+        return [p for p in policies if p.name in wanted or p.cluster in wanted]
+
+    # --- Reads ---
+    def state(self, policy: str) -> PolicyState:
+        return PolicyState(
+            policy=policy,
+            governor=self.sysfs.read(self._attr(policy, "scaling_governor")),
+            epp=self.sysfs.read(self._attr(policy, "energy_performance_preference")),
+            min_freq=self.sysfs.read_int(self._attr(policy, "scaling_min_freq")),
+            max_freq=self.sysfs.read_int(self._attr(policy, "scaling_max_freq")),
+            cur_freq=self.sysfs.read_int(self._attr(policy, "scaling_cur_freq")),
+        )
+
+    def states(self) -> List[PolicyState]:
+        return [self.state(p.name) for p in self.policies()]
+
+    def governor(self) -> Optional[str]:
+        """The governor if every policy agrees, otherwise "mixed"."""
+        governors = {s.governor for s in self.states() if s.governor}
+        if not governors:
+            return None
+        return governors.pop() if len(governors) == 1 else "mixed"
+
+    def boost(self) -> Optional[bool]:
+        value = self.sysfs.read_int(f"{CPUFREQ_DIR}/boost")
+        if value is not None:
+            return value == 1
+        no_turbo = self.sysfs.read_int("devices/system/cpu/intel_pstate/no_turbo")
+        return None if no_turbo is None else no_turbo == 0
+
+    # --- Write operations (applied in one batch by the caller) ---
+    def _ops(self, targets, attribute: str, value: str) -> List[WriteSysfs]:
+        return [WriteSysfs(self.sysfs.path(self._attr(p.name, attribute)), value) for p in self.resolve(targets)]
+
+    def governor_ops(self, governor: str, targets: Optional[List[str]] = None) -> List[WriteSysfs]:
+        return self._ops(targets, "scaling_governor", governor)
+
+    def epp_ops(self, epp: str, targets: Optional[List[str]] = None) -> List[WriteSysfs]:
+        return self._ops(targets, "energy_performance_preference", epp)
+
+    def freq_limit_ops(self, min_freq: Optional[int] = None, max_freq: Optional[int] = None,
+                       targets: Optional[List[str]] = None) -> List[WriteSysfs]:
+        ops = []
+        for p in self.resolve(targets):
+            writes = []
+            if min_freq is not None:
+                writes.append(WriteSysfs(self.sysfs.path(self._attr(p.name, "scaling_min_freq")), str(min_freq)))
+            if max_freq is not None:
+                writes.append(WriteSysfs(self.sysfs.path(self._attr(p.name, "scaling_max_freq")), str(max_freq)))
+            # Older kernels reject min > max: when the new floor is above the
+            # current ceiling, write the ceiling first.
+            current_max = self.sysfs.read_int(self._attr(p.name, "scaling_max_freq"))
+            if min_freq is not None and current_max is not None and min_freq > current_max:
+                writes.reverse()
+            ops += writes
+        return ops
+
+    def boost_ops(self, enable: bool) -> List[WriteSysfs]:
+        if self.sysfs.exists(f"{CPUFREQ_DIR}/boost"):
+            return [WriteSysfs(self.sysfs.path(CPUFREQ_DIR, "boost"), "1" if enable else "0")]
+        if self.sysfs.exists("devices/system/cpu/intel_pstate/no_turbo"):
+            return [WriteSysfs(self.sysfs.path("devices/system/cpu/intel_pstate/no_turbo"), "0" if enable else "1")]
+        return []
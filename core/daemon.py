@@ -0,0 +1,571 @@
+"""
+Headless power-management daemon for the Linux Power Manager.
+
+The daemon owns one AppLogic and one Sampler and serves any number of
+clients over a Unix-domain socket. Each message is a single JSON line:
+
+    -> {"id": 1, "method": "get_snapshot"}
+    <- {"id": 1, "result": {"seq": 42, "power_status": "online", ...}}
+    -> {"id": 2, "method": "subscribe"}
+    <- {"id": 2, "result": true}
+    <- {"event": "snapshot", "data": {...}}          (on every sampler tick)
+    -> {"id": 3, "method": "apply_profile", "params": {"name": "Power Saver"}}
+    <- {"id": 3, "result": {"changed": 3, "skipped": 5, ...}}
+
+Errors are returned as {"id": N, "error": "..."}. Snapshots are encoded
+once per tick and the same bytes are queued to every subscriber.
+
+The socket lives in a directory only the daemon's user may write
+(/run/linux-power-manager, created 0750), so no other user can bind the
+name first. The socket is created with mode 0660. Access to it is granted by group:
+pass socket_group (--socket-group, or LPM_SOCKET_GROUP) to let its members
+in. Without it, only the daemon's own user and group can connect. Methods
+that write (WRITE_METHODS) additionally check the peer's SO_PEERCRED uid:
+only root, the daemon's own user and the owner of the active session may
+call them. apply_ops accepts a fixed set of typed operations on the knobs
+the GUI controls (see check_client_op), never free-form sysfs writes.
+"""
+
+import asyncio
+import grp
+import json
+import os
+import pwd
+import re
+import signal
+import socket
+import stat
+import struct
+import threading
+from dataclasses import asdict, fields
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from .helper import SetBrightness, SetGovernor, SetRfkill, WriteSysfs, decode_op
+from .sampler import DEFAULT_INTERVAL, Sampler, StateSnapshot
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+DEFAULT_SOCKET_DIR = "/run/linux-power-manager"
+DEFAULT_SOCKET_PATH = os.environ.get("LPM_SOCKET", os.path.join(DEFAULT_SOCKET_DIR, "daemon.sock"))
+SOCKET_DIR_MODE = 0o750
+DEFAULT_SOCKET_GROUP = os.environ.get("LPM_SOCKET_GROUP")
+SOCKET_MODE = 0o660
+# Uid allowed to write besides root; defaults to the active session on seat0.
+DEFAULT_SESSION_USER = os.environ.get("LPM_SESSION_USER")
+SEAT_FILE = "/run/systemd/seats/seat0"
+# Methods that change hardware or daemon state.
+WRITE_METHODS = frozenset({"apply_profile", "apply_ops", "set_metrics"})
+# sysfs attributes (relative to the sysfs root) a client may write through
+# apply_ops, with the values each accepts.
+CLIENT_WRITABLE = (
+    (re.compile(r"devices/system/cpu/cpufreq/policy\d+/(scaling_governor|energy_performance_preference)"),
+     re.compile(r"[a-z_]{1,32}")),
+    (re.compile(r"devices/system/cpu/cpufreq/policy\d+/scaling_(min|max)_freq"), re.compile(r"\d{1,10}")),
+    (re.compile(r"bus/usb/devices/(usb\d+|\d+-[\d.]+)/power/control"), re.compile(r"on|auto")),
+)
+CLIENT_GOVERNOR = re.compile(r"[a-z_]{1,32}")
+CLIENT_RFKILL_KINDS = ("wlan", "bluetooth", "wwan", "uwb", "gps", "fm", "nfc")
+MAX_CLIENT_FADE_MS = 10000
+# Snapshots queued per subscriber before the oldest are dropped.
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+def snapshot_to_dict(snapshot: StateSnapshot) -> Dict[str, Any]:
+    data = {f.name: getattr(snapshot, f.name) for f in fields(snapshot)}
+    data["extra"] = dict(snapshot.extra)
+    return data
+
+
+def snapshot_from_dict(data: Dict[str, Any]) -> StateSnapshot:
+    values = dict(data)
+    values["extra"] = MappingProxyType(dict(values.get("extra") or {}))
+    return StateSnapshot(**values)
+
+
+def check_client_op(operation, sysfs_root: str):
+    """Raise PermissionError unless a socket client may request `operation`."""
+    if isinstance(operation, SetBrightness):
+        if (type(operation.percent) is int and 0 <= operation.percent <= 100
+                and type(operation.fade_ms) is int and 0 <= operation.fade_ms <= MAX_CLIENT_FADE_MS):
+            return
+    elif isinstance(operation, SetGovernor):
+        if isinstance(operation.governor, str) and CLIENT_GOVERNOR.fullmatch(operation.governor):
+            return
+    elif isinstance(operation, SetRfkill):
+        if operation.kind in CLIENT_RFKILL_KINDS and isinstance(operation.blocked, bool):
+            return
+    elif isinstance(operation, WriteSysfs) and isinstance(operation.path, str) and isinstance(operation.value, str):
+        # Only normalised paths: no "..", "." or doubled slashes to walk around the patterns.
+        if os.path.isabs(operation.path) and os.path.normpath(operation.path) == operation.path:
+            relative = os.path.relpath(operation.path, sysfs_root)
+            for path_pattern, value_pattern in CLIENT_WRITABLE:
+                if path_pattern.fullmatch(relative) and value_pattern.fullmatch(operation.value):
+                    return
+    raise PermissionError(f"operation not allowed over the socket: {operation!r}")
+
+
+def peer_uid(sock: Optional[socket.socket]) -> Optional[int]:
+    """Uid of the process on the other end of a Unix socket (SO_PEERCRED)."""
+    if sock is None:
+        return None
+    try:
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    except (OSError, AttributeError):
+        return None
+    return struct.unpack("3i", creds)[1]
+
+
+def _resolve_uid(user: Optional[str]) -> Optional[int]:
+    if user is None:
+        return None
+    if user.isdigit():
+        return int(user)
+    try:
+        return pwd.getpwnam(user).pw_uid
+    except KeyError:
+        raise LookupError(f"unknown session user {user!r}") from None
+
+
+# ================================================================
+#  Server
+# ================================================================
+
+class _Client:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.subscribed = False
+        self.uid: Optional[int] = None    # from SO_PEERCRED
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def push(self, line: bytes):
+        # Latest wins: a slow reader loses old snapshots, never new ones.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(line)
+
+
+class PowerDaemon:
+    """
+    Serves AppLogic state over a Unix socket. Hardware is sampled once per
+    tick regardless of the number of clients; blocking AppLogic calls run
+    on the default executor so the event loop never waits on sysfs or sudo.
+    """
+
+    def __init__(self, logic, socket_path: str = DEFAULT_SOCKET_PATH, sampler: Optional[Sampler] = None,
+                 interval: float = DEFAULT_INTERVAL, metrics_file: Optional[str] = None,
+                 socket_group: Optional[str] = DEFAULT_SOCKET_GROUP,
+                 session_user: Optional[str] = DEFAULT_SESSION_USER):
+        self.logic = logic
+        self.socket_path = socket_path
+        self.socket_group = socket_group
+        # None: whoever owns the active session on seat0 (per request, so user switching is followed).
+        self.session_uid = _resolve_uid(session_user)
+        # Prometheus textfile, rewritten after every sampler tick.
+        self.metrics_file = metrics_file
+        if sampler is None:
+            sampler = Sampler(logic, interval)
+            logic.attach_sampler(sampler)
+        self.sampler = sampler
+        self._clients: Set[_Client] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._methods: Dict[str, Callable[..., Any]] = {
+            "ping": self._ping,
+            "get_snapshot": self._get_snapshot,
+            "subscribe": self._subscribe,
+            "unsubscribe": self._unsubscribe,
+            "list_profiles": self._list_profiles,
+            "apply_profile": self._apply_profile,
+            "apply_ops": self._apply_ops,
+            "get_battery_estimate": self._get_battery_estimate,
+            "get_energy_report": self._get_energy_report,
+            "get_metrics": self._get_metrics,
+            "set_metrics": self._set_metrics,
+        }
+
+    # --- Snapshot fan-out ---
+    def _on_snapshot(self, snapshot: StateSnapshot):
+        """Runs on the sampler thread: hand the snapshot to the event loop."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._broadcast, snapshot)
+
+    def _broadcast(self, snapshot: StateSnapshot):
+        line = (json.dumps({"event": "snapshot", "data": snapshot_to_dict(snapshot)}) + "\n").encode()
+        for client in self._clients:
+            if client.subscribed:
+                client.push(line)
+        if self.metrics_file:
+            self._loop.run_in_executor(None, self._write_metrics)
+
+    def _write_metrics(self):
+        try:
+            self.logic.write_metrics_file(self.metrics_file)
+        except OSError as e:
+            print(f"[DAEMON] Could not write {self.metrics_file}: {e}")
+
+    def _on_power_event(self, status: str):
+        """Uevent thread: sample right away so subscribers and rules see the change."""
+        self.sampler.request_sample()
+
+    # --- Request handlers ---
+    async def _ping(self, client: _Client, params: Dict[str, Any]):
+        return "pong"
+
+    async def _get_snapshot(self, client: _Client, params: Dict[str, Any]):
+        snapshot = self.sampler.latest()
+        if snapshot is None:
+            snapshot = await self._loop.run_in_executor(None, self.sampler.sample_now)
+        return snapshot_to_dict(snapshot)
+
+    async def _subscribe(self, client: _Client, params: Dict[str, Any]):
+        client.subscribed = True
+        return True
+
+    async def _unsubscribe(self, client: _Client, params: Dict[str, Any]):
+        client.subscribed = False
+        return True
+
+    async def _list_profiles(self, client: _Client, params: Dict[str, Any]):
+        return await self._loop.run_in_executor(None, self.logic.get_all_profiles)
+
+    async def _apply_profile(self, client: _Client, params: Dict[str, Any]):
+        name = params.get("name")
+        if not isinstance(name, str):
+            raise ValueError("apply_profile needs a 'name'")
+        report = await self._loop.run_in_executor(None, self.logic.apply_profile, name)
+        if report is None:
+            raise LookupError(f"profile {name!r} not found")
+        self.sampler.request_sample()
+        return {
+            "changed": report.changed,
+            "skipped": report.skipped,
+            "plan_ms": report.plan_ms,
+            "apply_ms": report.apply_ms,
+            "steps": [asdict(step) for step in report.steps],
+        }
+
+    async def _apply_ops(self, client: _Client, params: Dict[str, Any]):
+        """Privileged operations from a GUI attached to this daemon (see AppLogic.attach_daemon)."""
+        operations = [decode_op(data) for data in params.get("ops") or []]
+        for operation in operations:
+            check_client_op(operation, self.logic.sysfs.root)
+        results = await self._loop.run_in_executor(None, self.logic.apply_batch, operations)
+        # Written outside a profile switch: re-observe the knobs the reconciler caches.
+        self.logic.reconciler.invalidate()
+        self.sampler.request_sample()
+        return [asdict(result) for result in results]
+
+    async def _get_battery_estimate(self, client: _Client, params: Dict[str, Any]):
+        return asdict(self.logic.get_battery_estimate())
+
+    async def _get_energy_report(self, client: _Client, params: Dict[str, Any]):
+        return self.logic.get_energy_report()
+
+    async def _get_metrics(self, client: _Client, params: Dict[str, Any]):
+        text = self.logic.get_metrics(params.get("format", "json"))
+        return text if params.get("format") == "prometheus" else json.loads(text)
+
+    async def _set_metrics(self, client: _Client, params: Dict[str, Any]):
+        self.logic.set_metrics_enabled(bool(params.get("enabled", True)))
+        return True
+
+    # --- Access control ---
+    def _active_session_uid(self) -> Optional[int]:
+        if self.session_uid is not None:
+            return self.session_uid
+        try:
+            with open(SEAT_FILE) as f:
+                for line in f:
+                    key, _, value = line.strip().partition("=")
+                    if key == "ACTIVE_UID" and value.isdigit():
+                        return int(value)
+        except OSError:
+            pass
+        return None
+
+    def _may_write(self, client: _Client) -> bool:
+        if client.uid is None:
+            return False
+        return client.uid in (0, os.geteuid()) or client.uid == self._active_session_uid()
+
+    async def _dispatch(self, client: _Client, line: bytes):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            handler = self._methods.get(request.get("method"))
+            if handler is None:
+                raise ValueError(f"unknown method: {request.get('method')!r}")
+            if request.get("method") in WRITE_METHODS and not self._may_write(client):
+                raise PermissionError(f"{request['method']} is only allowed for root and the active session's user")
+            response = {"id": request_id, "result": await handler(client, request.get("params") or {})}
+        except Exception as e:
+            response = {"id": request_id, "error": str(e)}
+        # Responses bypass the snapshot queue so they are never dropped.
+        client.writer.write((json.dumps(response, default=str) + "\n").encode())
+
+    # --- Connections ---
+    async def _writer_task(self, client: _Client):
+        while True:
+            line = await client.queue.get()
+            client.writer.write(line)
+            await client.writer.drain()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = _Client(writer)
+        client.uid = peer_uid(writer.get_extra_info("socket"))
+        client.task = asyncio.current_task()
+        self._clients.add(client)
+        sender = asyncio.ensure_future(self._writer_task(client))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    await self._dispatch(client, line)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            print(f"[DAEMON] Dropping client: {e}")
+        finally:
+            self._clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    async def serve(self):
+        """Run until stop() is called or SIGINT/SIGTERM is received."""
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._prepare_socket_dir()
+        if os.path.exists(self.socket_path):
+            if DaemonClient.available(self.socket_path):
+                raise FileExistsError(f"another daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)  # stale socket from a previous run
+        self._server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        self._set_socket_permissions()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(sig, self._stopped.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # not on the main thread
+
+        unsubscribe = self.sampler.subscribe(self._on_snapshot)
+        self.sampler.start()
+        try:
+            self.logic.watch_power_status(self._on_power_event)
+        except OSError as e:
+            print(f"[DAEMON] Power uevents unavailable, relying on sampling: {e}")
+        print(f"[DAEMON] Listening on {self.socket_path}")
+        try:
+            await self._stopped.wait()
+        finally:
+            unsubscribe()
+            self.sampler.stop()
+            self._server.close()
+            # Closing the transports lets each handler see EOF and exit on its own.
+            handlers = [client.task for client in self._clients if client.task is not None]
+            for client in list(self._clients):
+                client.writer.close()
+            if handlers:
+                await asyncio.wait(handlers, timeout=2.0)
+            await self._server.wait_closed()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            print("[DAEMON] Stopped.")
+
+    def _socket_gid(self) -> Optional[int]:
+        if not self.socket_group:
+            return None
+        try:
+            return int(self.socket_group) if self.socket_group.isdigit() else grp.getgrnam(self.socket_group).gr_gid
+        except KeyError:
+            print(f"[DAEMON] Unknown socket group {self.socket_group!r}.")
+            return None
+
+    def _prepare_socket_dir(self):
+        """Create the socket's directory if needed; refuse one that others could write to."""
+        directory = os.path.dirname(os.path.abspath(self.socket_path))
+        try:
+            os.mkdir(directory, SOCKET_DIR_MODE)
+            os.chmod(directory, SOCKET_DIR_MODE)  # mkdir's mode is filtered by the umask
+        except FileExistsError:
+            pass
+        st = os.lstat(directory)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.geteuid() or st.st_mode & 0o022:
+            raise PermissionError(f"refusing socket directory {directory}: it must be a directory owned by "
+                                  f"uid {os.geteuid()} and writable only by it")
+        gid = self._socket_gid()
+        # Group members need to traverse a shared directory (0750) to reach the socket.
+        if gid is not None and st.st_mode & 0o010 and st.st_gid != gid:
+            os.chown(directory, -1, gid)
+
+    def _set_socket_permissions(self):
+        os.chmod(self.socket_path, SOCKET_MODE)
+        gid = self._socket_gid()
+        if gid is None:
+            print(f"[DAEMON] No --socket-group given: only uid {os.geteuid()} / gid {os.getegid()} can connect.")
+            return
+        try:
+            os.chown(self.socket_path, -1, gid)
+        except OSError as e:
+            print(f"[DAEMON] Could not hand the socket to group {self.socket_group!r}: {e}")
+
+    def stop(self):
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def run(self):
+        asyncio.run(self.serve())
+
+
+# ================================================================
+#  Client Side
+# ================================================================
+
+class DaemonClient:
+    """
+    Blocking client for the daemon socket. Responses are matched to
+    requests by id; snapshot events are passed to subscribe() callbacks
+    on a background reader thread.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 10.0):
+        self.socket_path = socket_path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(socket_path)
+        self._file = self._sock.makefile("rb")
+        self.timeout = timeout
+        self._next_id = 0
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+        self._listeners: List[Callable[[StateSnapshot], None]] = []
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_loop, name="daemon-client", daemon=True)
+        self._reader.start()
+
+    @staticmethod
+    def available(socket_path: str = DEFAULT_SOCKET_PATH) -> bool:
+        """True if a daemon is accepting connections on `socket_path`."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(socket_path)
+                return True
+            except OSError:
+                return False
+
+    def _read_loop(self):
+        try:
+            for line in self._file:
+                try:
+                    message = json.loads(line)
+                    snapshot = snapshot_from_dict(message["data"]) if message.get("event") == "snapshot" else None
+                except (ValueError, TypeError, KeyError, AttributeError) as e:
+                    # Out of step with the daemon: fail the pending calls rather than let them time out.
+                    print(f"[CLIENT ERROR] Bad message from daemon, closing: {e}")
+                    break
+                if snapshot is not None:
+                    for callback in list(self._listeners):
+                        try:
+                            callback(snapshot)
+                        except Exception as e:
+                            print(f"[CLIENT ERROR] subscriber {callback!r}: {e}")
+                    continue
+                with self._cond:
+                    self._pending[message.get("id")] = message
+                    self._cond.notify_all()
+        except OSError:
+            pass  # close() shut the socket down under us
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            self.close()
+
+    def request(self, method: str, **params) -> Any:
+        with self._cond:
+            if self._closed:
+                raise ConnectionError("daemon connection is closed")
+            self._next_id += 1
+            request_id = self._next_id
+        payload = {"id": request_id, "method": method, "params": params}
+        self._sock.sendall((json.dumps(payload) + "\n").encode())
+        with self._cond:
+            if not self._cond.wait_for(lambda: request_id in self._pending or self._closed, self.timeout):
+                raise TimeoutError(f"daemon did not answer {method!r}")
+            if request_id not in self._pending:
+                raise ConnectionError("daemon closed the connection")
+            response = self._pending.pop(request_id)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    def subscribe(self, callback: Callable[[StateSnapshot], None]):
+        if not self._listeners:
+            self.request("subscribe")
+        self._listeners.append(callback)
+
+    def close(self):
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+class RemoteSampler:
+    """
+    Sampler-compatible view of a daemon's snapshot stream, so the GUI can
+    render from the daemon instead of sampling the hardware itself.
+    """
+
+    def __init__(self, client: DaemonClient):
+        self.client = client
+        self._latest: Optional[StateSnapshot] = None
+        self._subscribers: List[Callable[[StateSnapshot], None]] = []
+        self._lock = threading.Lock()
+        client.subscribe(self._on_snapshot)
+
+    def _on_snapshot(self, snapshot: StateSnapshot):
+        self._latest = snapshot
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(snapshot)
+
+    def add_source(self, name: str, read_fn: Callable[[], Any]):
+        pass  # the daemon's sampler decides what is read
+
+    def subscribe(self, callback: Callable[[StateSnapshot], None]) -> Callable[[], None]:
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def latest(self) -> Optional[StateSnapshot]:
+        return self._latest
+
+    def set_interval(self, interval: float):
+        pass
+
+    def sample_now(self) -> StateSnapshot:
+        return snapshot_from_dict(self.client.request("get_snapshot"))
+
+    def request_sample(self):
+        pass  # the daemon samples on its own power events
+
+    def start(self):
+        # Render the daemon's current state right away rather than waiting a tick.
+        self._on_snapshot(self.sample_now())
+
+    def stop(self):
+        self.client.close()
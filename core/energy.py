@@ -0,0 +1,177 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .power_supply import PowerSupplies
+from .sysfs import SysfsReader
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+POWERCAP_DIR = "class/powercap"
+RAPL_PREFIX = "intel-rapl:"
+# Intervals longer than this (suspend, stalled sampler) are not attributed:
+# a RAPL counter can wrap more than once and the battery reading is stale.
+MAX_INTERVAL = 600.0
+UNKNOWN_PROFILE = "(none)"
+
+
+# ================================================================
+#  RAPL Domains
+# ================================================================
+
+@dataclass(frozen=True)
+class RaplDomain:
+    key: str            # "package-0", "package-0/core", "package-0/dram", ...
+    directory: str      # relative to the sysfs root
+    max_energy_uj: Optional[int]
+
+
+@dataclass
+class ProfileEnergy:
+    """Energy attributed to one profile across every interval it was active."""
+    seconds: float = 0.0
+    rapl_joules: Dict[str, float] = field(default_factory=dict)
+    battery_joules: float = 0.0
+    battery_seconds: float = 0.0   # time covered by a battery power reading
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "seconds": self.seconds,
+            "rapl_joules": dict(self.rapl_joules),
+            "rapl_watts": {k: j / self.seconds for k, j in self.rapl_joules.items()} if self.seconds else {},
+            "battery_joules": self.battery_joules,
+            "battery_watts": self.battery_joules / self.battery_seconds if self.battery_seconds else None,
+        }
+
+
+def counter_delta(previous: int, current: int, max_range: Optional[int]) -> Optional[int]:
+    """Increase of a wrapping energy counter; None if it cannot be determined."""
+    if current >= previous:
+        return current - previous
+    if not max_range:
+        return None
+    return current + max_range - previous
+
+
+# ================================================================
+#  Energy Meter
+# ================================================================
+
+class EnergyMeter:
+    """
+    Reads RAPL energy counters and battery power, and attributes the energy
+    spent in each interval to the profile that was active during it.
+
+    read() returns a plain, JSON-friendly reading (so it can travel in a
+    sampler snapshot); account(reading, profile) turns consecutive
+    readings into joules.
+    """
+
+    def __init__(self, sysfs: SysfsReader, supplies: Optional[PowerSupplies] = None):
+        self.sysfs = sysfs
+        self.supplies = supplies or PowerSupplies(sysfs)
+        self._domains: Optional[List[RaplDomain]] = None
+        self._previous: Optional[Dict[str, Any]] = None
+        self._profiles: Dict[str, ProfileEnergy] = {}
+        self._last_watts: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    # --- Discovery ---
+    def domains(self) -> List[RaplDomain]:
+        if self._domains is None:
+            domains = []
+            names: Dict[str, str] = {}
+            for entry in self.sysfs.listdir(POWERCAP_DIR):
+                if not entry.startswith(RAPL_PREFIX):
+                    continue
+                directory = f"{POWERCAP_DIR}/{entry}"
+                name = self.sysfs.read(f"{directory}/name") or entry
+                names[entry] = name
+                parent = entry.rsplit(":", 1)[0]
+                key = f"{names.get(parent, parent)}/{name}" if entry.count(":") > 1 else name
+                domains.append(RaplDomain(key, directory, self.sysfs.read_int(f"{directory}/max_energy_range_uj")))
+            # listdir is sorted, so packages ("intel-rapl:0") precede their subzones.
+            self._domains = domains
+        return self._domains
+
+    def battery_watts(self) -> Optional[float]:
+        """Instantaneous power of all system batteries in watts."""
+        power = self.supplies.read().power_now
+        return power / 1e6 if power is not None else None
+
+    # --- Sampling ---
+    def read(self) -> Dict[str, Any]:
+        counters = {}
+        for domain in self.domains():
+            # energy_uj is root-only on kernels patched for CVE-2020-8694.
+            value = self.sysfs.read_int(f"{domain.directory}/energy_uj")
+            if value is not None:
+                counters[domain.key] = value
+        # CLOCK_BOOTTIME: immune to wall-clock adjustments like monotonic,
+        # but keeps counting during suspend, so an interval spanning one
+        # exceeds MAX_INTERVAL instead of squeezing its energy into seconds.
+        return {"timestamp": time.clock_gettime(time.CLOCK_BOOTTIME), "rapl_uj": counters, "battery_watts": self.battery_watts()}
+
+    def account(self, reading: Dict[str, Any], profile: Optional[str]) -> Dict[str, float]:
+        """
+        Attribute the interval ending at `reading` to `profile` (the profile
+        that was active during it). Returns the average watts per RAPL
+        domain (and "battery") over the interval.
+        """
+        profile = profile or UNKNOWN_PROFILE
+        ranges = {d.key: d.max_energy_uj for d in self.domains()}
+        with self._lock:
+            previous = self._previous
+            if previous is not None and reading["timestamp"] <= previous["timestamp"]:
+                # Taken before the reading we already accounted for (e.g. a
+                # checkpoint() ran between the sampler's read and its account()).
+                # Its interval is already charged; keep the newer baseline.
+                return {}
+            self._previous = reading
+            if previous is None:
+                return {}
+            interval = reading["timestamp"] - previous["timestamp"]
+            if interval > MAX_INTERVAL:
+                return {}
+            totals = self._profiles.setdefault(profile, ProfileEnergy())
+            totals.seconds += interval
+            watts: Dict[str, float] = {}
+            for key, current in reading["rapl_uj"].items():
+                if key not in previous["rapl_uj"]:
+                    continue
+                delta = counter_delta(previous["rapl_uj"][key], current, ranges.get(key))
+                if delta is None:
+                    continue
+                joules = delta / 1e6
+                totals.rapl_joules[key] = totals.rapl_joules.get(key, 0.0) + joules
+                watts[key] = joules / interval
+            before, after = previous.get("battery_watts"), reading.get("battery_watts")
+            if before is not None and after is not None:
+                # Trapezoid between the two instantaneous readings.
+                average = (before + after) / 2
+                totals.battery_joules += average * interval
+                totals.battery_seconds += interval
+                watts["battery"] = average
+            self._last_watts = watts
+            return watts
+
+    def checkpoint(self, profile: Optional[str]):
+        """Close the current interval now (e.g. right before a profile switch)."""
+        self.account(self.read(), profile)
+
+    # --- Results ---
+    def power_draw(self) -> Dict[str, float]:
+        """Average watts per domain over the most recent interval."""
+        with self._lock:
+            return dict(self._last_watts)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: totals.as_dict() for name, totals in self._profiles.items()}
+
+    def reset(self):
+        with self._lock:
+            self._profiles = {}
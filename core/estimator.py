@@ -0,0 +1,201 @@
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+DEFAULT_WINDOW = 600.0  # seconds of samples in the regression window
+CONFIDENCE_Z = 1.96     # ~95 % bounds on the fitted rate
+MIN_FIT_SAMPLES = 3
+UWH_TO_JOULES = 3.6e-3
+RESUM_EVERY = 1024      # evictions between exact re-summations (limits float drift)
+
+
+# ================================================================
+#  Sliding-Window Regression
+# ================================================================
+
+class SlidingRegression:
+    """
+    Least-squares line y = a + b·x over the samples of the last `window`
+    seconds. Running sums make add() and eviction O(1); the sums are
+    rebuilt from the window now and then to keep rounding error bounded.
+    """
+
+    def __init__(self, window: float = DEFAULT_WINDOW):
+        self.window = window
+        self._points = deque()
+        self._origin = 0.0
+        self._evictions = 0
+        self._reset_sums()
+
+    def _reset_sums(self):
+        self.n = 0
+        self._sx = self._sy = self._sxx = self._sxy = self._syy = 0.0
+
+    def _accumulate(self, x: float, y: float, sign: int):
+        self.n += sign
+        self._sx += sign * x
+        self._sy += sign * y
+        self._sxx += sign * x * x
+        self._sxy += sign * x * y
+        self._syy += sign * y * y
+
+    def add(self, x: float, y: float):
+        if not self._points:
+            self._origin = x
+        x -= self._origin
+        self._points.append((x, y))
+        self._accumulate(x, y, 1)
+        while self._points and x - self._points[0][0] > self.window:
+            old_x, old_y = self._points.popleft()
+            self._accumulate(old_x, old_y, -1)
+            self._evictions += 1
+        if self._evictions >= RESUM_EVERY:
+            self._evictions = 0
+            self._reset_sums()
+            for px, py in self._points:
+                self._accumulate(px, py, 1)
+
+    def clear(self):
+        self._points.clear()
+        self._reset_sums()
+
+    def fit(self) -> Optional[Tuple[float, float]]:
+        """Return (slope, slope standard error), or None with too few samples."""
+        n = self.n
+        if n < MIN_FIT_SAMPLES:
+            return None
+        sxx = self._sxx - self._sx * self._sx / n
+        if sxx <= 0:
+            return None
+        sxy = self._sxy - self._sx * self._sy / n
+        syy = self._syy - self._sy * self._sy / n
+        slope = sxy / sxx
+        residual = max(syy - slope * sxy, 0.0)
+        stderr = math.sqrt(residual / (n - 2) / sxx)
+        return slope, stderr
+
+
+# ================================================================
+#  Battery Estimator
+# ================================================================
+
+@dataclass(frozen=True)
+class BatteryEstimate:
+    state: str                         # "discharging", "charging" or "unknown"
+    rate_watts: Optional[float]        # signed: negative while discharging
+    time_to_empty: Optional[float]     # seconds
+    time_to_empty_bounds: Optional[Tuple[float, float]]
+    time_to_full: Optional[float]      # seconds
+    time_to_full_bounds: Optional[Tuple[float, float]]
+    samples: int
+
+
+def _time_bounds(remaining: float, slope: float, stderr: float) -> Tuple[float, float]:
+    """Time to cover `remaining` µWh at |slope| ± z·stderr µWh/s."""
+    fast = abs(slope) + CONFIDENCE_Z * stderr
+    slow = abs(slope) - CONFIDENCE_Z * stderr
+    return remaining / fast, (remaining / slow if slow > 0 else math.inf)
+
+
+class BatteryEstimator:
+    """
+    Fits charge/discharge rate from energy_now samples and attributes
+    battery drain to the active profile. Each sample costs O(1).
+    """
+
+    def __init__(self, window: float = DEFAULT_WINDOW):
+        self._regression = SlidingRegression(window)
+        self._lock = threading.Lock()
+        self._state = "unknown"
+        self._last: Optional[Tuple[float, Optional[float], Optional[float]]] = None
+        self._energy_now: Optional[float] = None
+        self._energy_full: Optional[float] = None
+        self._power_now: Optional[float] = None
+        # profile -> [joules drained on battery, seconds on battery]
+        self._profile_drain: Dict[str, list] = {}
+
+    def add_sample(self, timestamp: float, ac_online: bool, energy_now: Optional[float],
+                   power_now: Optional[float] = None, energy_full: Optional[float] = None,
+                   profile: Optional[str] = None):
+        """Feed one reading (energy in µWh, power in µW)."""
+        state = "charging" if ac_online else "discharging"
+        with self._lock:
+            if state != self._state:
+                self._regression.clear()
+                self._state = state
+                self._last = None
+            if energy_now is not None:
+                self._regression.add(timestamp, energy_now)
+            if not ac_online and self._last is not None:
+                self._attribute(profile or "(none)", timestamp, energy_now, power_now)
+            self._last = (timestamp, energy_now, power_now)
+            self._energy_now, self._power_now = energy_now, power_now
+            if energy_full is not None:
+                self._energy_full = energy_full
+
+    def _attribute(self, profile: str, timestamp: float, energy_now, power_now):
+        last_ts, last_energy, last_power = self._last
+        dt = timestamp - last_ts
+        if dt <= 0:
+            return
+        if energy_now is not None and last_energy is not None:
+            joules = max(last_energy - energy_now, 0.0) * UWH_TO_JOULES
+        elif power_now is not None and last_power is not None:
+            joules = (power_now + last_power) / 2 * 1e-6 * dt
+        else:
+            return
+        entry = self._profile_drain.setdefault(profile, [0.0, 0.0])
+        entry[0] += joules
+        entry[1] += dt
+
+    def add_snapshot(self, snapshot, profile: Optional[str] = None):
+        battery = snapshot.get("battery_energy") or {}
+        self.add_sample(snapshot.timestamp, snapshot.power_status == "online",
+                        battery.get("energy_now"), battery.get("power_now"),
+                        battery.get("energy_full"), profile)
+
+    def estimate(self) -> BatteryEstimate:
+        with self._lock:
+            fit = self._regression.fit()
+            energy, full, power = self._energy_now, self._energy_full, self._power_now
+            state, samples = self._state, self._regression.n
+
+        slope = stderr = None
+        if fit is not None:
+            slope, stderr = fit
+        elif power and energy is not None:
+            # Not enough history yet: trust the instantaneous power reading.
+            slope, stderr = (power if state == "charging" else -power) / 3600, 0.0
+
+        rate = slope * 3600 * 1e-6 if slope is not None else None
+        tte = tte_bounds = ttf = ttf_bounds = None
+        if slope is not None and energy is not None:
+            if slope < 0:
+                tte = energy / -slope
+                tte_bounds = _time_bounds(energy, slope, stderr)
+            elif slope > 0 and full:
+                remaining = max(full - energy, 0.0)
+                ttf = remaining / slope
+                ttf_bounds = _time_bounds(remaining, slope, stderr)
+        return BatteryEstimate(state, rate, tte, tte_bounds, ttf, ttf_bounds, samples)
+
+    def profile_drain(self) -> Dict[str, Dict[str, float]]:
+        """Average battery drain per profile: joules, seconds and watts."""
+        with self._lock:
+            return {
+                name: {"joules": j, "seconds": s, "watts": j / s if s else 0.0}
+                for name, (j, s) in self._profile_drain.items()
+            }
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None or math.isinf(seconds):
+        return "--"
+    minutes = int(seconds // 60)
+    return f"{minutes // 60}h {minutes % 60:02d}m"
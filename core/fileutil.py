@@ -0,0 +1,34 @@
+import os
+import stat
+import tempfile
+from typing import Optional
+
+# ================================================================
+#  Atomic File Replacement
+# ================================================================
+
+def write_atomic(path: str, text: str):
+    """Replace `path` via a private temp file in the same directory, keeping its mode and owner."""
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        st: Optional[os.stat_result] = os.stat(path)
+    except FileNotFoundError:
+        st = None
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fchmod(f.fileno(), stat.S_IMODE(st.st_mode) if st else 0o644)
+            if st is not None and (st.st_uid, st.st_gid) != (os.geteuid(), os.getegid()):
+                os.fchown(f.fileno(), st.st_uid, st.st_gid)
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
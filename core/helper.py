@@ -0,0 +1,347 @@
+"""
+Long-lived privileged helper for the Linux Power Manager.
+
+AppLogic starts this module once per session (through sudo when it is not
+already root) and talks to it over stdin/stdout. Each request is a single
+JSON line carrying a batch of typed operations; the helper applies them in
+order and answers with one result per operation:
+
+    -> {"id": 1, "ops": [{"op": "set_brightness", "percent": 80},
+                         {"op": "write_sysfs", "path": "/sys/...", "value": "auto"}]}
+    <- {"id": 1, "results": [{"ok": true, "value": 4800}, {"ok": true, "value": null}]}
+
+Values are written with os.write() to paths validated against the sysfs
+root, so nothing is ever passed through a shell. The one file outside
+sysfs it edits is UPower.conf, at the path given on its command line.
+"""
+
+import argparse
+import json
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, ClassVar, Dict, List, Optional
+
+from .instrumentation import metrics
+from .sysfs import SysfsReader, SYSFS_ROOT
+from . import upower
+from .backlight import Backlight
+
+
+# ================================================================
+#  Typed Operations
+# ================================================================
+
+@dataclass(frozen=True)
+class SetBrightness:
+    percent: int
+    fade_ms: int = 0  # > 0: fade there on the helper's timer thread
+    op: ClassVar[str] = "set_brightness"
+
+
+@dataclass(frozen=True)
+class SetGovernor:
+    governor: str
+    op: ClassVar[str] = "set_governor"
+
+
+@dataclass(frozen=True)
+class WriteSysfs:
+    path: str
+    value: str
+    op: ClassVar[str] = "write_sysfs"
+
+
+@dataclass(frozen=True)
+class SetRfkill:
+    kind: str  # rfkill type, e.g. "wlan" or "bluetooth"
+    blocked: bool
+    op: ClassVar[str] = "set_rfkill"
+
+
+@dataclass(frozen=True)
+class UpdateUPowerConfig:
+    settings: Dict[str, str]  # UPower.conf key -> value; other keys are kept
+    op: ClassVar[str] = "update_upower_config"
+
+
+# How long the client waits for a response. The first one also covers
+# helper start-up, which may include a sudo password prompt.
+RESPONSE_TIMEOUT = 10.0
+STARTUP_TIMEOUT = 60.0
+
+OPERATION_TYPES = {cls.op: cls for cls in (SetBrightness, SetGovernor, WriteSysfs, SetRfkill, UpdateUPowerConfig)}
+
+
+@dataclass(frozen=True)
+class OpResult:
+    ok: bool
+    value: Any = None
+    error: Optional[str] = None
+
+
+def encode_op(operation) -> Dict[str, Any]:
+    return {"op": operation.op, **asdict(operation)}
+
+
+def decode_op(data: Dict[str, Any]):
+    fields = dict(data)
+    cls = OPERATION_TYPES.get(fields.pop("op", None))
+    if cls is None:
+        raise ValueError(f"unknown operation: {data.get('op')!r}")
+    return cls(**fields)
+
+
+# ================================================================
+#  Helper Side (runs privileged)
+# ================================================================
+
+class HelperServer:
+    """Executes operation batches against the sysfs tree and UPower.conf."""
+
+    def __init__(self, sysfs_root: str = SYSFS_ROOT, upower_config_path: str = upower.UPOWER_CONFIG_PATH,
+                 restart_upower: bool = True):
+        self.sysfs = SysfsReader(sysfs_root)
+        self._real_root = os.path.realpath(sysfs_root)
+        self.backlight = Backlight(self.sysfs)
+        # The only file outside sysfs the helper may write.
+        self.upower_config_path = upower_config_path
+        self.restart_upower = restart_upower
+
+    def _check_path(self, path: str) -> str:
+        real = os.path.realpath(path)
+        if os.path.commonpath([real, self._real_root]) != self._real_root:
+            raise PermissionError(f"refusing to write outside {self.sysfs.root}: {path}")
+        return real
+
+    def _write(self, path: str, value: str):
+        fd = os.open(self._check_path(path), os.O_WRONLY | os.O_TRUNC | os.O_CLOEXEC)
+        try:
+            os.write(fd, value.encode())
+        finally:
+            os.close(fd)
+
+    def _set_brightness(self, op: SetBrightness):
+        # Raw target of the primary panel; a fade continues after we answer.
+        targets = self.backlight.set_percent(op.percent, op.fade_ms)
+        return next(iter(targets.values()))
+
+    def _set_governor(self, op: SetGovernor):
+        # One write per cpufreq policy; per-CPU paths only on kernels without policy dirs.
+        updated = 0
+        for name in self.sysfs.listdir("devices/system/cpu/cpufreq"):
+            if name.startswith("policy"):
+                self._write(self.sysfs.path("devices/system/cpu/cpufreq", name, "scaling_governor"), op.governor)
+                updated += 1
+        if updated:
+            return updated
+        for name in self.sysfs.listdir("devices/system/cpu"):
+            if not (name.startswith("cpu") and name[3:].isdigit()):
+                continue
+            path = self.sysfs.path("devices/system/cpu", name, "cpufreq/scaling_governor")
+            if os.path.exists(path):
+                self._write(path, op.governor)
+                updated += 1
+        if not updated:
+            raise FileNotFoundError("no cpufreq-capable cores found")
+        return updated
+
+    def _write_sysfs(self, op: WriteSysfs):
+        self._write(op.path, op.value)
+
+    def _set_rfkill(self, op: SetRfkill):
+        updated = 0
+        for name in self.sysfs.listdir("class/rfkill"):
+            if self.sysfs.read(f"class/rfkill/{name}/type") == op.kind:
+                self._write(self.sysfs.path("class/rfkill", name, "soft"), "1" if op.blocked else "0")
+                updated += 1
+        if not updated:
+            raise FileNotFoundError(f"no rfkill device of type {op.kind!r}")
+        return updated
+
+    def _update_upower_config(self, op: UpdateUPowerConfig):
+        unknown = set(op.settings) - set(upower.UPOWER_CONFIG_KEYS)
+        if unknown:
+            raise ValueError(f"unsupported UPower keys: {', '.join(sorted(unknown))}")
+        return upower.apply_settings(self.upower_config_path, op.settings, restart=self.restart_upower)
+
+    def apply(self, operation) -> OpResult:
+        handler = getattr(self, f"_{operation.op}")
+        try:
+            return OpResult(ok=True, value=handler(operation))
+        except Exception as e:
+            return OpResult(ok=False, error=str(e))
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        results = []
+        for data in request.get("ops", []):
+            try:
+                result = self.apply(decode_op(data))
+            except (TypeError, ValueError) as e:
+                result = OpResult(ok=False, error=str(e))
+            results.append(asdict(result))
+        return {"id": request.get("id"), "results": results}
+
+    def serve(self, infile=sys.stdin, outfile=sys.stdout):
+        for line in infile:
+            if not line.strip():
+                continue
+            try:
+                response = self.handle(json.loads(line))
+            except json.JSONDecodeError as e:
+                response = {"id": None, "error": f"bad request: {e}"}
+            outfile.write(json.dumps(response) + "\n")
+            outfile.flush()
+
+
+# ================================================================
+#  Client Side (used by AppLogic)
+# ================================================================
+
+class HelperClient:
+    """
+    Starts the helper on first use and sends it operation batches.
+    execute() returns None whenever the helper cannot be reached, so the
+    caller can fall back to the per-call C tools.
+    """
+
+    def __init__(self, project_root: str, sysfs_root: str = SYSFS_ROOT, use_sudo: Optional[bool] = None,
+                 upower_config_path: str = upower.UPOWER_CONFIG_PATH):
+        self.project_root = project_root
+        self.sysfs_root = sysfs_root
+        self.upower_config_path = upower_config_path
+        self.use_sudo = (os.geteuid() != 0) if use_sudo is None else use_sudo
+        self._process: Optional[subprocess.Popen] = None
+        self._buffer = b""
+        self._answered = False  # has the current process responded yet?
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _command(self) -> List[str]:
+        command = [sys.executable, "-m", "core.helper", "--sysfs-root", self.sysfs_root,
+                   "--upower-config", self.upower_config_path]
+        return (["sudo"] if self.use_sudo else []) + command
+
+    def _ensure_started(self) -> bool:
+        if self._process and self._process.poll() is None:
+            return True
+        command = self._command()
+        print(f"[HELPER] Starting: {' '.join(command)}")
+        try:
+            self._process = subprocess.Popen(
+                command,
+                cwd=self.project_root,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                bufsize=0,
+            )
+            self._buffer = b""
+            self._answered = False
+            return True
+        except OSError as e:
+            print(f"[HELPER ERROR] Could not start helper: {e}")
+            self._process = None
+            return False
+
+    def execute(self, operations: List[Any]) -> Optional[List[OpResult]]:
+        """Apply a batch of operations in one round trip."""
+        if not operations:
+            return []
+        with metrics.track("helper", "batch") as tracked:
+            results = self._execute(operations)
+            if results is None or not all(r.ok for r in results):
+                tracked.fail()
+            return results
+
+    def _reset(self):
+        """Drop a helper that can no longer be trusted to stay in sync."""
+        if self._process is not None:
+            try:
+                self._process.kill()
+                self._process.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        self._process = None
+        self._buffer = b""
+
+    def _readline(self, timeout: float) -> Optional[bytes]:
+        """One response line, or None on EOF or when `timeout` passes first."""
+        deadline = time.monotonic() + timeout
+        fd = self._process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return None
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line
+
+    def _execute(self, operations: List[Any]) -> Optional[List[OpResult]]:
+        with self._lock:
+            if not self._ensure_started():
+                return None
+            self._next_id += 1
+            request = {"id": self._next_id, "ops": [encode_op(op) for op in operations]}
+            try:
+                self._process.stdin.write((json.dumps(request) + "\n").encode())
+                self._process.stdin.flush()
+                line = self._readline(RESPONSE_TIMEOUT if self._answered else STARTUP_TIMEOUT)
+            except (BrokenPipeError, OSError) as e:
+                print(f"[HELPER ERROR] Lost connection to helper: {e}")
+                self._reset()
+                return None
+            if line is None:
+                print("[HELPER ERROR] Helper exited or stopped responding.")
+                self._reset()
+                return None
+            try:
+                response = json.loads(line)
+                if response.get("id") != request["id"]:
+                    raise ValueError(f"response id {response.get('id')!r} does not match request {request['id']}")
+                if "results" not in response:
+                    print(f"[HELPER ERROR] {response.get('error')}")
+                    return None
+                results = [OpResult(**result) for result in response["results"]]
+                if len(results) != len(operations):
+                    raise ValueError(f"{len(results)} results for {len(operations)} operations")
+            except (ValueError, TypeError, AttributeError) as e:
+                # The stream is out of step with our requests; start over.
+                print(f"[HELPER ERROR] Bad response from helper: {e}")
+                self._reset()
+                return None
+            self._answered = True
+            return results
+
+    def close(self):
+        with self._lock:
+            if self._process is None:
+                return
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+            self._process = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Privileged helper for the Linux Power Manager.")
+    parser.add_argument("--sysfs-root", default=SYSFS_ROOT)
+    parser.add_argument("--upower-config", default=upower.UPOWER_CONFIG_PATH)
+    args = parser.parse_args()
+    # stdout carries the protocol; anything else printed here (fade errors
+    # from the backlight thread, UPower restarts, ...) goes to stderr so it
+    # can never interleave with a response.
+    protocol_out, sys.stdout = sys.stdout, sys.stderr
+    HelperServer(args.sysfs_root, args.upower_config).serve(outfile=protocol_out)
+
+
+if __name__ == "__main__":
+    main()
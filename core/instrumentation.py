@@ -0,0 +1,197 @@
+"""
+Counters, latency histograms, error counts and in-flight gauges for every
+hardware access (C tools, shell commands, sysfs reads/writes, helper
+batches) and notification.
+
+    with metrics.track("c_tool", "brightness_tool") as op:
+        result = run(...)
+        if result is None:
+            op.fail()
+
+Recording is off unless LPM_METRICS=1 or metrics.enable() is called; while
+off, track() returns a shared no-op context and costs one attribute check.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+METRIC_PREFIX = "lpm_operation"
+
+
+# ================================================================
+#  Series & Tracking
+# ================================================================
+
+class _Series:
+    __slots__ = ("count", "errors", "in_flight", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+
+
+class _Tracker:
+    __slots__ = ("_metrics", "_series", "_start", "_failed")
+
+    def __init__(self, metrics: "Metrics", series: _Series):
+        self._metrics = metrics
+        self._series = series
+        self._failed = False
+
+    def fail(self):
+        """Count this call as an error even though it did not raise."""
+        self._failed = True
+
+    def __enter__(self):
+        with self._metrics._lock:
+            self._series.in_flight += 1
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        self._metrics._observe(self._series, elapsed, self._failed or exc_type is not None)
+        return False
+
+
+class _NullTracker:
+    __slots__ = ()
+
+    def fail(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TRACKER = _NullTracker()
+
+
+class Metrics:
+    """Registry of per-(kind, name) operation series."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+        self.started = time.time()
+
+    def track(self, kind: str, name: str):
+        if not self.enabled:
+            return _NULL_TRACKER
+        key = (kind, name)
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, _Series())
+        return _Tracker(self, series)
+
+    def _observe(self, series: _Series, elapsed: float, failed: bool):
+        slot = len(BUCKETS)
+        for i, bound in enumerate(BUCKETS):
+            if elapsed <= bound:
+                slot = i
+                break
+        with self._lock:
+            series.in_flight -= 1
+            series.count += 1
+            series.total += elapsed
+            if elapsed > series.max:
+                series.max = elapsed
+            series.buckets[slot] += 1
+            if failed:
+                series.errors += 1
+
+    # --- Export ---
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [(key, s.count, s.errors, s.in_flight, s.total, s.max, list(s.buckets))
+                     for key, s in sorted(self._series.items())]
+        return [{
+            "kind": kind,
+            "name": name,
+            "count": count,
+            "errors": errors,
+            "in_flight": in_flight,
+            "total_seconds": total,
+            "mean_ms": total / count * 1000 if count else 0.0,
+            "max_ms": peak * 1000,
+            "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], buckets)),
+        } for (kind, name), count, errors, in_flight, total, peak, buckets in items]
+
+    def to_json(self) -> str:
+        return json.dumps({"enabled": self.enabled, "since": self.started, "operations": self.snapshot()}, indent=2)
+
+    def to_prometheus(self) -> str:
+        lines = [
+            f"# HELP {METRIC_PREFIX}_total Completed hardware/notification operations.",
+            f"# TYPE {METRIC_PREFIX}_total counter",
+        ]
+        rows = self.snapshot()
+        label = lambda r: f'kind="{r["kind"]}",name="{_escape(r["name"])}"'
+        lines += [f"{METRIC_PREFIX}_total{{{label(r)}}} {r['count']}" for r in rows]
+        lines += [f"# HELP {METRIC_PREFIX}_errors_total Operations that failed.",
+                  f"# TYPE {METRIC_PREFIX}_errors_total counter"]
+        lines += [f"{METRIC_PREFIX}_errors_total{{{label(r)}}} {r['errors']}" for r in rows]
+        lines += [f"# HELP {METRIC_PREFIX}_in_flight Operations currently running.",
+                  f"# TYPE {METRIC_PREFIX}_in_flight gauge"]
+        lines += [f"{METRIC_PREFIX}_in_flight{{{label(r)}}} {r['in_flight']}" for r in rows]
+        lines += [f"# HELP {METRIC_PREFIX}_duration_seconds Operation latency.",
+                  f"# TYPE {METRIC_PREFIX}_duration_seconds histogram"]
+        for r in rows:
+            cumulative = 0
+            for bound, count in r["buckets"].items():
+                cumulative += count
+                lines.append(f'{METRIC_PREFIX}_duration_seconds_bucket{{{label(r)},le="{bound}"}} {cumulative}')
+            lines.append(f"{METRIC_PREFIX}_duration_seconds_sum{{{label(r)}}} {r['total_seconds']:.9f}")
+            lines.append(f"{METRIC_PREFIX}_duration_seconds_count{{{label(r)}}} {r['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Atomically write the text exposition (for node_exporter's textfile collector)."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.to_prometheus())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Process-wide registry used by AppLogic, SysfsReader and the helper client.
+metrics = Metrics(enabled=os.environ.get("LPM_METRICS") == "1")
@@ -0,0 +1,309 @@
+import os
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from itertools import repeat
+from operator import add, sub, truediv
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .procstat import PROC_ROOT
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+DEFAULT_INTERVAL = 0.25      # seconds between samples
+UP_THRESHOLD = 0.60          # smoothed utilisation that switches a policy to "high"
+DOWN_THRESHOLD = 0.25        # ... and back to "low"
+DOWN_SAMPLES = 4             # consecutive quiet samples before stepping down
+SMOOTHING = 0.5              # EWMA weight of the newest sample
+INITIAL_READ_SIZE = 8192
+
+# What "high" and "low" mean per policy. EPP-capable drivers (intel_pstate,
+# amd-pstate active mode) only get EPP writes; the rest switch governor.
+LEVELS = {
+    "high": {"governor": "performance", "epp": "balance_performance"},
+    "low": {"governor": "powersave", "epp": "balance_power"},
+}
+
+
+@dataclass(frozen=True)
+class PolicyLoad:
+    policy: str
+    level: Optional[str]        # "high", "low", or None until the first switch
+    utilisation: float          # smoothed, busiest CPU of the policy
+    switches: int
+
+
+# ================================================================
+#  /proc/stat Sampling
+# ================================================================
+
+class CpuStatReader:
+    """
+    Per-CPU busy/total jiffies from /proc/stat, read with one pread on an fd
+    kept open. Only the leading "cpu" lines are needed, so the read size
+    grows until they fit and the (long) interrupt counters are skipped.
+    """
+
+    def __init__(self, proc_root: str = PROC_ROOT):
+        self.path = os.path.join(proc_root, "stat")
+        self._fd: Optional[int] = None
+        self._size = INITIAL_READ_SIZE
+        self._names: List[bytes] = []
+        self._ids: List[int] = []
+        self._dense = True
+        self._total = array("q")
+        self._idle = array("q")
+
+    def _read_cpu_block(self) -> bytes:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+        while True:
+            data = os.pread(self._fd, self._size, 0)
+            end = data.find(b"\nintr")
+            if end < 0:
+                end = data.find(b"\nctxt")
+            if end >= 0 or len(data) < self._size:
+                block = data[:end] if end >= 0 else data
+                # Drop the aggregate "cpu " line; the per-CPU lines follow it.
+                return block[block.find(b"\ncpu") + 1:] if block.startswith(b"cpu ") else block
+            self._size *= 2
+
+    def sample(self) -> array:
+        """Utilisation (0..1) of every CPU since the previous call, indexed by CPU id."""
+        block = self._read_cpu_block()
+        tokens = block.split()
+        lines = block.count(b"cpu")
+        width = len(tokens) // lines if lines else 0
+        if width < 6 or width * lines != len(tokens):
+            return array("d")
+        names = tokens[::width]
+        if names != self._names:
+            # CPU hotplug (or first call): restart the deltas.
+            self._names = names
+            self._ids = [int(name[3:]) for name in names]
+            self._dense = self._ids == list(range(len(self._ids)))
+            self._total = array("q")
+        # Column-wise: user nice system idle iowait irq softirq steal (guest
+        # is already counted in user). Each map() runs as one C-level loop.
+        columns = [map(int, tokens[k::width]) for k in range(1, min(width, 9))]
+        total = array("q", map(sum, zip(*columns)))
+        idle = array("q", map(add, map(int, tokens[4::width]), map(int, tokens[5::width])))
+        if len(self._total) == len(total):
+            elapsed = array("q", map(sub, total, self._total))
+            busy = map(sub, elapsed, map(sub, idle, self._idle))
+            fractions = map(truediv, busy, map(max, elapsed, repeat(1)))
+        else:
+            fractions = repeat(0.0, len(total))
+        self._total, self._idle = total, idle
+        if self._dense:
+            return array("d", fractions)
+        usage = array("d", bytes(8 * (max(self._ids) + 1)))
+        for cpu, fraction in zip(self._ids, fractions):
+            usage[cpu] = fraction
+        return usage
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+# ================================================================
+#  Load-Following Governor
+# ================================================================
+
+class LoadGovernor:
+    """
+    Samples /proc/stat every `interval` seconds on its own thread and moves
+    each cpufreq policy between a "high" and a "low" setting. A policy goes
+    up as soon as its smoothed load crosses UP_THRESHOLD and comes down only
+    after DOWN_SAMPLES quiet samples below DOWN_THRESHOLD, so short pauses
+    in a burst do not cause flapping. All switches of one tick are written
+    in a single batch, and a policy only changes level once its write has
+    succeeded. A value that differs from what was last written means someone
+    else (a profile switch) changed the policy: that becomes the value to
+    restore, and stop() leaves such policies alone.
+    """
+
+    def __init__(self, cpufreq, apply_fn: Callable[[List[Any]], Any], proc_root: str = PROC_ROOT,
+                 interval: float = DEFAULT_INTERVAL, up_threshold: float = UP_THRESHOLD,
+                 down_threshold: float = DOWN_THRESHOLD, down_samples: int = DOWN_SAMPLES):
+        if not 0 <= down_threshold < up_threshold <= 1:
+            raise ValueError("need 0 <= down_threshold < up_threshold <= 1")
+        self.cpufreq = cpufreq
+        self.apply_fn = apply_fn
+        self.interval = interval
+        self.up_threshold = up_threshold
+        self.down_threshold = down_threshold
+        self.down_samples = down_samples
+        self.reader = CpuStatReader(proc_root)
+        self._policies = [(p.name, p.cpus, bool(p.available_epps)) for p in cpufreq.policies()]
+        epp_capable = {name: has_epp for name, _, has_epp in self._policies}
+        # policy -> the governor/EPP to put back on stop(), and what we last wrote.
+        self._saved = {s.policy: s.epp if epp_capable.get(s.policy) else s.governor for s in cpufreq.states()}
+        self._written: Dict[str, str] = {}
+        self._smoothed = {name: 0.0 for name, _, _ in self._policies}
+        # Start from whatever the policies already match, so enabling writes nothing by itself.
+        self._level = {name: self._matching_level(self._saved.get(name), has_epp)
+                       for name, _, has_epp in self._policies}
+        self._quiet = {name: 0 for name, _, _ in self._policies}
+        self._switches = {name: 0 for name, _, _ in self._policies}
+        self._failed_writes = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = time.monotonic()
+        self._ticks = 0
+        self._tick_cpu = 0.0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latency_count = 0
+
+    # --- Decisions ---
+    @staticmethod
+    def _matching_level(value: Optional[str], has_epp: bool) -> Optional[str]:
+        key = "epp" if has_epp else "governor"
+        return next((level for level, setting in LEVELS.items() if setting[key] == value), None)
+
+    def _current(self, policy: str, has_epp: bool) -> Optional[str]:
+        state = self.cpufreq.state(policy)
+        return state.epp if has_epp else state.governor
+
+    def _adopt_external(self, policy: str, has_epp: bool):
+        """Take over a value someone else wrote since our last write to `policy`."""
+        if policy not in self._written:
+            return
+        current = self._current(policy, has_epp)
+        if current != self._written[policy]:
+            del self._written[policy]
+            self._saved[policy] = current
+            self._level[policy] = self._matching_level(current, has_epp)
+
+    def _ops_for(self, policy: str, has_epp: bool, level: str) -> List[Any]:
+        value = LEVELS[level]["epp" if has_epp else "governor"]
+        if has_epp:
+            return self.cpufreq.epp_ops(value, targets=[policy])
+        return self.cpufreq.governor_ops(value, targets=[policy])
+
+    def tick(self) -> int:
+        """Take one sample and apply any switches. Returns the number of policies that switched."""
+        cpu_start = time.thread_time()
+        started = time.monotonic()
+        usage = self.reader.sample()
+        count = len(usage)
+        ops: List[Any] = []
+        switched: List[Tuple[str, str, str]] = []   # (policy, level, value) per op
+        with self._lock:
+            for name, cpus, has_epp in self._policies:
+                load = max((usage[c] for c in cpus if c < count), default=0.0)
+                smoothed = self._smoothed[name] = SMOOTHING * load + (1 - SMOOTHING) * self._smoothed[name]
+                level = self._level[name]
+                target = level
+                if smoothed >= self.up_threshold:
+                    self._quiet[name] = 0
+                    target = "high"
+                elif smoothed <= self.down_threshold:
+                    self._quiet[name] += 1
+                    if self._quiet[name] >= self.down_samples:
+                        target = "low"
+                else:
+                    self._quiet[name] = 0
+                if target != level:
+                    # Only switching policies pay for the extra read.
+                    self._adopt_external(name, has_epp)
+                    if target == self._level[name]:
+                        continue
+                    policy_ops = self._ops_for(name, has_epp, target)
+                    ops += policy_ops
+                    value = LEVELS[target]["epp" if has_epp else "governor"]
+                    switched += [(name, target, value)] * len(policy_ops)
+        results = self.apply_fn(ops) if ops else []
+        if ops and (not results or len(results) != len(ops)):
+            results = [None] * len(ops)
+        with self._lock:
+            committed = 0
+            for (name, target, value), result in zip(switched, results):
+                if result is None or not result.ok:
+                    # Level stays put, so the next tick retries.
+                    if not self._failed_writes:
+                        print(f"[LOAD GOVERNOR ERROR] {name} -> {value}: {result.error if result else 'not applied'}")
+                    self._failed_writes += 1
+                    continue
+                self._switches[name] += 1
+                self._level[name] = target
+                self._written[name] = value
+                committed += 1
+            if committed:
+                # Sample read -> decision -> sysfs writes done.
+                latency = time.monotonic() - started
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+                self._latency_count += 1
+            self._ticks += 1
+            self._tick_cpu += time.thread_time() - cpu_start
+        return committed
+
+    # --- Thread ---
+    def _run(self):
+        deadline = time.monotonic()
+        while not self._stopped.is_set():
+            try:
+                self.tick()
+            except OSError as e:
+                print(f"[LOAD GOVERNOR ERROR] {e}")
+            deadline += self.interval
+            delay = deadline - time.monotonic()
+            if delay < 0:
+                deadline = time.monotonic()  # fell behind; do not burst to catch up
+                delay = 0
+            self._stopped.wait(delay)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="load-governor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop sampling and restore every policy that still has the value we wrote."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        ops = []
+        for name, _, has_epp in self._policies:
+            self._adopt_external(name, has_epp)
+            saved = self._saved.get(name)
+            if name not in self._written or not saved or saved == self._written[name]:
+                continue
+            if has_epp:
+                ops += self.cpufreq.epp_ops(saved, targets=[name])
+            else:
+                ops += self.cpufreq.governor_ops(saved, targets=[name])
+        if ops:
+            self.apply_fn(ops)
+        self.reader.close()
+
+    # --- Reporting ---
+    def policies(self) -> List[PolicyLoad]:
+        with self._lock:
+            return [PolicyLoad(name, self._level[name], self._smoothed[name], self._switches[name])
+                    for name, _, _ in self._policies]
+
+    def stats(self) -> Dict[str, Any]:
+        """Tick overhead, decision latency (sample read -> writes done) and switch rate."""
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            switches = sum(self._switches.values())
+            return {
+                "ticks": self._ticks,
+                "interval_s": self.interval,
+                "tick_cpu_ms": self._tick_cpu / self._ticks * 1000 if self._ticks else 0.0,
+                "switches": switches,
+                "switches_per_min": switches / elapsed * 60 if elapsed else 0.0,
+                "failed_writes": self._failed_writes,
+                "decision_latency_ms": self._latency_total / self._latency_count * 1000 if self._latency_count else None,
+                "decision_latency_max_ms": self._latency_max * 1000 if self._latency_count else None,
+            }
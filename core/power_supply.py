@@ -0,0 +1,182 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .sysfs import SysfsReader
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+POWER_SUPPLY_DIR = "class/power_supply"
+UEVENT_PREFIX = "POWER_SUPPLY_"
+# Readings younger than this are shared between the getters called in one
+# sampler tick (power status, percentage, energy, RAPL/battery watts).
+DEFAULT_MAX_AGE = 0.5
+
+
+@dataclass(frozen=True)
+class SupplyState:
+    """One power supply, from a single read of its uevent file."""
+    name: str
+    type: str                      # "Battery", "Mains", "USB", "Wireless", ...
+    online: Optional[bool]         # adapters only
+    present: bool
+    scope: str                     # "System", or "Device" for peripheral batteries
+    status: Optional[str]          # "Charging", "Discharging", "Full", ...
+    capacity: Optional[int]        # percent
+    energy_now: Optional[int]      # µWh (converted from µAh where needed)
+    energy_full: Optional[int]     # µWh
+    power_now: Optional[int]       # µW, unsigned
+
+    @property
+    def is_battery(self) -> bool:
+        return self.type == "Battery"
+
+    @property
+    def powers_system(self) -> bool:
+        return self.scope != "Device"
+
+
+@dataclass(frozen=True)
+class PowerSupplyState:
+    """All supplies plus the aggregate across the system batteries."""
+    timestamp: float
+    supplies: Tuple[SupplyState, ...]
+    ac_online: Optional[bool]      # None if no adapter is exposed
+    percentage: Optional[float]    # energy-weighted across batteries
+    energy_now: Optional[int]      # µWh, summed
+    energy_full: Optional[int]     # µWh, summed
+    power_now: Optional[int]       # µW, summed
+
+    @property
+    def batteries(self) -> List[SupplyState]:
+        return [s for s in self.supplies if s.is_battery and s.powers_system and s.present]
+
+    def supply(self, name: str) -> Optional[SupplyState]:
+        for state in self.supplies:
+            if state.name == name:
+                return state
+        return None
+
+
+def parse_uevent(text: str) -> Dict[str, str]:
+    """POWER_SUPPLY_FOO=bar lines -> {"foo": "bar"}."""
+    values = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition("=")
+        if sep and key.startswith(UEVENT_PREFIX):
+            values[key[len(UEVENT_PREFIX):].lower()] = value
+    return values
+
+
+def _int(values: Dict[str, str], key: str) -> Optional[int]:
+    try:
+        return int(values[key])
+    except (KeyError, ValueError):
+        return None
+
+
+def supply_from_uevent(name: str, values: Dict[str, str]) -> SupplyState:
+    energy_now, energy_full = _int(values, "energy_now"), _int(values, "energy_full")
+    power = _int(values, "power_now")
+    # Charge-reporting batteries: µAh x V -> µWh, µA x V -> µW.
+    voltage = _int(values, "voltage_min_design") or _int(values, "voltage_now")
+    if voltage:
+        if energy_now is None and _int(values, "charge_now") is not None:
+            energy_now = _int(values, "charge_now") * voltage // 1_000_000
+        if energy_full is None and _int(values, "charge_full") is not None:
+            energy_full = _int(values, "charge_full") * voltage // 1_000_000
+    if power is None:
+        current, volts_now = _int(values, "current_now"), _int(values, "voltage_now")
+        if current is not None and volts_now is not None:
+            power = abs(current) * volts_now // 1_000_000
+    online = _int(values, "online")
+    present = _int(values, "present")
+    return SupplyState(
+        name=values.get("name", name),
+        type=values.get("type", ""),
+        online=None if online is None else online != 0,
+        present=present != 0 if present is not None else True,
+        scope=values.get("scope", "System"),
+        status=values.get("status"),
+        capacity=_int(values, "capacity"),
+        energy_now=energy_now,
+        energy_full=energy_full,
+        power_now=abs(power) if power is not None else None,
+    )
+
+
+def aggregate(supplies: Tuple[SupplyState, ...], timestamp: float) -> PowerSupplyState:
+    adapters = [s for s in supplies if not s.is_battery and s.online is not None and s.powers_system]
+    batteries = [s for s in supplies if s.is_battery and s.powers_system and s.present]
+
+    energy_now = energy_full = None
+    percentage: Optional[float] = None
+    if batteries and all(b.energy_now is not None and b.energy_full for b in batteries):
+        energy_now = sum(b.energy_now for b in batteries)
+        energy_full = sum(b.energy_full for b in batteries)
+        percentage = min(100.0, energy_now / energy_full * 100)
+    else:
+        capacities = [b.capacity for b in batteries if b.capacity is not None]
+        if capacities:
+            # Without energy figures every battery counts the same.
+            percentage = sum(capacities) / len(capacities)
+    powers = [b.power_now for b in batteries if b.power_now is not None]
+    return PowerSupplyState(
+        timestamp=timestamp,
+        supplies=supplies,
+        ac_online=any(a.online for a in adapters) if adapters else None,
+        percentage=percentage,
+        energy_now=energy_now,
+        energy_full=energy_full,
+        power_now=sum(powers) if powers else None,
+    )
+
+
+# ================================================================
+#  Power Supply Model
+# ================================================================
+
+class PowerSupplies:
+    """
+    Every supply under /sys/class/power_supply, each read with one pread of
+    its uevent file (the kernel renders all properties in that read). The
+    supply list is cached until invalidate() (called on add/remove uevents).
+    """
+
+    def __init__(self, sysfs: SysfsReader):
+        self.sysfs = sysfs
+        self._names: Optional[List[str]] = None
+        self._latest: Optional[PowerSupplyState] = None
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        if self._names is None:
+            self._names = self.sysfs.listdir(POWER_SUPPLY_DIR)
+        return self._names
+
+    def invalidate(self):
+        """Forget the supply list and the last reading."""
+        with self._lock:
+            self._names = None
+            self._latest = None
+
+    def read_supply(self, name: str) -> Optional[SupplyState]:
+        text = self.sysfs.read(f"{POWER_SUPPLY_DIR}/{name}/uevent")
+        if text is None:
+            return None
+        return supply_from_uevent(name, parse_uevent(text))
+
+    def read(self, max_age: float = DEFAULT_MAX_AGE) -> PowerSupplyState:
+        """Current state; a reading younger than `max_age` seconds is reused."""
+        latest = self._latest
+        now = time.monotonic()
+        if latest is not None and now - latest.timestamp < max_age:
+            return latest
+        supplies = tuple(s for s in (self.read_supply(n) for n in self.names()) if s is not None)
+        state = aggregate(supplies, now)
+        with self._lock:
+            self._latest = state
+        return state
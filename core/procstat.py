@@ -0,0 +1,200 @@
+import heapq
+import os
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+# Root of procfs. Override with LPM_PROC_ROOT to run against a fake tree.
+PROC_ROOT = os.environ.get("LPM_PROC_ROOT", "/proc")
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+READ_SIZE = 1024  # /proc/[pid]/stat is a single short line
+INITIAL_CAPACITY = 1024
+
+
+@dataclass(frozen=True)
+class ProcessUsage:
+    pid: int
+    comm: str
+    cpu_percent: float          # of one CPU over the last interval
+    cpu_seconds: float          # CPU time used during the last interval
+    wakeups_per_s: Optional[float]  # scheduler timeslices/s (schedstat), if available
+
+
+def parse_stat(data: bytes) -> Optional[Tuple[str, int, int]]:
+    """(comm, utime+stime ticks, starttime) from a /proc/[pid]/stat line."""
+    # comm may itself contain spaces and parentheses: split at the last ')'.
+    close = data.rfind(b")")
+    if close < 0:
+        return None
+    comm = data[data.find(b"(") + 1:close].decode(errors="replace")
+    fields = data[close + 2:].split()
+    try:
+        return comm, int(fields[11]) + int(fields[12]), int(fields[19])
+    except (IndexError, ValueError):
+        return None
+
+
+# ================================================================
+#  Process Sampler
+# ================================================================
+
+class ProcessSampler:
+    """
+    Incremental per-process CPU attribution. Each sample() walks /proc once
+    with scandir on a directory fd kept open for the sampler's lifetime and
+    reads every stat file relative to it. Per-PID state lives in parallel
+    arrays indexed by slot; slots of exited PIDs are recycled, so steady
+    state allocates nothing per process.
+    """
+
+    def __init__(self, proc_root: str = PROC_ROOT, include_threads: bool = False, track_wakeups: bool = True):
+        self.proc_root = proc_root
+        self.include_threads = include_threads
+        self.track_wakeups = track_wakeups
+        self._dir_fd: Optional[int] = None
+        self._lock = threading.Lock()
+        self._slots: Dict[int, int] = {}        # pid/tid -> slot
+        self._free: List[int] = []
+        self._capacity = 0
+        self._ids = array("q")
+        self._ticks = array("q")
+        self._start = array("q")
+        self._switches = array("q")
+        self._delta_ticks = array("q")
+        self._delta_switches = array("q")
+        self._seen = array("q")
+        self._comm: List[str] = []
+        self._generation = 0
+        self._last_time: Optional[float] = None
+        self.interval = 0.0
+        self._grow(INITIAL_CAPACITY)
+
+    def _grow(self, capacity: int):
+        extra = capacity - self._capacity
+        for arr in (self._ids, self._ticks, self._start, self._switches,
+                    self._delta_ticks, self._delta_switches, self._seen):
+            arr.extend([0] * extra)
+        self._comm.extend([""] * extra)
+        self._free.extend(range(capacity - 1, self._capacity - 1, -1))
+        self._capacity = capacity
+
+    def _open_root(self) -> int:
+        if self._dir_fd is None:
+            self._dir_fd = os.open(self.proc_root, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+        return self._dir_fd
+
+    def _read(self, rel_path: str, dir_fd: int) -> Optional[bytes]:
+        try:
+            fd = os.open(rel_path, os.O_RDONLY | os.O_CLOEXEC, dir_fd=dir_fd)
+        except OSError:
+            return None  # exited between scandir and open, or no permission
+        try:
+            return os.read(fd, READ_SIZE)
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+
+    def _ids_to_scan(self, dir_fd: int) -> List[str]:
+        with os.scandir(dir_fd) as entries:
+            pids = [e.name for e in entries if e.name.isdigit()]
+        if not self.include_threads:
+            return pids
+        tasks = []
+        for pid in pids:
+            try:
+                task_fd = os.open(f"{pid}/task", os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC, dir_fd=dir_fd)
+            except OSError:
+                continue
+            try:
+                with os.scandir(task_fd) as entries:
+                    tasks.extend(f"{pid}/task/{e.name}" for e in entries if e.name.isdigit())
+            except OSError:
+                pass
+            finally:
+                os.close(task_fd)
+        return tasks
+
+    def _update(self, key: int, comm: str, ticks: int, start: int, switches: int):
+        slot = self._slots.get(key)
+        # A different starttime means the PID was reused by a new process.
+        fresh = slot is None or self._start[slot] != start
+        if slot is None:
+            if not self._free:
+                self._grow(self._capacity * 2)
+            slot = self._free.pop()
+            self._slots[key] = slot
+        if fresh:
+            self._ids[slot] = key
+            self._comm[slot] = comm
+            self._start[slot] = start
+            self._delta_ticks[slot] = 0
+            self._delta_switches[slot] = 0
+        else:
+            self._delta_ticks[slot] = ticks - self._ticks[slot]
+            self._delta_switches[slot] = max(0, switches - self._switches[slot])
+            if self._comm[slot] != comm:
+                self._comm[slot] = comm  # exec() changed the name
+        self._ticks[slot] = ticks
+        self._switches[slot] = switches
+        self._seen[slot] = self._generation
+
+    def sample(self) -> int:
+        """Walk /proc once and update every process. Returns the number seen."""
+        with self._lock:
+            dir_fd = self._open_root()
+            now = time.monotonic()
+            self.interval = now - self._last_time if self._last_time is not None else 0.0
+            self._last_time = now
+            self._generation += 1
+            seen = 0
+            for path in self._ids_to_scan(dir_fd):
+                data = self._read(f"{path}/stat", dir_fd)
+                parsed = parse_stat(data) if data else None
+                if parsed is None:
+                    continue
+                switches = 0
+                if self.track_wakeups:
+                    sched = self._read(f"{path}/schedstat", dir_fd)
+                    parts = sched.split() if sched else ()
+                    switches = int(parts[2]) if len(parts) > 2 else 0
+                comm, ticks, start = parsed
+                self._update(int(path.rsplit("/", 1)[-1]), comm, ticks, start, switches)
+                seen += 1
+            self._prune()
+            return seen
+
+    def _prune(self):
+        gone = [key for key, slot in self._slots.items() if self._seen[slot] != self._generation]
+        for key in gone:
+            self._free.append(self._slots.pop(key))
+
+    def top(self, n: int = 10) -> List[ProcessUsage]:
+        """The n processes that used the most CPU during the last interval."""
+        with self._lock:
+            if not self.interval:
+                return []
+            slots = heapq.nlargest(n, self._slots.values(), key=self._delta_ticks.__getitem__)
+            interval = self.interval
+            return [ProcessUsage(
+                pid=self._ids[s],
+                comm=self._comm[s],
+                cpu_percent=self._delta_ticks[s] / CLK_TCK / interval * 100,
+                cpu_seconds=self._delta_ticks[s] / CLK_TCK,
+                wakeups_per_s=self._delta_switches[s] / interval if self.track_wakeups else None,
+            ) for s in slots if self._delta_ticks[s] > 0 or self._delta_switches[s] > 0]
+
+    def tracked(self) -> int:
+        return len(self._slots)
+
+    def close(self):
+        with self._lock:
+            if self._dir_fd is not None:
+                os.close(self._dir_fd)
+                self._dir_fd = None
@@ -1,6 +1,12 @@
 import json
 import os
 import pwd # Import the password database module
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .fileutil import write_atomic
 
 def get_real_homedir():
     """Gets the home directory of the user who invoked sudo."""
@@ -13,7 +19,7 @@ def get_real_homedir():
     except (KeyError, TypeError):
         # Fallback if SUDO_USER is not set or user not found
         pass
-    
+
     # If not running under sudo, or if lookup fails, use the normal method
     return os.path.expanduser("~")
 
@@ -21,31 +27,196 @@ def get_real_homedir():
 CONFIG_DIR = os.path.join(get_real_homedir(), ".config", "battery_manager")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "profiles.json")
 
+# --- Schema ---
+# v1 (legacy): {"Name": [brightness, fan, keyboard, governor], ...}
+# v2:          {"version": 2, "profiles": {"Name": {"brightness": 80, ...}}}
+SCHEMA_VERSION = 2
+LEGACY_FIELDS = ("brightness", "fan", "keyboard", "governor")
+# Optional per-cluster cpufreq settings, e.g.
+#   "cpufreq": {"efficiency": {"epp": "power"}, "policy0": {"max_freq": 2000000}}
+CPUFREQ_KEYS = ("governor", "epp", "min_freq", "max_freq")
+# Optional device settings:
+#   "wifi": true, "bluetooth": false,
+#   "usb_autosuspend": true | {"1-2": false},
+#   "upower": {"PercentageLow": 20, "CriticalPowerAction": "HybridSleep"}
+
+
+@dataclass(frozen=True)
+class ApplyPlan:
+    """A profile validated and normalised once, ready to apply without parsing."""
+    name: str
+    brightness: Optional[int]
+    fan: Optional[int]
+    keyboard: Optional[int]
+    governor: Optional[str]
+    settings: Mapping[str, Any]
+    # ((policy name or cluster label, {governor/epp/min_freq/max_freq}), ...)
+    cpufreq: Tuple[Tuple[str, Mapping[str, Any]], ...] = ()
+    wifi: Optional[bool] = None
+    bluetooth: Optional[bool] = None
+    # True/False applies to every device; a mapping is per device path.
+    usb_autosuspend: Any = None
+    upower: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+
+
+def _percent(value) -> Optional[int]:
+    if value is None:
+        return None
+    return max(0, min(100, int(float(value))))
+
+
+def migrate(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Return the profiles mapping of any known schema version as v2 dicts."""
+    if not isinstance(data, dict):
+        raise ValueError(f"profiles.json must contain an object, not {type(data).__name__}")
+    if "version" not in data:
+        profiles = {}
+        for name, settings in data.items():
+            if isinstance(settings, list):
+                settings = dict(zip(LEGACY_FIELDS, settings))
+            profiles[name] = settings
+        return profiles
+    version = data["version"]
+    if not isinstance(version, int) or isinstance(version, bool):
+        raise ValueError(f"profiles.json has an invalid schema version {version!r}")
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"profiles.json has newer schema version {version}")
+    profiles = data.get("profiles", {})
+    if not isinstance(profiles, dict):
+        raise ValueError(f"\"profiles\" must be an object, not {type(profiles).__name__}")
+    return dict(profiles)
+
+
+def build_plan(name: str, settings: Dict[str, Any]) -> ApplyPlan:
+    if not isinstance(settings, dict):
+        raise ValueError(f"settings must be an object, got {type(settings).__name__}")
+    governor = settings.get("governor")
+    if governor is not None and (not isinstance(governor, str) or not governor.strip()):
+        raise ValueError(f"invalid governor {governor!r}")
+    cpufreq = []
+    for target, values in (settings.get("cpufreq") or {}).items():
+        if not isinstance(values, dict) or set(values) - set(CPUFREQ_KEYS):
+            raise ValueError(f"invalid cpufreq settings for {target!r}: {values!r}")
+        values = dict(values)
+        for key in ("min_freq", "max_freq"):
+            if key in values:
+                values[key] = int(values[key])
+        cpufreq.append((target, MappingProxyType(values)))
+    for key in ("wifi", "bluetooth"):
+        if settings.get(key) is not None and not isinstance(settings[key], bool):
+            raise ValueError(f"{key} must be true or false, got {settings[key]!r}")
+    usb = settings.get("usb_autosuspend")
+    if isinstance(usb, dict):
+        usb = MappingProxyType({str(path): bool(enabled) for path, enabled in usb.items()})
+    elif usb is not None and not isinstance(usb, bool):
+        raise ValueError(f"invalid usb_autosuspend {usb!r}")
+    upower = settings.get("upower") or {}
+    if not isinstance(upower, dict):
+        raise ValueError(f"invalid upower settings {upower!r}")
+    return ApplyPlan(
+        name=name,
+        brightness=_percent(settings.get("brightness")),
+        fan=_percent(settings.get("fan")),
+        keyboard=_percent(settings.get("keyboard")),
+        governor=governor.strip() if governor else None,
+        settings=MappingProxyType(dict(settings)),
+        cpufreq=tuple(cpufreq),
+        wifi=settings.get("wifi"),
+        bluetooth=settings.get("bluetooth"),
+        usb_autosuspend=usb,
+        upower=MappingProxyType({str(k): str(v) for k, v in upower.items()}),
+    )
+
+
 class ProfileManager:
-    """Handles reading and writing settings to profiles.json."""
+    """
+    Handles reading and writing settings to profiles.json.
+    Profiles are cached in memory and only re-parsed when the file's
+    mtime/inode/size change; writes go through a temp file and rename.
+    A file that cannot be read is never overwritten: saving is refused
+    until it is fixed or removed.
+    """
+
+    def __init__(self, config_file: str = CONFIG_FILE):
+        self.config_file = config_file
+        self._lock = threading.Lock()
+        self._stat_key = None
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        # Every stored profile, including ones skipped as invalid; written back unchanged.
+        self._stored: Dict[str, Any] = {}
+        self._plans: Dict[str, ApplyPlan] = {}
+        self._load_error: Optional[str] = None
+        os.makedirs(os.path.dirname(config_file), exist_ok=True)
+        if not os.path.exists(config_file):
+            self._write({}) # Create an empty profile store if it doesn't exist
 
-    def __init__(self):
-        os.makedirs(CONFIG_DIR, exist_ok=True)
-        if not os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump({}, f) # Create an empty JSON file if it doesn't exist
+    @staticmethod
+    def _key(st: os.stat_result):
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def _load(self):
+        """Refresh the cache if profiles.json changed on disk."""
+        try:
+            st = os.stat(self.config_file)
+        except FileNotFoundError:
+            self._stat_key, self._profiles, self._stored, self._plans = None, {}, {}, {}
+            self._load_error = None
+            return
+        if self._key(st) == self._stat_key:
+            return
 
-    def get_profiles(self):
-        """Returns all profiles from the JSON file."""
-        print(f"ProfileManager: Reading from {CONFIG_FILE}") # Add a debug print
         try:
-            with open(CONFIG_FILE, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-
-    def save_profile(self, profile_name, settings_list):
-        """Saves a single profile to the JSON file."""
-        profiles = self.get_profiles()
-        profiles[profile_name] = settings_list
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(profiles, f, indent=2)
-        print(f"Profile '{profile_name}' saved with settings: {settings_list}")
-        print("all profiles:")
-        for p in profiles:
-            print(p)
\ No newline at end of file
+            with open(self.config_file, 'r') as f:
+                data = json.load(f)
+            profiles = migrate(data)
+            self._load_error = None
+        except (OSError, json.JSONDecodeError, ValueError) as e:
+            print(f"[PROFILE ERROR] Could not load {self.config_file}: {e}")
+            profiles = {}
+            self._load_error = str(e)
+
+        stored = dict(profiles)
+        plans = {}
+        for name, settings in list(profiles.items()):
+            try:
+                plans[name] = build_plan(name, settings)
+            except (TypeError, ValueError) as e:
+                print(f"[PROFILE ERROR] Skipping invalid profile '{name}': {e}")
+                del profiles[name]
+        self._stat_key, self._profiles, self._stored, self._plans = self._key(st), profiles, stored, plans
+
+    def _write(self, profiles: Dict[str, Dict[str, Any]]):
+        """Atomically replace profiles.json, keeping its owner and mode (we may run under sudo)."""
+        write_atomic(self.config_file, json.dumps({"version": SCHEMA_VERSION, "profiles": profiles}, indent=2))
+
+    def get_profiles(self) -> Dict[str, Dict[str, Any]]:
+        """Returns all profiles as {name: settings dict}."""
+        with self._lock:
+            self._load()
+            return {name: dict(settings) for name, settings in self._profiles.items()}
+
+    def get_plan(self, profile_name: str) -> Optional[ApplyPlan]:
+        """Returns the precomputed apply plan for a profile, or None."""
+        with self._lock:
+            self._load()
+            return self._plans.get(profile_name)
+
+    def save_profile(self, profile_name, settings):
+        """Saves a single profile (dict, or a legacy positional list)."""
+        if isinstance(settings, (list, tuple)):
+            settings = dict(zip(LEGACY_FIELDS, settings))
+        plan = build_plan(profile_name, settings)
+        with self._lock:
+            self._load()
+            if self._load_error is not None:
+                raise ValueError(f"{self.config_file} could not be read ({self._load_error}); "
+                                 f"fix or remove it before saving profiles")
+            stored = dict(self._stored)
+            stored[profile_name] = dict(settings)
+            self._write(stored)
+            self._stat_key = self._key(os.stat(self.config_file))
+            self._stored = stored
+            self._profiles = {**self._profiles, profile_name: dict(settings)}
+            self._plans = dict(self._plans)
+            self._plans[profile_name] = plan
+        print(f"[PROFILE] Saved '{profile_name}'")
@@ -0,0 +1,280 @@
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .backlight import PROFILE_FADE_MS
+from .helper import SetBrightness, SetGovernor, WriteSysfs
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+# Radio state may come from nmcli/rfkill (slow) when /dev/rfkill is not
+# usable; reuse an observation for this long before probing again.
+# AppLogic invalidates the cache on rfkill events.
+SLOW_OBSERVATION_MAX_AGE = 30.0
+
+
+def _empty() -> Mapping[str, Any]:
+    return MappingProxyType({})
+
+
+# ================================================================
+#  Desired State & Plans
+# ================================================================
+
+@dataclass(frozen=True)
+class DesiredState:
+    """Declarative target for the hardware. None / empty means "leave alone"."""
+    brightness: Optional[int] = None
+    governors: Mapping[str, str] = field(default_factory=_empty)  # policy -> governor ("*" without policy dirs)
+    epps: Mapping[str, str] = field(default_factory=_empty)  # policy -> energy_performance_preference
+    min_freqs: Mapping[str, int] = field(default_factory=_empty)  # policy -> kHz
+    max_freqs: Mapping[str, int] = field(default_factory=_empty)  # policy -> kHz
+    wifi: Optional[bool] = None
+    bluetooth: Optional[bool] = None
+    usb_autosuspend: Mapping[str, bool] = field(default_factory=_empty)  # device path -> enabled
+    upower: Mapping[str, str] = field(default_factory=_empty)  # UPower.conf key -> value
+
+
+@dataclass(frozen=True)
+class Step:
+    knob: str            # e.g. "brightness", "governor:policy0", "usb:1-2"
+    current: Any
+    desired: Any
+    operation: Any = None  # helper operation when the write can be batched
+
+
+@dataclass
+class StepResult:
+    knob: str
+    current: Any
+    desired: Any
+    ok: bool
+    duration_ms: float
+    batched: bool
+    error: Optional[str] = None
+
+
+@dataclass
+class ReconcileReport:
+    steps: List[StepResult] = field(default_factory=list)
+    skipped: int = 0          # knobs already at their desired value
+    plan_ms: float = 0.0
+    apply_ms: float = 0.0
+
+    @property
+    def changed(self) -> int:
+        return sum(1 for s in self.steps if s.ok)
+
+    @property
+    def ok(self) -> bool:
+        return all(s.ok for s in self.steps)
+
+    def summary(self) -> str:
+        return (f"{self.changed}/{len(self.steps)} changes, {self.skipped} unchanged, "
+                f"plan {self.plan_ms:.1f} ms, apply {self.apply_ms:.1f} ms")
+
+
+# ================================================================
+#  Reconciler
+# ================================================================
+
+class Reconciler:
+    """
+    Diffs a DesiredState against the observed hardware state and applies
+    only the writes that change something, in a fixed order: cpufreq,
+    brightness, radios, USB, UPower. Batchable writes go to the helper in
+    one round trip. Applying the same state twice is a no-op.
+    """
+
+    def __init__(self, logic):
+        self.logic = logic
+        self._slow_cache: Dict[str, Tuple[float, Any]] = {}
+
+    # --- Observation ---
+    def _observe_slow(self, knob: str, read_fn: Callable[[], Any]) -> Any:
+        cached = self._slow_cache.get(knob)
+        if cached is not None and time.monotonic() - cached[0] < SLOW_OBSERVATION_MAX_AGE:
+            return cached[1]
+        value = read_fn()
+        self._slow_cache[knob] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self):
+        """Forget cached observations (e.g. after an external change)."""
+        self._slow_cache.clear()
+
+    # --- Planning ---
+    def plan(self, desired: DesiredState) -> List[Step]:
+        """Ordered list of steps needed to reach `desired` from the current state."""
+        logic = self.logic
+        steps: List[Step] = []
+
+        # cpufreq: cheap per-policy sysfs reads, always fresh
+        if desired.governors or desired.epps or desired.min_freqs or desired.max_freqs:
+            states = {s.policy: s for s in logic.cpufreq.states()}
+            policy_path = lambda p, attr: logic.sysfs.path("devices/system/cpu/cpufreq", p, attr)
+            for policy, governor in desired.governors.items():
+                if policy == "*":
+                    current = logic.get_cpu_governor()
+                    if current != governor:
+                        steps.append(Step("governor", current, governor, SetGovernor(governor)))
+                    continue
+                current = states[policy].governor if policy in states else None
+                if current != governor:
+                    steps.append(Step(f"governor:{policy}", current, governor,
+                                      WriteSysfs(policy_path(policy, "scaling_governor"), governor)))
+            for policy, epp in desired.epps.items():
+                current = states[policy].epp if policy in states else None
+                if current != epp:
+                    steps.append(Step(f"epp:{policy}", current, epp,
+                                      WriteSysfs(policy_path(policy, "energy_performance_preference"), epp)))
+            for policy in sorted(set(desired.min_freqs) | set(desired.max_freqs)):
+                state = states.get(policy)
+                limits = []
+                if policy in desired.min_freqs and (state is None or state.min_freq != desired.min_freqs[policy]):
+                    limits.append(("min_freq", "scaling_min_freq", state and state.min_freq, desired.min_freqs[policy]))
+                if policy in desired.max_freqs and (state is None or state.max_freq != desired.max_freqs[policy]):
+                    limits.append(("max_freq", "scaling_max_freq", state and state.max_freq, desired.max_freqs[policy]))
+                # Raising the range: ceiling first, so min never exceeds max.
+                if state and state.max_freq is not None and desired.min_freqs.get(policy, 0) > state.max_freq:
+                    limits.reverse()
+                for name, attr, current, value in limits:
+                    steps.append(Step(f"{name}:{policy}", current, value,
+                                      WriteSysfs(policy_path(policy, attr), str(value))))
+
+        if desired.brightness is not None:
+            current = logic.get_brightness()
+            if self._brightness_differs(current, desired.brightness):
+                steps.append(Step("brightness", current, desired.brightness, SetBrightness(desired.brightness, PROFILE_FADE_MS)))
+
+        if desired.wifi is not None:
+            current = self._observe_slow("wifi", logic.get_wifi_status)
+            if current != desired.wifi:
+                steps.append(Step("wifi", current, desired.wifi))
+
+        if desired.bluetooth is not None:
+            current = self._observe_slow("bluetooth", logic.get_bluetooth_status)
+            if current != desired.bluetooth:
+                # Not batched: /dev/rfkill beats a helper round trip.
+                steps.append(Step("bluetooth", current, desired.bluetooth))
+
+        if desired.usb_autosuspend:
+            devices = {d["path"]: d for d in logic.get_usb_devices()}
+            for path, enable in sorted(desired.usb_autosuspend.items()):
+                device = devices.get(path)
+                if device is None:
+                    continue
+                control = "auto" if enable else "on"
+                if device["control"] != control:
+                    steps.append(Step(f"usb:{path}", device["control"], control,
+                                      WriteSysfs(logic.sysfs.path("bus/usb/devices", path, "power/control"), control)))
+
+        if desired.upower:
+            current = logic.get_upower_config()
+            changed = {k: str(v) for k, v in desired.upower.items() if current.get(k) != str(v)}
+            if changed:
+                steps.append(Step("upower", {k: current.get(k) for k in changed}, dict(desired.upower)))
+
+        return steps
+
+    def _brightness_differs(self, current: Optional[int], percent: int) -> bool:
+        # Compare raw steps: on a panel with few steps several percentages
+        # map to the same raw value and would never read back exactly.
+        backlight = self.logic.backlight
+        raw = backlight.current_raw()
+        if raw and all(v is not None for v in raw.values()):
+            return raw != backlight.raw_for(percent)
+        return current != percent
+
+    # --- Applying ---
+    def _apply_unbatched(self, step: Step) -> Tuple[bool, Optional[str]]:
+        logic = self.logic
+        if step.knob == "wifi":
+            ok = logic.set_wifi_status(step.desired)
+            return ok, None if ok else "wifi toggle failed"
+        if step.knob == "bluetooth":
+            ok = logic.set_bluetooth_status(step.desired)
+            return ok, None if ok else "bluetooth toggle failed"
+        if step.knob == "upower":
+            ok = logic.update_upower_config(dict(step.desired), notify=False)
+            return ok, None if ok else "update_upower_config failed"
+        return False, f"no handler for {step.knob}"
+
+    def apply(self, desired: DesiredState) -> ReconcileReport:
+        report = ReconcileReport()
+        t0 = time.perf_counter()
+        steps = self.plan(desired)
+        report.plan_ms = (time.perf_counter() - t0) * 1000
+        report.skipped = self._count_knobs(desired) - len(steps)
+
+        t1 = time.perf_counter()
+        batched = [s for s in steps if s.operation is not None]
+        if batched:
+            start = time.perf_counter()
+            results = self.logic.apply_batch([s.operation for s in batched])
+            batch_ms = (time.perf_counter() - start) * 1000
+            for step, result in zip(batched, results):
+                report.steps.append(StepResult(step.knob, step.current, step.desired, result.ok,
+                                               batch_ms, True, result.error))
+        for step in steps:
+            if step.operation is not None:
+                continue
+            start = time.perf_counter()
+            ok, error = self._apply_unbatched(step)
+            report.steps.append(StepResult(step.knob, step.current, step.desired, ok,
+                                           (time.perf_counter() - start) * 1000, False, error))
+        report.apply_ms = (time.perf_counter() - t1) * 1000
+
+        for result in report.steps:
+            if result.ok and result.knob in ("wifi", "bluetooth"):
+                self._slow_cache[result.knob] = (time.monotonic(), result.desired)
+        return report
+
+    @staticmethod
+    def _count_knobs(desired: DesiredState) -> int:
+        count = len(desired.governors) + len(desired.epps) + len(desired.min_freqs) + len(desired.max_freqs)
+        count += len(desired.usb_autosuspend) + (1 if desired.upower else 0)
+        count += sum(v is not None for v in (desired.brightness, desired.wifi, desired.bluetooth))
+        return count
+
+
+def desired_from_plan(plan, cpufreq, usb_paths: Iterable[str] = ()) -> DesiredState:
+    """
+    Expand a profile ApplyPlan into a per-policy DesiredState. A boolean
+    usb_autosuspend is applied to every device in `usb_paths`.
+    """
+    governors: Dict[str, str] = {}
+    epps: Dict[str, str] = {}
+    min_freqs: Dict[str, int] = {}
+    max_freqs: Dict[str, int] = {}
+    if plan.governor:
+        policies = cpufreq.policies()
+        governors.update({p.name: plan.governor for p in policies} if policies else {"*": plan.governor})
+    for target, settings in plan.cpufreq:
+        for policy in cpufreq.resolve([target]):
+            if "governor" in settings:
+                governors[policy.name] = settings["governor"]
+            if "epp" in settings:
+                epps[policy.name] = settings["epp"]
+            if "min_freq" in settings:
+                min_freqs[policy.name] = settings["min_freq"]
+            if "max_freq" in settings:
+                max_freqs[policy.name] = settings["max_freq"]
+    if isinstance(plan.usb_autosuspend, bool):
+        usb = {path: plan.usb_autosuspend for path in usb_paths}
+    else:
+        usb = dict(plan.usb_autosuspend or {})
+    return DesiredState(
+        brightness=plan.brightness,
+        governors=MappingProxyType(governors),
+        epps=MappingProxyType(epps),
+        min_freqs=MappingProxyType(min_freqs),
+        max_freqs=MappingProxyType(max_freqs),
+        wifi=plan.wifi,
+        bluetooth=plan.bluetooth,
+        usb_autosuspend=MappingProxyType(usb),
+        upower=MappingProxyType(dict(plan.upower)),
+    )
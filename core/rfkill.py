@@ -0,0 +1,226 @@
+"""
+Native rfkill backend: radio state from /sys/class/rfkill, toggles and
+change notifications through /dev/rfkill.
+
+/dev/rfkill speaks fixed-size struct rfkill_event records:
+
+    struct rfkill_event { __u32 idx; __u8 type; __u8 op; __u8 soft; __u8 hard; };
+
+Newer kernels append extra fields (e.g. hard_block_reasons), so reads
+accept longer records and only decode the first 8 bytes.
+"""
+
+import os
+import select
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .sysfs import SysfsReader
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+RFKILL_DEVICE = os.environ.get("LPM_RFKILL_DEVICE", "/dev/rfkill")
+RFKILL_CLASS = "class/rfkill"
+EVENT_FORMAT = "<IBBBB"
+EVENT_SIZE = struct.calcsize(EVENT_FORMAT)  # 8
+READ_SIZE = 64
+
+OP_ADD, OP_DEL, OP_CHANGE, OP_CHANGE_ALL = 0, 1, 2, 3
+# Kernel enum rfkill_type; sysfs "type" files use the same names.
+TYPE_CODES = {"all": 0, "wlan": 1, "bluetooth": 2, "uwb": 3, "wimax": 4, "wwan": 5, "gps": 6, "fm": 7, "nfc": 8}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+
+@dataclass(frozen=True)
+class RfkillDevice:
+    index: int
+    name: str
+    kind: str
+    soft: bool
+    hard: bool
+
+    @property
+    def blocked(self) -> bool:
+        return self.soft or self.hard
+
+
+@dataclass(frozen=True)
+class RfkillEvent:
+    index: int
+    kind: str
+    op: int
+    soft: bool
+    hard: bool
+
+
+def pack_event(kind: str, op: int, soft: bool, index: int = 0, hard: bool = False) -> bytes:
+    return struct.pack(EVENT_FORMAT, index, TYPE_CODES[kind], op, int(soft), int(hard))
+
+
+def unpack_event(data: bytes) -> Optional[RfkillEvent]:
+    if len(data) < EVENT_SIZE:
+        return None
+    index, kind, op, soft, hard = struct.unpack_from(EVENT_FORMAT, data)
+    return RfkillEvent(index, TYPE_NAMES.get(kind, str(kind)), op, bool(soft), bool(hard))
+
+
+# ================================================================
+#  Reads & Writes
+# ================================================================
+
+class Rfkill:
+    """
+    Radio state straight from sysfs (cached preads, no subprocess) and
+    toggles written as a single CHANGE_ALL record to /dev/rfkill.
+    """
+
+    def __init__(self, sysfs: SysfsReader, device_path: str = RFKILL_DEVICE):
+        self.sysfs = sysfs
+        self.device_path = device_path
+        self._names: Optional[List[str]] = None
+
+    def invalidate(self):
+        """Forget the device list (radios were added or removed)."""
+        self._names = None
+
+    def devices(self, kind: Optional[str] = None) -> List[RfkillDevice]:
+        if self._names is None:
+            self._names = [n for n in self.sysfs.listdir(RFKILL_CLASS) if n.startswith("rfkill")]
+        devices = []
+        for name in self._names:
+            base = f"{RFKILL_CLASS}/{name}"
+            device_kind = self.sysfs.read(f"{base}/type")
+            if device_kind is None or (kind is not None and device_kind != kind):
+                continue
+            devices.append(RfkillDevice(
+                index=int(name[6:]) if name[6:].isdigit() else -1,
+                name=self.sysfs.read(f"{base}/name") or name,
+                kind=device_kind,
+                soft=self.sysfs.read_int(f"{base}/soft") == 1,
+                hard=self.sysfs.read_int(f"{base}/hard") == 1,
+            ))
+        return devices
+
+    def enabled(self, kind: str) -> Optional[bool]:
+        """True if any radio of `kind` is unblocked; None if there is no such radio."""
+        devices = self.devices(kind)
+        if not devices:
+            return None
+        return any(not d.blocked for d in devices)
+
+    def set_blocked(self, kind: str, blocked: bool) -> bool:
+        """
+        Soft-block/unblock every radio of `kind`. False if there is no such
+        radio or /dev/rfkill is not writable.
+        """
+        wanted = None if kind == "all" else kind
+        if not self.devices(wanted):
+            self.invalidate()  # the cached list may predate a hotplugged radio
+            if not self.devices(wanted):
+                print(f"[RFKILL] No {kind} radio to {'block' if blocked else 'unblock'}.")
+                return False
+        try:
+            fd = os.open(self.device_path, os.O_WRONLY | os.O_CLOEXEC)
+        except OSError as e:
+            print(f"[RFKILL] Cannot open {self.device_path} for writing: {e}")
+            return False
+        try:
+            os.write(fd, pack_event(kind, OP_CHANGE_ALL, blocked))
+            return True
+        except OSError as e:
+            print(f"[RFKILL] Write to {self.device_path} failed: {e}")
+            return False
+        finally:
+            os.close(fd)
+
+
+# ================================================================
+#  Event Stream
+# ================================================================
+
+class RfkillMonitor:
+    """
+    Reads the /dev/rfkill event stream on a thread and dispatches each
+    record. On open the kernel replays one OP_ADD per existing radio, then
+    reports every soft/hard switch change as it happens.
+    """
+
+    def __init__(self, device_path: str = RFKILL_DEVICE):
+        self.device_path = device_path
+        self._fd = os.open(device_path, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+        self._subscribers: List[Callable[[RfkillEvent], None]] = []
+        self._lock = threading.Lock()
+        self._stop_r, self._stop_w = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: Callable[[RfkillEvent], None]):
+        with self._lock:
+            self._subscribers.append(callback)
+        self.start()
+
+    def dispatch(self, event: RfkillEvent):
+        with self._lock:
+            callbacks = list(self._subscribers)
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[RFKILL ERROR] subscriber: {e}")
+
+    def _run(self):
+        poller = select.poll()
+        poller.register(self._fd, select.POLLIN)
+        poller.register(self._stop_r, select.POLLIN)
+        while True:
+            for fd, _ in poller.poll():
+                if fd == self._stop_r:
+                    return
+                try:
+                    data = os.read(self._fd, READ_SIZE)
+                except BlockingIOError:
+                    continue
+                except OSError as e:
+                    print(f"[RFKILL ERROR] read failed: {e}")
+                    return
+                if not data:
+                    return
+                event = unpack_event(data)
+                if event is not None:
+                    self.dispatch(event)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rfkill-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            os.write(self._stop_w, b"x")
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        os.close(self._fd)
+        os.close(self._stop_r)
+        os.close(self._stop_w)
+
+
+class RadioWatcher:
+    """Turns rfkill events into per-kind enabled/disabled transitions."""
+
+    def __init__(self, monitor: RfkillMonitor, rfkill: Rfkill, callback: Callable[[str, bool], None]):
+        self.rfkill = rfkill
+        self.callback = callback
+        self._last: Dict[str, Optional[bool]] = {}
+        monitor.subscribe(self._on_event)
+
+    def _on_event(self, event: RfkillEvent):
+        if event.op in (OP_ADD, OP_DEL):
+            self.rfkill.invalidate()
+        # Re-read sysfs: one event may cover only one of several radios of a kind.
+        enabled = self.rfkill.enabled(event.kind)
+        if enabled is not None and enabled != self._last.get(event.kind):
+            self._last[event.kind] = enabled
+            self.callback(event.kind, enabled)
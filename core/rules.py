@@ -0,0 +1,290 @@
+"""
+Declarative rules for automatic profile switching.
+
+Rules are loaded from rules.json (or DEFAULT_RULES) and compiled once:
+
+    {"name": "low-battery", "profile": "Power Saver", "priority": 20, "dwell": 30,
+     "when": {"ac": false,
+              "battery": {"below": 25, "hysteresis": 5},
+              "time": {"between": ["22:00", "07:00"]},
+              "devices": {"present": ["046d:c52b"]}}}
+
+Inputs are "ac", "battery", "cpu_load", "temperature", "time" (minutes
+since midnight) and "devices" (USB vendor:product ids). Compilation builds
+an input -> rules index, so a tick only re-evaluates rules that read an
+input whose value changed (plus rules still waiting out their dwell).
+Among active rules the highest priority wins.
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional
+
+from .profile_manager import CONFIG_DIR
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+RULES_FILE = os.path.join(CONFIG_DIR, "rules.json")
+INPUTS = ("ac", "battery", "cpu_load", "temperature", "time", "devices")
+NUMERIC_INPUTS = ("battery", "cpu_load", "temperature")
+
+# Reproduces the original hard-coded AC/battery switch.
+DEFAULT_RULES = [
+    {"name": "on-ac", "profile": "Balanced", "when": {"ac": True}},
+    {"name": "on-battery", "profile": "Power Saver", "when": {"ac": False}},
+]
+# Minimum time a rule-selected profile stays applied before another rule may replace it.
+DEFAULT_MIN_DWELL = 10.0
+
+
+# ================================================================
+#  Conditions
+# ================================================================
+
+class Condition:
+    """One test over a single input. `active` is the rule's previous state (for hysteresis)."""
+    input: str
+
+    def test(self, value: Any, active: bool) -> bool:
+        raise NotImplementedError
+
+
+class Equals(Condition):
+    def __init__(self, input: str, expected: Any):
+        self.input, self.expected = input, expected
+
+    def test(self, value, active):
+        return value == self.expected
+
+
+class Threshold(Condition):
+    """value below/above a limit; once active it holds until the limit plus hysteresis is crossed."""
+
+    def __init__(self, input: str, limit: float, below: bool, hysteresis: float = 0.0):
+        self.input, self.limit, self.below, self.hysteresis = input, limit, below, hysteresis
+
+    def test(self, value, active):
+        if value is None:
+            return False
+        margin = self.hysteresis if active else 0.0
+        if self.below:
+            return value < self.limit + margin
+        return value > self.limit - margin
+
+
+class TimeWindow(Condition):
+    """Minutes-since-midnight window; wraps past midnight when start > end."""
+
+    def __init__(self, start: int, end: int):
+        self.input, self.start, self.end = "time", start, end
+
+    def test(self, value, active):
+        if self.start <= self.end:
+            return self.start <= value < self.end
+        return value >= self.start or value < self.end
+
+
+class DevicesPresent(Condition):
+    def __init__(self, ids: Iterable[str], any_of: bool = True):
+        self.input, self.ids, self.any_of = "devices", frozenset(ids), any_of
+
+    def test(self, value, active):
+        present = self.ids & (value or frozenset())
+        return bool(present) if self.any_of else present == self.ids
+
+
+def _parse_clock(text: str) -> int:
+    hours, minutes = text.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def compile_conditions(when: Dict[str, Any]) -> List[Condition]:
+    conditions: List[Condition] = []
+    for name, spec in when.items():
+        if name not in INPUTS:
+            raise ValueError(f"unknown rule input {name!r}")
+        if name == "ac":
+            conditions.append(Equals("ac", bool(spec)))
+        elif name in NUMERIC_INPUTS:
+            if not isinstance(spec, dict) or not ({"below", "above"} & set(spec)):
+                raise ValueError(f"{name} needs 'below' or 'above': {spec!r}")
+            hysteresis = float(spec.get("hysteresis", 0))
+            if "below" in spec:
+                conditions.append(Threshold(name, float(spec["below"]), True, hysteresis))
+            if "above" in spec:
+                conditions.append(Threshold(name, float(spec["above"]), False, hysteresis))
+        elif name == "time":
+            start, end = spec["between"]
+            conditions.append(TimeWindow(_parse_clock(start), _parse_clock(end)))
+        elif name == "devices":
+            if "present" in spec:
+                ids = spec["present"]
+                conditions.append(DevicesPresent([ids] if isinstance(ids, str) else ids))
+            if "all_present" in spec:
+                conditions.append(DevicesPresent(spec["all_present"], any_of=False))
+    if not conditions:
+        raise ValueError("rule has no conditions")
+    return conditions
+
+
+# ================================================================
+#  Rules & Engine
+# ================================================================
+
+@dataclass
+class Rule:
+    name: str
+    profile: str
+    conditions: List[Condition]
+    priority: int = 0
+    dwell: float = 0.0            # seconds the conditions must hold before the rule activates
+    # --- runtime state ---
+    index: int = 0                # position in the rule file; earlier wins ties
+    matched: bool = False
+    matched_since: Optional[float] = None
+    active: bool = False
+
+    @property
+    def inputs(self) -> FrozenSet[str]:
+        return frozenset(c.input for c in self.conditions)
+
+
+def compile_rule(spec: Dict[str, Any]) -> Rule:
+    try:
+        return Rule(
+            name=spec["name"],
+            profile=spec["profile"],
+            conditions=compile_conditions(spec.get("when") or {}),
+            priority=int(spec.get("priority", 0)),
+            dwell=float(spec.get("dwell", 0)),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"invalid rule {spec.get('name', spec)!r}: {e}") from e
+
+
+def load_rules(path: str) -> List[Dict[str, Any]]:
+    """Rule specs from `path`, or DEFAULT_RULES if it does not exist."""
+    if not os.path.exists(path):
+        return list(DEFAULT_RULES)
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return data.get("rules", []) if isinstance(data, dict) else data
+
+
+def inputs_from_snapshot(snapshot, now: Optional[float] = None) -> Dict[str, Any]:
+    """Rule inputs for one sampler snapshot."""
+    local = time.localtime(snapshot.timestamp if now is None else now)
+    return {
+        "ac": snapshot.power_status == "online",
+        "battery": snapshot.battery_percentage,
+        "cpu_load": snapshot.get("cpu_load"),
+        "temperature": (snapshot.get("thermal") or {}).get("hottest"),
+        "time": local.tm_hour * 60 + local.tm_min,
+        "devices": frozenset(snapshot.get("usb_ids") or ()),
+    }
+
+
+@dataclass
+class EngineStats:
+    ticks: int = 0
+    evaluated: int = 0          # rule evaluations over all ticks
+    last_evaluated: int = 0
+    switches: int = 0
+
+
+class RuleEngine:
+    """
+    Incremental evaluator. update() takes the current inputs, re-evaluates
+    only the rules depending on changed inputs, and calls on_switch(profile,
+    rule) when the winning rule's profile changes.
+    """
+
+    def __init__(self, specs: Iterable[Dict[str, Any]], on_switch: Callable[[str, Rule], None],
+                 min_dwell: float = DEFAULT_MIN_DWELL, clock: Callable[[], float] = time.monotonic):
+        self.rules: List[Rule] = [compile_rule(spec) for spec in specs]
+        for i, rule in enumerate(self.rules):
+            rule.index = i
+        self.on_switch = on_switch
+        self.min_dwell = min_dwell
+        self.clock = clock
+        self.stats = EngineStats()
+        self._by_input: Dict[str, List[Rule]] = {name: [] for name in INPUTS}
+        for rule in self.rules:
+            for name in rule.inputs:
+                self._by_input[name].append(rule)
+        self._inputs: Dict[str, Any] = {}
+        self._waiting: Dict[int, Rule] = {}   # matched, but still within their dwell
+        self._active: Dict[int, Rule] = {}
+        self.current: Optional[Rule] = None
+        self._switched_at: Optional[float] = None
+        self._primed = False
+
+    def check_profiles(self, available: Iterable[str]) -> List[str]:
+        """Warn about rules naming profiles that do not exist. Returns the missing names."""
+        available = set(available)
+        missing = sorted({r.profile for r in self.rules if r.profile not in available})
+        for name in missing:
+            users = [r.name for r in self.rules if r.profile == name]
+            listed = ", ".join(users[:3]) + (f" and {len(users) - 3} more" if len(users) > 3 else "")
+            print(f"[RULES WARN] Profile '{name}' used by rule(s) {listed} does not exist.")
+        return missing
+
+    def _evaluate(self, rule: Rule, now: float):
+        matched = all(c.test(self._inputs.get(c.input), rule.active) for c in rule.conditions)
+        if matched and not rule.matched:
+            rule.matched_since = now
+        rule.matched = matched
+        rule.active = matched and now - rule.matched_since >= rule.dwell
+        if matched and not rule.active:
+            self._waiting[id(rule)] = rule
+        else:
+            self._waiting.pop(id(rule), None)
+        if rule.active:
+            self._active[id(rule)] = rule
+        else:
+            self._active.pop(id(rule), None)
+
+    def update(self, inputs: Dict[str, Any]) -> Optional[Rule]:
+        now = self.clock()
+        changed = [name for name, value in inputs.items() if self._inputs.get(name, object()) != value]
+        self._inputs.update(inputs)
+
+        dirty: Dict[int, Rule] = dict(self._waiting)
+        for name in changed:
+            for rule in self._by_input.get(name, ()):
+                dirty[id(rule)] = rule
+        for rule in dirty.values():
+            self._evaluate(rule, now)
+        self.stats.ticks += 1
+        self.stats.last_evaluated = len(dirty)
+        self.stats.evaluated += len(dirty)
+
+        winner = max(self._active.values(), key=lambda r: (r.priority, -r.index), default=None)
+        if not self._primed:
+            # Adopt the state found at startup instead of overriding the
+            # user's current settings; only later transitions switch.
+            self._primed = True
+            self.current = winner
+            return winner
+        if winner is None:
+            # Nothing applies any more: forget the last winner so it switches
+            # again when it next activates. _switched_at stays, so min_dwell holds.
+            self.current = None
+            return None
+        if winner is self.current:
+            return self.current
+        if self.current is not None and winner.profile == self.current.profile:
+            self.current = winner
+            return winner
+        if self._switched_at is not None and now - self._switched_at < self.min_dwell:
+            # Re-check once the dwell has passed, even if no input changes.
+            self._waiting[id(winner)] = winner
+            return self.current
+        self.current, self._switched_at = winner, now
+        self.stats.switches += 1
+        self.on_switch(winner.profile, winner)
+        return winner
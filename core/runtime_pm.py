@@ -0,0 +1,249 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .sysfs import SysfsReader
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+PCI_DEVICES_DIR = "bus/pci/devices"
+USB_DEVICES_DIR = "bus/usb/devices"
+SCSI_HOST_DIR = "class/scsi_host"
+AUDIO_MODULES = ("snd_hda_intel", "snd_ac97_codec")
+
+CATEGORIES = ("pci", "sata", "audio", "usb")
+# Recommendations follow powertop's "Tunables" tab.
+RUNTIME_PM_AUTO = "auto"
+SATA_LPM_POLICY = "med_power_with_dipm"
+USB_HID_CLASS = "03"  # keyboards/mice lag or drop input when autosuspended
+
+PCI_CLASS_NAMES = {
+    "01": "Storage controller",
+    "02": "Network controller",
+    "03": "Display controller",
+    "04": "Multimedia controller",
+    "06": "Bridge",
+    "0c": "Serial bus controller",
+    "0d": "Wireless controller",
+}
+
+
+@dataclass(frozen=True)
+class Tunable:
+    key: str            # "pci:0000:00:1f.3", "sata:host0", "audio:snd_hda_intel/power_save", "usb:1-2"
+    category: str
+    description: str
+    path: str           # relative to the sysfs root
+    current: str
+    recommended: str
+
+    @property
+    def tuned(self) -> bool:
+        return self.current == self.recommended
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "key": self.key,
+            "category": self.category,
+            "description": self.description,
+            "path": self.path,
+            "current": self.current,
+            "recommended": self.recommended,
+            "tuned": self.tuned,
+        }
+
+
+@dataclass(frozen=True)
+class Residency:
+    """Runtime-PM time split for one device since the baseline."""
+    device: str         # "pci:0000:00:14.0", "usb:1-2"
+    runtime_status: str
+    suspended_ms: int
+    active_ms: int
+
+    @property
+    def suspended_fraction(self) -> Optional[float]:
+        total = self.suspended_ms + self.active_ms
+        return self.suspended_ms / total if total else None
+
+
+def _read(sysfs: SysfsReader, rel_path: str) -> Optional[str]:
+    """One-shot read: scans touch hundreds of attributes once, so no fd is cached."""
+    try:
+        fd = os.open(sysfs.path(rel_path), os.O_RDONLY | os.O_CLOEXEC)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, 4096).decode(errors="replace").strip()
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+# ================================================================
+#  Scanners
+# ================================================================
+
+def scan_pci(sysfs: SysfsReader) -> List[Tunable]:
+    tunables = []
+    for name in sysfs.listdir(PCI_DEVICES_DIR):
+        base = f"{PCI_DEVICES_DIR}/{name}"
+        control = _read(sysfs, f"{base}/power/control")
+        if control is None:
+            continue
+        pci_class = (_read(sysfs, f"{base}/class") or "0x000000")[2:4]
+        vendor = (_read(sysfs, f"{base}/vendor") or "0x????")[2:]
+        device = (_read(sysfs, f"{base}/device") or "0x????")[2:]
+        label = PCI_CLASS_NAMES.get(pci_class, "PCI device")
+        tunables.append(Tunable(f"pci:{name}", "pci", f"{label} {vendor}:{device} ({name})",
+                                f"{base}/power/control", control, RUNTIME_PM_AUTO))
+    return tunables
+
+
+def scan_sata(sysfs: SysfsReader) -> List[Tunable]:
+    tunables = []
+    for host in sysfs.listdir(SCSI_HOST_DIR):
+        path = f"{SCSI_HOST_DIR}/{host}/link_power_management_policy"
+        policy = _read(sysfs, path)
+        if policy is not None:
+            tunables.append(Tunable(f"sata:{host}", "sata", f"SATA link power management ({host})",
+                                    path, policy, SATA_LPM_POLICY))
+    return tunables
+
+
+def scan_audio(sysfs: SysfsReader) -> List[Tunable]:
+    tunables = []
+    for module in AUDIO_MODULES:
+        for parameter, recommended in (("power_save", "1"), ("power_save_controller", "Y")):
+            path = f"module/{module}/parameters/{parameter}"
+            value = _read(sysfs, path)
+            if value is not None:
+                tunables.append(Tunable(f"audio:{module}/{parameter}", "audio",
+                                        f"{module} {parameter.replace('_', ' ')}", path, value, recommended))
+    return tunables
+
+
+def scan_usb(sysfs: SysfsReader) -> List[Tunable]:
+    devices: Dict[str, Tuple[str, str]] = {}
+    hid = set()
+    for name in sysfs.listdir(USB_DEVICES_DIR):
+        base = f"{USB_DEVICES_DIR}/{name}"
+        if ":" in name:
+            if _read(sysfs, f"{base}/bInterfaceClass") == USB_HID_CLASS:
+                hid.add(name.split(":", 1)[0])
+            continue
+        control = _read(sysfs, f"{base}/power/control")
+        if control is not None:
+            devices[name] = (control, _read(sysfs, f"{base}/product") or f"USB device {name}")
+    return [Tunable(f"usb:{name}", "usb", f"{product} ({name})", f"{USB_DEVICES_DIR}/{name}/power/control",
+                    control, RUNTIME_PM_AUTO)
+            for name, (control, product) in sorted(devices.items()) if name not in hid]
+
+
+SCANNERS: Dict[str, Callable[[SysfsReader], List[Tunable]]] = {
+    "pci": scan_pci,
+    "sata": scan_sata,
+    "audio": scan_audio,
+    "usb": scan_usb,
+}
+
+
+# ================================================================
+#  Tuner
+# ================================================================
+
+class RuntimePmTuner:
+    """
+    Scans every runtime-PM related knob (one worker per category), keeps
+    the previous values of everything applied so it can be rolled back as
+    a unit, and measures how long each device actually spent suspended.
+    Writes are left to the caller (AppLogic batches them through the helper).
+    """
+
+    def __init__(self, sysfs: SysfsReader):
+        self.sysfs = sysfs
+        self._lock = threading.Lock()
+        self._undo: List[Tuple[str, str, str]] = []   # (key, path, previous value)
+        self._baseline: Optional[Dict[str, Tuple[int, int]]] = None
+        self._baseline_time: Optional[float] = None
+
+    # --- Tunables ---
+    def scan(self, categories: Optional[Iterable[str]] = None) -> List[Tunable]:
+        wanted = set(categories) if categories is not None else set(CATEGORIES)
+        selected = [c for c in CATEGORIES if c in wanted]
+        with ThreadPoolExecutor(max_workers=len(selected) or 1, thread_name_prefix="runtime-pm-scan") as pool:
+            results = list(pool.map(lambda c: SCANNERS[c](self.sysfs), selected))
+        return [t for tunables in results for t in tunables]
+
+    def select(self, tunables: List[Tunable], keys: Optional[Iterable[str]] = None,
+               categories: Optional[Iterable[str]] = None) -> List[Tunable]:
+        """Untuned entries, optionally filtered by key and/or category."""
+        keys = set(keys) if keys is not None else None
+        categories = set(categories) if categories is not None else None
+        return [t for t in tunables if not t.tuned
+                and (keys is None or t.key in keys)
+                and (categories is None or t.category in categories)]
+
+    def record_applied(self, applied: List[Tunable]):
+        """
+        Remember the previous values of a batch that was just written. Until
+        a rollback, later batches add to the same unit; a knob changed twice
+        keeps its original value.
+        """
+        with self._lock:
+            known = {key for key, _, _ in self._undo}
+            self._undo += [(t.key, t.path, t.current) for t in applied if t.key not in known]
+
+    def pending_rollback(self) -> List[Tuple[str, str, str]]:
+        with self._lock:
+            return list(self._undo)
+
+    def clear_rollback(self):
+        with self._lock:
+            self._undo = []
+
+    # --- Residency ---
+    def _read_times(self) -> Dict[str, Tuple[int, int]]:
+        times = {}
+        for prefix, directory in (("pci", PCI_DEVICES_DIR), ("usb", USB_DEVICES_DIR)):
+            for name in self.sysfs.listdir(directory):
+                if ":" in name and prefix == "usb":
+                    continue
+                suspended = _read(self.sysfs, f"{directory}/{name}/power/runtime_suspended_time")
+                active = _read(self.sysfs, f"{directory}/{name}/power/runtime_active_time")
+                if suspended is not None and active is not None and suspended.isdigit() and active.isdigit():
+                    times[f"{prefix}:{name}"] = (int(suspended), int(active))
+        return times
+
+    def mark(self):
+        """Start a new measurement window."""
+        times = self._read_times()
+        with self._lock:
+            self._baseline, self._baseline_time = times, time.monotonic()
+
+    def residency(self) -> List[Residency]:
+        """Per-device suspended/active time since mark(), most-suspended first."""
+        if self._baseline is None:
+            self.mark()
+        times = self._read_times()
+        with self._lock:
+            baseline = self._baseline
+        rows = []
+        for device, (suspended, active) in times.items():
+            before = baseline.get(device)
+            if before is None:
+                continue  # appeared after the baseline
+            directory = PCI_DEVICES_DIR if device.startswith("pci:") else USB_DEVICES_DIR
+            status = _read(self.sysfs, f"{directory}/{device.split(':', 1)[1]}/power/runtime_status") or "unknown"
+            rows.append(Residency(device, status, max(0, suspended - before[0]), max(0, active - before[1])))
+        rows.sort(key=lambda r: (-(r.suspended_fraction or 0.0), r.device))
+        return rows
+
+    def window_seconds(self) -> float:
+        return time.monotonic() - self._baseline_time if self._baseline_time is not None else 0.0
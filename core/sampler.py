@@ -0,0 +1,143 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+DEFAULT_INTERVAL = 5.0  # seconds between samples
+
+
+# ================================================================
+#  Snapshot
+# ================================================================
+
+@dataclass(frozen=True)
+class StateSnapshot:
+    """Immutable view of every reading taken during one sampler tick."""
+    seq: int
+    timestamp: float
+    power_status: str
+    battery_percentage: int
+    brightness: Optional[int]
+    governor: str
+    extra: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Look up a core field or an extra source reading by name."""
+        if key in self.extra:
+            return self.extra[key]
+        return getattr(self, key, default)
+
+
+# ================================================================
+#  Sampler
+# ================================================================
+
+class Sampler:
+    """
+    Collects all readings on a worker thread, once per tick, into a
+    StateSnapshot and publishes it to subscribers. Subscribers run on the
+    sampler thread and must hand the snapshot off rather than block.
+    """
+
+    def __init__(self, logic, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self._sources: Dict[str, Callable[[], Any]] = {
+            "power_status": logic.get_power_status,
+            "battery_percentage": logic.get_battery_percentage,
+            "brightness": logic.get_brightness,
+            "governor": logic.get_cpu_governor,
+        }
+        self._core_fields = set(self._sources)
+        self._subscribers: List[Callable[[StateSnapshot], None]] = []
+        self._latest: Optional[StateSnapshot] = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_source(self, name: str, read_fn: Callable[[], Any]):
+        """Register an extra reading, published under snapshot.extra[name]."""
+        with self._lock:
+            self._sources[name] = read_fn
+
+    def subscribe(self, callback: Callable[[StateSnapshot], None]) -> Callable[[], None]:
+        """Call back on every new snapshot. Returns an unsubscribe function."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def latest(self) -> Optional[StateSnapshot]:
+        return self._latest
+
+    def set_interval(self, interval: float):
+        self.interval = interval
+        self._wake.set()
+
+    def _collect(self) -> StateSnapshot:
+        with self._lock:
+            sources = list(self._sources.items())
+        readings = {}
+        for name, read_fn in sources:
+            try:
+                readings[name] = read_fn()
+            except Exception as e:
+                print(f"[SAMPLER ERROR] {name}: {e}")
+                readings[name] = None
+        extra = {k: v for k, v in readings.items() if k not in self._core_fields}
+        self._seq += 1
+        return StateSnapshot(
+            seq=self._seq,
+            timestamp=time.time(),
+            power_status=readings["power_status"] or "online",
+            battery_percentage=readings["battery_percentage"] or 0,
+            brightness=readings["brightness"],
+            governor=readings["governor"] or "",
+            extra=MappingProxyType(extra),
+        )
+
+    def sample_now(self) -> StateSnapshot:
+        """Take and publish one snapshot on the calling thread."""
+        snapshot = self._collect()
+        self._latest = snapshot
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"[SAMPLER ERROR] subscriber {callback!r}: {e}")
+        return snapshot
+
+    def request_sample(self):
+        """Ask the worker to sample immediately instead of waiting for the next tick."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.sample_now()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="state-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
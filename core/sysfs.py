@@ -0,0 +1,111 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+from .instrumentation import metrics
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+# Root of the sysfs tree. Override with LPM_SYSFS_ROOT to run against a
+# fake tree (e.g. one built by a test or benchmark harness).
+SYSFS_ROOT = os.environ.get("LPM_SYSFS_ROOT", "/sys")
+
+# sysfs attributes are at most one page long.
+READ_SIZE = 4096
+
+
+# ================================================================
+#  Cached sysfs Reader
+# ================================================================
+
+class SysfsReader:
+    """
+    In-process access layer for sysfs attribute files.
+    Each attribute is opened once and re-read with pread() at offset 0,
+    which makes the kernel regenerate the value without a new open().
+    """
+
+    def __init__(self, root: str = SYSFS_ROOT):
+        self.root = root
+        self._fds: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def path(self, *parts: str) -> str:
+        """Build an absolute path below the configured sysfs root."""
+        return os.path.join(self.root, *parts)
+
+    def _open(self, rel_path: str) -> int:
+        fd = self._fds.get(rel_path)
+        if fd is not None:
+            return fd
+        fd = os.open(self.path(rel_path), os.O_RDONLY | os.O_CLOEXEC)
+        with self._lock:
+            existing = self._fds.get(rel_path)
+            if existing is not None:
+                os.close(fd)
+                return existing
+            self._fds[rel_path] = fd
+        return fd
+
+    def read(self, rel_path: str) -> Optional[str]:
+        """Return the stripped contents of an attribute, or None if unreadable."""
+        if not metrics.enabled:
+            return self._read(rel_path)
+        # Label by subsystem ("class/power_supply") to keep the series count bounded.
+        with metrics.track("sysfs_read", "/".join(rel_path.split("/", 2)[:2])) as op:
+            value = self._read(rel_path)
+            if value is None:
+                op.fail()
+            return value
+
+    def _read(self, rel_path: str) -> Optional[str]:
+        for _ in range(2):
+            try:
+                fd = self._open(rel_path)
+            except OSError:
+                return None
+            try:
+                data = os.pread(fd, READ_SIZE, 0)
+                return data.decode(errors="replace").strip()
+            except OSError:
+                # The device behind a cached fd may have gone away; reopen once.
+                self.invalidate(rel_path)
+        return None
+
+    def read_int(self, rel_path: str) -> Optional[int]:
+        value = self.read(rel_path)
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            return None
+
+    def exists(self, rel_path: str) -> bool:
+        return rel_path in self._fds or os.path.exists(self.path(rel_path))
+
+    def listdir(self, rel_path: str) -> List[str]:
+        """Sorted directory listing, empty if the directory is missing."""
+        try:
+            return sorted(os.listdir(self.path(rel_path)))
+        except OSError:
+            return []
+
+    def invalidate(self, rel_path: Optional[str] = None):
+        """Close one cached fd (or all of them when rel_path is None)."""
+        with self._lock:
+            if rel_path is None:
+                fds, self._fds = list(self._fds.values()), {}
+            else:
+                fd = self._fds.pop(rel_path, None)
+                fds = [fd] if fd is not None else []
+        for fd in fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def close(self):
+        self.invalidate()
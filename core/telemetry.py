@@ -0,0 +1,246 @@
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+# (name, bucket seconds, capacity): 1 h of 1 s samples, 7 days of 1 min
+# means and 90 days of 1 h means, about 250 KiB per metric in total.
+RESOLUTIONS = (
+    ("1s", 1, 3600),
+    ("1m", 60, 7 * 24 * 60),
+    ("1h", 3600, 90 * 24),
+)
+
+# Governors are stored as numeric codes so every metric fits one ring type.
+GOVERNOR_CODES = ["performance", "powersave", "schedutil", "ondemand", "conservative", "userspace"]
+
+_HEADER = struct.Struct("<8sQQQ")  # magic, capacity, head, count
+_MAGIC = b"LPMRING1"
+
+
+# ================================================================
+#  Ring Buffer
+# ================================================================
+
+class RingBuffer:
+    """
+    Fixed-capacity ring of (timestamp, value) float64 pairs.
+    Backed by a bytearray, or by an mmap'd file so history survives
+    restarts. Layout: header | timestamps[capacity] | values[capacity].
+    """
+
+    def __init__(self, capacity: int, path: Optional[str] = None):
+        self.capacity = capacity
+        self.path = path
+        size = _HEADER.size + 16 * capacity
+        self._file = None
+        if path is None:
+            self._buf = bytearray(size)
+            self.head = self.count = 0
+        else:
+            self._buf = self._map_file(path, size)
+        view = memoryview(self._buf)
+        self._ts = view[_HEADER.size:_HEADER.size + 8 * capacity].cast("d")
+        self._values = view[_HEADER.size + 8 * capacity:].cast("d")
+
+    def _map_file(self, path: str, size: int):
+        fresh = not os.path.exists(path) or os.path.getsize(path) != size
+        self._file = open(path, "w+b" if fresh else "r+b")
+        if fresh:
+            self._file.truncate(size)
+        mm = mmap.mmap(self._file.fileno(), size)
+        magic, capacity, head, count = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC or capacity != self.capacity or head >= capacity or count > capacity:
+            head = count = 0
+        self.head, self.count = head, count
+        _HEADER.pack_into(mm, 0, _MAGIC, self.capacity, head, count)
+        return mm
+
+    def append(self, timestamp: float, value: float):
+        self._ts[self.head] = timestamp
+        self._values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        if self.path is not None:
+            _HEADER.pack_into(self._buf, 0, _MAGIC, self.capacity, self.head, self.count)
+
+    def _segments(self):
+        """The ring in time order as (timestamps, values) memoryview pairs."""
+        if self.count < self.capacity:
+            return [(self._ts[:self.count], self._values[:self.count])]
+        return [(self._ts[self.head:], self._values[self.head:]),
+                (self._ts[:self.head], self._values[:self.head])]
+
+    def oldest(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return self._ts[self.head if self.count == self.capacity else 0]
+
+    def range(self, start: float, end: float) -> Tuple[array, array]:
+        """Samples with start <= timestamp <= end, copied out in bulk."""
+        ts_out, val_out = array("d"), array("d")
+        for ts, values in self._segments():
+            lo, hi = bisect_left(ts, start), bisect_right(ts, end)
+            if lo < hi:
+                ts_out.frombytes(ts[lo:hi].tobytes())
+                val_out.frombytes(values[lo:hi].tobytes())
+        return ts_out, val_out
+
+    def flush(self):
+        if self.path is not None:
+            self._buf.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._ts.release()
+            self._values.release()
+            self._buf.close()
+            self._file.close()
+            self._file = None
+
+
+# ================================================================
+#  Multi-Resolution Series
+# ================================================================
+
+class MetricSeries:
+    """One metric at every resolution. Coarse rings store bucket means."""
+
+    def __init__(self, name: str, directory: Optional[str] = None, resolutions=RESOLUTIONS):
+        self.name = name
+        self.rings: Dict[str, RingBuffer] = {}
+        self.bucket_seconds: Dict[str, int] = {}
+        # Open bucket per coarse resolution: [bucket start, sum, count]
+        self._buckets: Dict[str, List[float]] = {}
+        for res, seconds, capacity in resolutions:
+            path = os.path.join(directory, f"{name}.{res}.ring") if directory else None
+            self.rings[res] = RingBuffer(capacity, path)
+            self.bucket_seconds[res] = seconds
+            if seconds > 1:
+                self._buckets[res] = [math.nan, 0.0, 0]
+
+    def append(self, timestamp: float, value: float):
+        finest = next(iter(self.rings))
+        self.rings[finest].append(timestamp, value)
+        for res, bucket in self._buckets.items():
+            seconds = self.bucket_seconds[res]
+            start = timestamp - timestamp % seconds
+            if bucket[0] != start:
+                if bucket[2]:
+                    self.rings[res].append(bucket[0], bucket[1] / bucket[2])
+                bucket[0], bucket[1], bucket[2] = start, 0.0, 0
+            if not math.isnan(value):
+                bucket[1] += value
+                bucket[2] += 1
+
+    def pick_resolution(self, start: float) -> str:
+        """Finest resolution whose ring still reaches back to start."""
+        best, best_oldest = next(iter(self.rings)), math.inf
+        for res, ring in self.rings.items():
+            oldest = ring.oldest()
+            if oldest is None:
+                continue
+            if oldest <= start:
+                return res
+            if oldest < best_oldest:
+                best, best_oldest = res, oldest
+        return best
+
+    def flush(self):
+        for ring in self.rings.values():
+            ring.flush()
+
+    def close(self):
+        for ring in self.rings.values():
+            ring.close()
+
+
+# ================================================================
+#  Telemetry Store
+# ================================================================
+
+class TelemetryStore:
+    """
+    Bounded history for capacity, energy, power, AC state, brightness,
+    governor and per-CPU frequency. Pass a directory to persist every
+    ring as a memory-mapped file.
+    """
+
+    def __init__(self, directory: Optional[str] = None, resolutions=RESOLUTIONS):
+        self.directory = directory
+        self.resolutions = resolutions
+        self._series: Dict[str, MetricSeries] = {}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            # Re-open history persisted by earlier sessions.
+            for filename in os.listdir(directory):
+                if filename.endswith(".ring"):
+                    self._get_series(filename.rsplit(".", 2)[0])
+
+    def _get_series(self, metric: str) -> MetricSeries:
+        series = self._series.get(metric)
+        if series is None:
+            series = self._series[metric] = MetricSeries(metric.replace("/", "_"), self.directory, self.resolutions)
+        return series
+
+    def record(self, metric: str, value: Optional[float], timestamp: Optional[float] = None):
+        """Append one sample; None is stored as NaN so gaps stay visible."""
+        value = math.nan if value is None else float(value)
+        with self._lock:
+            self._get_series(metric).append(time.time() if timestamp is None else timestamp, value)
+
+    def record_snapshot(self, snapshot):
+        """Record every telemetry metric carried by a sampler snapshot."""
+        ts = snapshot.timestamp
+        governor = snapshot.governor
+        self.record("capacity", snapshot.battery_percentage, ts)
+        self.record("ac_online", 1 if snapshot.power_status == "online" else 0, ts)
+        self.record("brightness", snapshot.brightness, ts)
+        self.record("governor", GOVERNOR_CODES.index(governor) if governor in GOVERNOR_CODES else None, ts)
+        battery = snapshot.get("battery_energy") or {}
+        self.record("energy_now", battery.get("energy_now"), ts)
+        self.record("power_now", battery.get("power_now"), ts)
+        for cpu, freq in (snapshot.get("cpu_frequencies") or {}).items():
+            self.record(f"cpu_freq.{cpu}", freq, ts)
+
+    def query(self, metric: str, start: Optional[float] = None, end: Optional[float] = None,
+              resolution: Optional[str] = None) -> Tuple[array, array]:
+        """
+        Return (timestamps, values) arrays for a time range. Without an
+        explicit resolution the finest one covering `start` is used.
+        """
+        end = time.time() if end is None else end
+        start = end - 3600 if start is None else start
+        with self._lock:
+            series = self._series.get(metric)
+            if series is None:
+                return array("d"), array("d")
+            res = resolution or series.pick_resolution(start)
+            return series.rings[res].range(start, end)
+
+    def metrics(self) -> List[str]:
+        with self._lock:
+            return sorted(self._series)
+
+    def flush(self):
+        with self._lock:
+            for series in self._series.values():
+                series.flush()
+
+    def close(self):
+        with self._lock:
+            for series in self._series.values():
+                series.flush()
+                series.close()
+            self._series.clear()
@@ -0,0 +1,286 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .sysfs import SysfsReader
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+THERMAL_DIR = "class/thermal"
+HWMON_DIR = "class/hwmon"
+# Sensors that measure the CPU package, in order of preference.
+CPU_ZONE_TYPES = ("x86_pkg_temp", "cpu-thermal", "cpu_thermal", "soc_thermal")
+CPU_HWMON_NAMES = ("coretemp", "k10temp", "zenpower", "cpu_thermal")
+# Trip types that mean "the platform starts throttling here".
+THROTTLE_TRIPS = ("passive", "hot", "critical")
+# Without a usable trip point, treat this as the throttling temperature.
+DEFAULT_LIMIT_C = 95.0
+
+# Controller tuning: start capping MARGIN_C below the trip, release once
+# the temperature is HYSTERESIS_C below that again.
+MARGIN_C = 8.0
+HYSTERESIS_C = 4.0
+CAP_STEP = 0.05          # fraction of cpuinfo_max_freq per tick
+MIN_CAP = 0.5
+EPP_LADDER = ("performance", "balance_performance", "balance_power", "power")
+
+
+@dataclass(frozen=True)
+class TripPoint:
+    zone: str
+    zone_type: str
+    type: str           # "passive", "active", "hot", "critical"
+    temp_c: float
+
+
+@dataclass(frozen=True)
+class ThermalReading:
+    timestamp: float
+    temps: Dict[str, float] = field(default_factory=dict)     # sensor key -> °C
+    fans: Dict[str, int] = field(default_factory=dict)        # fan key -> RPM
+    pwm: Dict[str, int] = field(default_factory=dict)         # pwm key -> percent duty
+    cpu_temp: Optional[float] = None
+
+    @property
+    def hottest(self) -> Optional[float]:
+        return max(self.temps.values()) if self.temps else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.timestamp,
+            "temps": dict(self.temps),
+            "fans": dict(self.fans),
+            "pwm": dict(self.pwm),
+            "cpu_temp": self.cpu_temp,
+            "hottest": self.hottest,
+        }
+
+
+# ================================================================
+#  Sensors
+# ================================================================
+
+class Thermal:
+    """
+    Every thermal zone and hwmon sensor. Attribute paths (and trip points)
+    are enumerated once; each read() is one pread per sensor on fds that
+    SysfsReader keeps open.
+    """
+
+    def __init__(self, sysfs: SysfsReader):
+        self.sysfs = sysfs
+        self._temps: Optional[List[Tuple[str, str]]] = None     # (key, path)
+        self._fans: List[Tuple[str, str]] = []
+        self._pwm: List[Tuple[str, str]] = []
+        self._cpu_key: Optional[str] = None
+        self._trips: List[TripPoint] = []
+        self._cpu_limits: List[float] = []   # temp*_crit / temp*_max of the CPU hwmon, °C
+        self._lock = threading.Lock()
+
+    def _enumerate(self):
+        temps, fans, pwm, trips, cpu_limits = [], [], [], [], []
+        cpu_candidates: Dict[str, str] = {}
+        for zone in self.sysfs.listdir(THERMAL_DIR):
+            if not zone.startswith("thermal_zone"):
+                continue
+            zone_type = self.sysfs.read(f"{THERMAL_DIR}/{zone}/type") or zone
+            key = f"{zone}:{zone_type}"
+            temps.append((key, f"{THERMAL_DIR}/{zone}/temp"))
+            if zone_type in CPU_ZONE_TYPES:
+                cpu_candidates.setdefault(zone_type, key)
+            for entry in self.sysfs.listdir(f"{THERMAL_DIR}/{zone}"):
+                if entry.startswith("trip_point_") and entry.endswith("_type"):
+                    base = f"{THERMAL_DIR}/{zone}/{entry[:-5]}"
+                    millidegrees = self.sysfs.read_int(f"{base}_temp")
+                    trip_type = self.sysfs.read(f"{base}_type")
+                    if millidegrees and millidegrees > 0 and trip_type:
+                        trips.append(TripPoint(zone, zone_type, trip_type, millidegrees / 1000))
+        for hwmon in self.sysfs.listdir(HWMON_DIR):
+            base = f"{HWMON_DIR}/{hwmon}"
+            name = self.sysfs.read(f"{base}/name") or hwmon
+            for entry in self.sysfs.listdir(base):
+                if entry.startswith("temp") and entry.endswith("_input"):
+                    label = self.sysfs.read(f"{base}/{entry[:-6]}_label") or entry[:-6]
+                    key = f"{hwmon}:{name}/{label}"
+                    temps.append((key, f"{base}/{entry}"))
+                    if name in CPU_HWMON_NAMES:
+                        cpu_candidates.setdefault(name, key)
+                        for suffix in ("_crit", "_max"):
+                            millidegrees = self.sysfs.read_int(f"{base}/{entry[:-6]}{suffix}")
+                            if millidegrees and millidegrees > 0:
+                                cpu_limits.append(millidegrees / 1000)
+                elif entry.startswith("fan") and entry.endswith("_input"):
+                    fans.append((f"{hwmon}:{name}/{entry[:-6]}", f"{base}/{entry}"))
+                elif entry.startswith("pwm") and entry[3:].isdigit():
+                    pwm.append((f"{hwmon}:{name}/{entry}", f"{base}/{entry}"))
+        cpu_key = next((cpu_candidates[k] for k in CPU_ZONE_TYPES + CPU_HWMON_NAMES if k in cpu_candidates), None)
+        self._temps, self._fans, self._pwm, self._trips, self._cpu_key = temps, fans, pwm, trips, cpu_key
+        self._cpu_limits = cpu_limits
+
+    def _ensure(self):
+        with self._lock:
+            if self._temps is None:
+                self._enumerate()
+
+    def invalidate(self):
+        with self._lock:
+            self._temps = None
+
+    def trip_points(self) -> List[TripPoint]:
+        self._ensure()
+        return list(self._trips)
+
+    def throttle_limit(self) -> float:
+        """
+        Where the CPU starts throttling, in °C: the lowest throttling trip of
+        a CPU zone, else the CPU hwmon's crit/max limit. Trips of other zones
+        (skin, battery, Wi-Fi) say nothing about the CPU and are not used.
+        """
+        trips = [t.temp_c for t in self.trip_points() if t.type in THROTTLE_TRIPS and t.zone_type in CPU_ZONE_TYPES]
+        if trips:
+            return min(trips)
+        with self._lock:
+            limits = list(self._cpu_limits)
+        return min(limits) if limits else DEFAULT_LIMIT_C
+
+    def read(self) -> ThermalReading:
+        self._ensure()
+        temps = {}
+        for key, path in self._temps:
+            value = self.sysfs.read_int(path)
+            if value is not None:
+                temps[key] = value / 1000
+        fans = {}
+        for key, path in self._fans:
+            value = self.sysfs.read_int(path)
+            if value is not None:
+                fans[key] = value
+        pwm = {}
+        for key, path in self._pwm:
+            value = self.sysfs.read_int(path)
+            if value is not None:
+                pwm[key] = round(value / 255 * 100)
+        cpu = temps.get(self._cpu_key) if self._cpu_key else None
+        return ThermalReading(time.time(), temps, fans, pwm, cpu if cpu is not None else
+                              (max(temps.values()) if temps else None))
+
+
+# ================================================================
+#  Proactive Throttling
+# ================================================================
+
+class ThermalController:
+    """
+    Caps the CPU gently before the platform's own throttling kicks in.
+    Each update() compares the CPU temperature with the throttle trip: once
+    within MARGIN_C of it the cap tightens by one step per tick (scaling_max_freq
+    in "max_freq" mode, one EPP level in "epp" mode), and it relaxes again
+    one step per tick once HYSTERESIS_C below the margin.
+
+    The uncapped settings are read when capping starts. A policy whose value
+    no longer matches what the controller last wrote has been changed by
+    someone else (a profile switch); that value becomes its new baseline and
+    is left alone on release.
+    """
+
+    def __init__(self, cpufreq, thermal: Thermal, apply_fn: Callable[[List[Any]], Any],
+                 mode: str = "max_freq", margin_c: float = MARGIN_C, hysteresis_c: float = HYSTERESIS_C):
+        if mode not in ("max_freq", "epp"):
+            raise ValueError(f"unknown thermal control mode {mode!r}")
+        self.cpufreq = cpufreq
+        self.thermal = thermal
+        self.apply_fn = apply_fn
+        self.mode = mode
+        self.limit_c = thermal.throttle_limit()
+        self.start_c = self.limit_c - margin_c
+        self.release_c = self.start_c - hysteresis_c
+        self.level = 0        # 0 = uncapped; mode-specific steps beyond that
+        self.max_level = int(round((1 - MIN_CAP) / CAP_STEP)) if mode == "max_freq" else len(EPP_LADDER) - 1
+        self.stats = {"updates": 0, "tightened": 0, "relaxed": 0, "failed": 0}
+        self._saved: Dict[str, Any] = {}     # policy -> uncapped max_freq or EPP
+        self._written: Dict[str, Any] = {}   # policy -> value this controller last wrote
+
+    def update(self, temp_c: Optional[float]) -> int:
+        """Feed one temperature sample; returns the current cap level."""
+        self.stats["updates"] += 1
+        if temp_c is None:
+            return self.level
+        if temp_c >= self.start_c and self.level < self.max_level:
+            # Further past the threshold -> bigger steps.
+            steps = 1 + int((temp_c - self.start_c) / max(1.0, (self.limit_c - self.start_c) / 2))
+            if self._set_level(min(self.max_level, self.level + steps)):
+                self.stats["tightened"] += 1
+        elif temp_c <= self.release_c and self.level > 0:
+            if self._set_level(self.level - 1):
+                self.stats["relaxed"] += 1
+        return self.level
+
+    def _current(self, state) -> Any:
+        return state.max_freq if self.mode == "max_freq" else state.epp
+
+    def _set_level(self, level: int) -> bool:
+        """Write the settings for `level`; the level only changes if every write succeeded."""
+        policies = {p.name: p for p in self.cpufreq.policies()}
+        for state in self.cpufreq.states():
+            current = self._current(state)
+            if self.level == 0 or self._written.get(state.policy, current) != current:
+                self._saved[state.policy] = current   # uncapped, or changed behind our back
+                self._written.pop(state.policy, None)
+        ops, targets = [], []
+        for name, policy in policies.items():
+            saved = self._saved.get(name)
+            if level == 0 and name not in self._written:
+                continue  # never capped, or someone else owns it now
+            if self.mode == "max_freq":
+                if level == 0:
+                    target = saved
+                else:
+                    ceiling = saved or policy.cpuinfo_max_freq
+                    target = int((policy.cpuinfo_max_freq or 0) * (1 - level * CAP_STEP))
+                    target = max(policy.cpuinfo_min_freq or 0, min(ceiling or target, target))
+                if target:
+                    policy_ops = self.cpufreq.freq_limit_ops(max_freq=target, targets=[name])
+                else:
+                    continue
+            elif policy.available_epps:
+                if level == 0:
+                    target = saved
+                else:
+                    start = EPP_LADDER.index(saved) if saved in EPP_LADDER else 0
+                    target = EPP_LADDER[min(len(EPP_LADDER) - 1, start + level)]
+                if target and target in policy.available_epps:
+                    policy_ops = self.cpufreq.epp_ops(target, targets=[name])
+                else:
+                    continue
+            else:
+                continue
+            ops += policy_ops
+            targets += [(name, target)] * len(policy_ops)
+        results = self.apply_fn(ops) if ops else []
+        failed = set()
+        for (name, _), result in zip(targets, results or []):
+            if not result.ok:
+                failed.add(name)
+        if ops and (not results or len(results) != len(ops)):
+            failed = {name for name, _ in targets}
+        for name, target in targets:
+            if name in failed:
+                continue
+            if level == 0:
+                self._written.pop(name, None)
+            else:
+                self._written[name] = target
+        if failed:
+            self.stats["failed"] += 1
+            print(f"[THERMAL ERROR] Could not move {', '.join(sorted(failed))} to cap level {level}")
+            return False
+        self.level = level
+        return True
+
+    def restore(self):
+        """Release the cap on every policy that still carries it."""
+        if self.level:
+            self._set_level(0)
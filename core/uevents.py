@@ -0,0 +1,240 @@
+"""
+Kernel uevent sources for the Linux Power Manager.
+
+The primary source is a NETLINK_KOBJECT_UEVENT socket, which the kernel
+writes to whenever a device changes state (AC plugged, USB device added,
+...). Where netlink is unavailable, SysfsPollSource watches sysfs
+attributes with epoll and synthesises equivalent events.
+
+Any object with fileno() and recv() can act as a source, so tests can
+inject raw uevents through one end of a socket.socketpair().
+"""
+
+import os
+import select
+import socket
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional
+
+from .sysfs import SysfsReader
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+NETLINK_KOBJECT_UEVENT = 15
+KERNEL_EVENT_GROUP = 1  # raw kernel events, not the libudev re-broadcast
+RECV_SIZE = 64 * 1024
+FALLBACK_POLL_INTERVAL = 30.0  # seconds; only used when sysfs_notify never fires
+
+
+# ================================================================
+#  Event Parsing
+# ================================================================
+
+@dataclass(frozen=True)
+class Uevent:
+    action: str
+    devpath: str
+    subsystem: str
+    properties: Mapping[str, str]
+
+
+def parse_uevent(data: bytes) -> Optional[Uevent]:
+    """Parse a kernel uevent datagram ("action@devpath\\0KEY=VALUE\\0...")."""
+    parts = data.split(b"\0")
+    header = parts[0].decode(errors="replace")
+    if "@" not in header:
+        return None  # libudev-formatted or malformed message
+    properties = {}
+    for part in parts[1:]:
+        key, sep, value = part.decode(errors="replace").partition("=")
+        if sep:
+            properties[key] = value
+    action, _, devpath = header.partition("@")
+    return Uevent(
+        action=properties.get("ACTION", action),
+        devpath=properties.get("DEVPATH", devpath),
+        subsystem=properties.get("SUBSYSTEM", ""),
+        properties=MappingProxyType(properties),
+    )
+
+
+def format_uevent(action: str, devpath: str, properties: Dict[str, str]) -> bytes:
+    """Encode an event in the kernel wire format (used by synthetic sources)."""
+    fields = [f"{action}@{devpath}", f"ACTION={action}", f"DEVPATH={devpath}"]
+    fields += [f"{key}={value}" for key, value in properties.items()]
+    return "\0".join(fields).encode() + b"\0"
+
+
+# ================================================================
+#  Event Sources
+# ================================================================
+
+def open_netlink_source() -> socket.socket:
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+    sock.bind((0, KERNEL_EVENT_GROUP))
+    return sock
+
+
+class SysfsPollSource:
+    """
+    Fallback source: watches power_supply "online" attributes with epoll
+    (EPOLLPRI fires on sysfs_notify) and re-reads them after a long timeout
+    for drivers that never notify. Changes are written to an internal pipe
+    as synthetic uevents.
+    """
+
+    def __init__(self, sysfs: SysfsReader, interval: float = FALLBACK_POLL_INTERVAL):
+        self.sysfs = sysfs
+        self.interval = interval
+        self._read_fd, self._write_fd = os.pipe()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sysfs-poll-source", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        epoll = select.epoll()
+        watched = {}  # fd -> (supply name, last value)
+        for name in self.sysfs.listdir("class/power_supply"):
+            try:
+                fd = os.open(self.sysfs.path("class/power_supply", name, "online"), os.O_RDONLY | os.O_CLOEXEC)
+            except OSError:
+                continue
+            try:
+                epoll.register(fd, select.EPOLLPRI | select.EPOLLERR)
+            except PermissionError:
+                pass  # regular file (fake tree): covered by the timed re-read
+            watched[fd] = (name, os.pread(fd, 64, 0).strip())
+        try:
+            while not self._stopped.is_set():
+                epoll.poll(self.interval)
+                for fd, (name, last) in list(watched.items()):
+                    # Re-reading from offset 0 also re-arms EPOLLPRI.
+                    value = os.pread(fd, 64, 0).strip()
+                    if value == last:
+                        continue
+                    watched[fd] = (name, value)
+                    message = format_uevent("change", f"/class/power_supply/{name}", {
+                        "SUBSYSTEM": "power_supply",
+                        "POWER_SUPPLY_NAME": name,
+                        "POWER_SUPPLY_ONLINE": value.decode(),
+                    })
+                    try:
+                        os.write(self._write_fd, message)
+                    except OSError:
+                        return  # closed underneath us
+        finally:
+            epoll.close()
+            for fd in watched:
+                os.close(fd)
+
+    def fileno(self) -> int:
+        return self._read_fd
+
+    def recv(self, bufsize: int) -> bytes:
+        return os.read(self._read_fd, bufsize)
+
+    def close(self):
+        self._stopped.set()
+        os.close(self._write_fd)
+        os.close(self._read_fd)
+
+
+# ================================================================
+#  Monitor
+# ================================================================
+
+class UeventMonitor:
+    """
+    Blocks in poll() on an event source and dispatches parsed uevents to
+    per-subsystem subscribers. No timers: the thread only wakes up when
+    the kernel (or the injected source) has something to say.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._subscribers: Dict[str, List[Callable[[Uevent], None]]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._stop_r, self._stop_w = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def create(cls, sysfs: SysfsReader) -> "UeventMonitor":
+        """Prefer the kernel netlink socket; fall back to polling sysfs."""
+        try:
+            return cls(open_netlink_source())
+        except OSError as e:
+            print(f"[UEVENT] Netlink unavailable ({e}); falling back to sysfs polling.")
+            return cls(SysfsPollSource(sysfs))
+
+    def subscribe(self, subsystem: str, callback: Callable[[Uevent], None]):
+        with self._lock:
+            self._subscribers[subsystem].append(callback)
+        self.start()
+
+    def dispatch(self, event: Uevent):
+        with self._lock:
+            callbacks = list(self._subscribers.get(event.subsystem, ()))
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[UEVENT ERROR] {event.subsystem} subscriber: {e}")
+
+    def _run(self):
+        poller = select.poll()
+        poller.register(self.source.fileno(), select.POLLIN)
+        poller.register(self._stop_r, select.POLLIN)
+        while True:
+            for fd, _ in poller.poll():
+                if fd == self._stop_r:
+                    return
+                try:
+                    data = self.source.recv(RECV_SIZE)
+                except OSError as e:
+                    print(f"[UEVENT ERROR] recv failed: {e}")
+                    continue
+                event = parse_uevent(data)
+                if event is not None:
+                    self.dispatch(event)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="uevent-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            os.write(self._stop_w, b"x")
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.source.close()
+        os.close(self._stop_r)
+        os.close(self._stop_w)
+
+
+# ================================================================
+#  Power Supply Watcher
+# ================================================================
+
+class PowerSupplyWatcher:
+    """Turns power_supply uevents into AC online/offline transitions."""
+
+    def __init__(self, monitor: UeventMonitor, read_status: Callable[[], str],
+                 callback: Callable[[str], None]):
+        self.read_status = read_status
+        self.callback = callback
+        self.last_status = read_status()
+        monitor.subscribe("power_supply", self._on_event)
+
+    def _on_event(self, event: Uevent):
+        # Battery uevents fire on every capacity change; re-read the AC
+        # state (a cached sysfs pread) and only report real transitions.
+        status = self.read_status()
+        if status != self.last_status:
+            self.last_status = status
+            self.callback(status)
@@ -0,0 +1,220 @@
+import os
+import subprocess
+import threading
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from .fileutil import write_atomic
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+UPOWER_CONFIG_PATH = "/etc/UPower/UPower.conf"
+UPOWER_SECTION = "UPower"
+UPOWER_CONFIG_KEYS = [
+    "PercentageLow",
+    "PercentageCritical",
+    "PercentageAction",
+    "CriticalPowerAction",
+]
+# upowerd's built-in values for keys missing from the file.
+UPOWER_DEFAULTS = {
+    "PercentageLow": "20",
+    "PercentageCritical": "5",
+    "PercentageAction": "2",
+    "CriticalPowerAction": "HybridSleep",
+}
+CRITICAL_POWER_ACTIONS = ("PowerOff", "Hibernate", "HybridSleep", "Suspend", "Ignore")
+# Only restarted when it is running; a stopped upowerd reads the file on start.
+RESTART_COMMAND = ["systemctl", "try-restart", "upower.service"]
+
+
+# ================================================================
+#  Parsing & Serialising
+# ================================================================
+
+class UPowerDocument:
+    """
+    UPower.conf as a list of lines plus an index of key -> line number
+    inside the [UPower] section. Edits replace only the value part of the
+    affected line, so comments, blank lines and unknown keys survive a
+    round trip byte for byte.
+    """
+
+    def __init__(self, text: str = ""):
+        self.lines: List[str] = text.splitlines(keepends=True)
+        self._index: Dict[str, int] = {}
+        self._section_end: Optional[int] = None  # insertion point for new keys
+        self.values: Dict[str, str] = {}
+        self._parse()
+
+    def _parse(self):
+        section = None
+        for number, line in enumerate(self.lines):
+            stripped = line.strip()
+            if not stripped or stripped[0] in "#;":
+                continue
+            if stripped.startswith("[") and stripped.endswith("]"):
+                section = stripped[1:-1].strip()
+                continue
+            if section != UPOWER_SECTION or "=" not in stripped:
+                continue
+            key, value = stripped.split("=", 1)
+            # Later duplicates win, as with GKeyFile.
+            self._index[key.strip()] = number
+            self.values[key.strip()] = _strip_comment(value)
+            self._section_end = number + 1
+        if self._section_end is None:
+            for number, line in enumerate(self.lines):
+                if line.strip() == f"[{UPOWER_SECTION}]":
+                    self._section_end = number + 1
+
+    def set(self, key: str, value: str) -> bool:
+        """Set one key. Returns False if the effective value was already `value`."""
+        value = str(value)
+        if self.values.get(key) == value:
+            return False
+        number = self._index.get(key)
+        if number is not None:
+            line = self.lines[number]
+            indent = line[:len(line) - len(line.lstrip())]
+            newline = "\n" if line.endswith("\n") else ""
+            old_value = line.split("=", 1)[1].rstrip("\r\n")
+            comment = old_value[len(old_value.split("#", 1)[0].rstrip()):] if "#" in old_value else ""
+            self.lines[number] = f"{indent}{key}={value}{comment}{newline}"
+        else:
+            if self._section_end is None:
+                if self.lines and not self.lines[-1].endswith("\n"):
+                    self.lines[-1] += "\n"
+                self.lines.append(f"[{UPOWER_SECTION}]\n")
+                self._section_end = len(self.lines)
+            elif self._section_end > 0 and not self.lines[self._section_end - 1].endswith("\n"):
+                self.lines[self._section_end - 1] += "\n"
+            number = self._section_end
+            self.lines.insert(number, f"{key}={value}\n")
+            self._index = {k: n + (n >= number) for k, n in self._index.items()}
+            self._index[key] = number
+            self._section_end = number + 1
+        self.values[key] = value
+        return True
+
+    def update(self, settings: Mapping[str, str]) -> bool:
+        """Set several keys; True if any effective value changed."""
+        changed = False
+        for key, value in settings.items():
+            changed = self.set(key, value) or changed
+        return changed
+
+    def serialize(self) -> str:
+        return "".join(self.lines)
+
+
+def _strip_comment(value: str) -> str:
+    # UPower.conf values never contain '#', so a trailing "# ..." is a comment.
+    return value.split("#", 1)[0].strip()
+
+
+def validate(values: Mapping[str, str]) -> Optional[str]:
+    """Error message if the thresholds are inconsistent, else None."""
+    values = {**UPOWER_DEFAULTS, **values}
+    try:
+        low = int(values["PercentageLow"])
+        critical = int(values["PercentageCritical"])
+        action = int(values["PercentageAction"])
+    except ValueError as e:
+        return f"thresholds must be integers ({e})"
+    for name, value in (("PercentageLow", low), ("PercentageCritical", critical), ("PercentageAction", action)):
+        if not 0 <= value <= 100:
+            return f"{name} must be between 0 and 100, got {value}"
+    if not critical < low:
+        return f"PercentageCritical ({critical}) must be below PercentageLow ({low})"
+    if not action <= critical:
+        return f"PercentageAction ({action}) must not exceed PercentageCritical ({critical})"
+    policy = values["CriticalPowerAction"]
+    if policy not in CRITICAL_POWER_ACTIONS:
+        return f"CriticalPowerAction must be one of {', '.join(CRITICAL_POWER_ACTIONS)}, got {policy!r}"
+    return None
+
+
+# ================================================================
+#  Config File
+# ================================================================
+
+class UPowerConfigFile:
+    """
+    Cached view of UPower.conf, re-parsed only when the file's
+    mtime/inode/size change. `fallback_reader` is used when the file is
+    not readable by this process (e.g. sudo cat on locked-down systems).
+    """
+
+    def __init__(self, path: str = UPOWER_CONFIG_PATH,
+                 fallback_reader: Optional[Callable[[str], Optional[str]]] = None):
+        self.path = path
+        self.fallback_reader = fallback_reader
+        self._lock = threading.Lock()
+        self._stat_key: Optional[Tuple[int, int, int]] = None
+        self._text = ""
+        self._values: Dict[str, str] = {}
+
+    def _load(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._stat_key, self._text, self._values = None, "", {}
+            return
+        key = (st.st_mtime_ns, st.st_ino, st.st_size)
+        if key == self._stat_key:
+            return
+        try:
+            with open(self.path, "r") as f:
+                text = f.read()
+        except PermissionError:
+            text = self.fallback_reader(self.path) if self.fallback_reader else None
+            if text is None:
+                print("[ERROR] Failed to read UPower config.")
+                return
+        except OSError as e:
+            print(f"[ERROR] Failed to read UPower config: {e}")
+            return
+        self._stat_key, self._text, self._values = key, text, UPowerDocument(text).values
+
+    def values(self) -> Dict[str, str]:
+        with self._lock:
+            self._load()
+            return dict(self._values)
+
+    def document(self) -> UPowerDocument:
+        """A fresh, editable parse of the current contents."""
+        with self._lock:
+            self._load()
+            return UPowerDocument(self._text)
+
+    def invalidate(self):
+        with self._lock:
+            self._stat_key = None
+
+
+def apply_settings(path: str, settings: Mapping[str, str], restart: bool = True) -> Dict[str, bool]:
+    """
+    Privileged side of an update: edit, validate, write only if something
+    changed, and restart upowerd only after a write.
+    """
+    try:
+        with open(path, "r") as f:
+            text = f.read()
+    except FileNotFoundError:
+        text = ""
+    document = UPowerDocument(text)
+    if not document.update({k: str(v) for k, v in settings.items()}):
+        return {"changed": False, "restarted": False}
+    error = validate(document.values)
+    if error:
+        raise ValueError(error)
+    write_atomic(path, document.serialize())
+    restarted = False
+    if restart:
+        try:
+            restarted = subprocess.run(RESTART_COMMAND, capture_output=True, timeout=30).returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            restarted = False
+    return {"changed": True, "restarted": restarted}
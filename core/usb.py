@@ -0,0 +1,160 @@
+import os
+import threading
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .sysfs import SysfsReader
+
+# ================================================================
+#  Constants & Global Configuration
+# ================================================================
+
+USB_DEVICES_DIR = "bus/usb/devices"
+ROOT_HUB_CLASS = "09"
+
+
+# ================================================================
+#  Device Model
+# ================================================================
+
+@dataclass(frozen=True)
+class UsbDevice:
+    path: str                 # sysfs device name, e.g. "usb1" or "3-10"
+    name: str
+    vendor_id: str
+    product_id: str
+    device_class: str
+    control: str              # power/control: "auto" or "on"
+    runtime_status: str
+    autosuspend_delay_ms: Optional[int]
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "path": self.path,
+            "name": self.name,
+            "vendor_id": self.vendor_id,
+            "product_id": self.product_id,
+            "class": self.device_class,
+            "control": self.control,
+            "runtime_status": self.runtime_status,
+            "autosuspend_delay_ms": self.autosuspend_delay_ms,
+        }
+
+
+def _read_attr(directory: str, attribute: str) -> Optional[str]:
+    """One-shot read; the index caches the result, so no fd is kept open."""
+    try:
+        fd = os.open(os.path.join(directory, attribute), os.O_RDONLY | os.O_CLOEXEC)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, 4096).decode(errors="replace").strip()
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def read_usb_device(directory: str, name: str) -> Optional[UsbDevice]:
+    control = _read_attr(directory, "power/control")
+    if control is None:
+        return None
+    delay = _read_attr(directory, "power/autosuspend_delay_ms")
+    vendor = _read_attr(directory, "idVendor") or ""
+    product = _read_attr(directory, "idProduct") or ""
+    return UsbDevice(
+        path=name,
+        name=_read_attr(directory, "product") or f"USB Device {name}",
+        vendor_id=vendor,
+        product_id=product,
+        device_class=_read_attr(directory, "bDeviceClass") or "",
+        control=control,
+        runtime_status=_read_attr(directory, "power/runtime_status") or "unknown",
+        autosuspend_delay_ms=int(delay) if delay and delay.lstrip("-").isdigit() else None,
+    )
+
+
+# ================================================================
+#  Device Index
+# ================================================================
+
+class UsbDeviceIndex:
+    """
+    Every USB device under /sys/bus/usb/devices, built in one scandir()
+    pass and then kept current from add/remove uevents instead of being
+    rescanned.
+    """
+
+    def __init__(self, sysfs: SysfsReader):
+        self.sysfs = sysfs
+        self._devices: Optional[Dict[str, UsbDevice]] = None
+        self._lock = threading.Lock()
+
+    def _scan(self) -> Dict[str, UsbDevice]:
+        devices = {}
+        try:
+            entries = list(os.scandir(self.sysfs.path(USB_DEVICES_DIR)))
+        except OSError:
+            return devices
+        for entry in entries:
+            if ":" in entry.name:
+                continue  # interfaces ("1-1:1.0") have no power/control of their own
+            device = read_usb_device(entry.path, entry.name)
+            if device is not None:
+                devices[entry.name] = device
+        return devices
+
+    def refresh(self):
+        devices = self._scan()
+        with self._lock:
+            self._devices = devices
+
+    def devices(self) -> List[UsbDevice]:
+        if self._devices is None:
+            self.refresh()
+        with self._lock:
+            return [self._devices[name] for name in sorted(self._devices)]
+
+    def get(self, path: str) -> Optional[UsbDevice]:
+        if self._devices is None:
+            self.refresh()
+        with self._lock:
+            return self._devices.get(path)
+
+    def select(self, paths: Optional[Iterable[str]] = None, device_class: Optional[str] = None,
+               include_root_hubs: bool = True,
+               predicate: Optional[Callable[[UsbDevice], bool]] = None) -> List[UsbDevice]:
+        """Filter the index by path list, device class and/or an arbitrary predicate."""
+        wanted = set(paths) if paths is not None else None
+        selected = []
+        for device in self.devices():
+            if wanted is not None and device.path not in wanted:
+                continue
+            if device_class is not None and device.device_class != device_class:
+                continue
+            if not include_root_hubs and device.path.startswith("usb"):
+                continue
+            if predicate is not None and not predicate(device):
+                continue
+            selected.append(device)
+        return selected
+
+    def update_control(self, path: str, control: str):
+        """Record a power/control value we just wrote."""
+        with self._lock:
+            if self._devices and path in self._devices:
+                self._devices[path] = replace(self._devices[path], control=control)
+
+    def handle_uevent(self, event):
+        """Apply a "usb" subsystem uevent to the index incrementally."""
+        if event.properties.get("DEVTYPE") != "usb_device" or self._devices is None:
+            return
+        name = event.devpath.rstrip("/").rsplit("/", 1)[-1]
+        if event.action == "remove":
+            with self._lock:
+                self._devices.pop(name, None)
+        elif event.action in ("add", "change", "bind"):
+            device = read_usb_device(self.sysfs.path(USB_DEVICES_DIR, name), name)
+            if device is not None:
+                with self._lock:
+                    self._devices[name] = device
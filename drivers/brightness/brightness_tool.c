@@ -2,8 +2,11 @@
 #include <stdlib.h>
 #include <string.h>
 #include <dirent.h>
+#include <math.h>
 
 #define BACKLIGHT_PATH "/sys/class/backlight/"
+// Same perceptual curve as core/backlight.py: raw = max * (percent/100)^GAMMA
+#define GAMMA 2.2
 
 // Helper function to find the first available backlight device name
 int find_backlight_device(char *device_name, size_t len) {
@@ -92,7 +95,7 @@ int main(int argc, char *argv[]) {
             return 1;
         }
         // Calculate and print the percentage
-        int percentage = (int)(((float)current_brightness / (float)max_brightness) * 100.0);
+        int percentage = (int)lround(pow((double)current_brightness / max_brightness, 1.0 / GAMMA) * 100.0);
         printf("%d\n", percentage); // Print *only* the percentage number
 
     } else if (mode == 1) {
@@ -106,7 +109,9 @@ int main(int argc, char *argv[]) {
             fprintf(stderr, "Error: Percentage must be between 0 and 100.\n");
             return 1;
         }
-        int new_brightness = (int)(((float)percentage / 100.0) * max_brightness);
+        int new_brightness = (int)lround(pow(percentage / 100.0, GAMMA) * max_brightness);
+        // Never round a non-zero request down to "panel off"
+        if (percentage > 0 && new_brightness < 1) new_brightness = 1;
         if (write_int_to_file(brightness_path, new_brightness) != 0) {
             return 1;
         }
@@ -1,24 +1,33 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <dirent.h>
+
+#define CPUFREQ_PATH "/sys/devices/system/cpu/cpufreq/"
 
 int write_to_file(const char *path, const char *value) {
     FILE *fp = fopen(path, "w");
-    if (fp == NULL) { return -1; } // Ignore errors if a CPU core file doesn't exist
-    fprintf(fp, "%s", value);
-    fclose(fp);
+    if (fp == NULL) { return -1; }
+    int ok = fprintf(fp, "%s", value) >= 0;
+    // sysfs reports a rejected value (e.g. unknown governor) on close
+    if (fclose(fp) != 0 || !ok) { return -1; }
     return 0;
 }
 
 int read_from_file(const char *path, char *buffer, size_t len) {
     FILE *fp = fopen(path, "r");
     if (fp == NULL) { return -1; }
-    if (fgets(buffer, len, fp) == NULL) { return -1; }
+    if (fgets(buffer, len, fp) == NULL) { fclose(fp); return -1; }
     fclose(fp);
     buffer[strcspn(buffer, "\n")] = 0; // Remove trailing newline
     return 0;
 }
 
+// Returns 1 if the directory entry is a cpufreq policy ("policyN")
+int is_policy(const char *name) {
+    return strncmp(name, "policy", 6) == 0 && name[6] != '\0';
+}
+
 int main(int argc, char *argv[]) {
     if (argc < 2) {
         fprintf(stderr, "Usage: %s <get | set <governor>>\n", argv[0]);
@@ -27,7 +36,8 @@ int main(int argc, char *argv[]) {
 
     if (strcmp(argv[1], "get") == 0) {
         char buffer[64];
-        if (read_from_file("/sys/devices/system/cpu/cpu0/cpufreq/scaling_governor", buffer, sizeof(buffer)) == 0) {
+        if (read_from_file(CPUFREQ_PATH "policy0/scaling_governor", buffer, sizeof(buffer)) == 0 ||
+            read_from_file("/sys/devices/system/cpu/cpu0/cpufreq/scaling_governor", buffer, sizeof(buffer)) == 0) {
             printf("%s\n", buffer);
         } else {
             fprintf(stderr, "Error reading current governor.\n");
@@ -39,19 +49,37 @@ int main(int argc, char *argv[]) {
             return 1;
         }
         char *governor = argv[2];
-        char path[256];
-        int updated_cores = 0;
-        // Loop through a reasonable number of cores
-        for (int i = 0; i < 64; i++) {
-            snprintf(path, sizeof(path), "/sys/devices/system/cpu/cpu%d/cpufreq/scaling_governor", i);
+        char path[512];
+        int updated = 0, failed = 0;
+
+        // One write per cpufreq policy covers every CPU, however many there are.
+        DIR *d = opendir(CPUFREQ_PATH);
+        if (d == NULL) {
+            perror("Failed to open " CPUFREQ_PATH);
+            return 1;
+        }
+        struct dirent *entry;
+        while ((entry = readdir(d)) != NULL) {
+            if (!is_policy(entry->d_name)) {
+                continue;
+            }
+            snprintf(path, sizeof(path), "%s%s/scaling_governor", CPUFREQ_PATH, entry->d_name);
             if (write_to_file(path, governor) == 0) {
-                updated_cores++;
+                updated++;
+            } else {
+                fprintf(stderr, "Failed to set governor on %s\n", entry->d_name);
+                failed++;
             }
         }
-        printf("Set governor to '%s' for %d cores.\n", governor, updated_cores);
+        closedir(d);
+
+        printf("Set governor to '%s' for %d policies.\n", governor, updated);
+        if (updated == 0 || failed > 0) {
+            return 1;
+        }
     } else {
         fprintf(stderr, "Invalid command.\n");
         return 1;
     }
     return 0;
-}
\ No newline at end of file
+}
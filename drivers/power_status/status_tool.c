@@ -1,39 +1,69 @@
 #include <stdio.h>
 #include <string.h>
-#include <unistd.h> // For access()
+#include <dirent.h>
 
-// Find the first available AC adapter and read its 'online' status
+#define SUPPLY_DIR "/sys/class/power_supply"
+
+// Read the first line of <SUPPLY_DIR>/<name>/<attribute> into buf (newline stripped)
+static int read_attribute(const char *name, const char *attribute, char *buf, size_t len) {
+    char path[512];
+    snprintf(path, sizeof(path), "%s/%s/%s", SUPPLY_DIR, name, attribute);
+
+    FILE *fp = fopen(path, "r");
+    if (fp == NULL) {
+        return -1;
+    }
+    if (fgets(buf, (int)len, fp) == NULL) {
+        fclose(fp);
+        return -1;
+    }
+    fclose(fp);
+    buf[strcspn(buf, "\n")] = '\0';
+    return 0;
+}
+
+// Walk every power supply: online if any system adapter (Mains, USB, USB-C PD,
+// ...) reports online=1; without adapters, fall back to the battery status
 int main() {
-    char path[256];
-    char *common_paths[] = {
-        "/sys/class/power_supply/AC/online",
-        "/sys/class/power_supply/AC0/online",
-        "/sys/class/power_supply/ACAD/online",
-        "/sys/class/power_supply/ADP1/online",
-        NULL
-    };
-
-    FILE *fp = NULL;
-    for (int i = 0; common_paths[i] != NULL; i++) {
-        if (access(common_paths[i], R_OK) == 0) {
-            fp = fopen(common_paths[i], "r");
-            break;
+    DIR *dir = opendir(SUPPLY_DIR);
+    if (dir == NULL) {
+        perror("Error: Could not open " SUPPLY_DIR);
+        return 1;
+    }
+
+    int adapters = 0, online = 0, batteries = 0, discharging = 0;
+    char type[64], value[64];
+    struct dirent *entry;
+    while ((entry = readdir(dir)) != NULL) {
+        if (entry->d_name[0] == '.') continue;
+        if (read_attribute(entry->d_name, "type", type, sizeof(type)) != 0) continue;
+        // Peripheral batteries (mice, keyboards) do not power the system
+        if (read_attribute(entry->d_name, "scope", value, sizeof(value)) == 0 && strcmp(value, "Device") == 0) continue;
+
+        if (strcmp(type, "Battery") == 0) {
+            batteries++;
+            if (read_attribute(entry->d_name, "status", value, sizeof(value)) == 0 && strcmp(value, "Discharging") == 0) {
+                discharging++;
+            }
+        } else if (read_attribute(entry->d_name, "online", value, sizeof(value)) == 0) {
+            adapters++;
+            if (strcmp(value, "0") != 0) online = 1;
         }
     }
+    closedir(dir);
 
-    if (fp == NULL) {
-        fprintf(stderr, "Error: Could not find AC power supply.\n");
+    if (adapters == 0 && batteries == 0) {
+        fprintf(stderr, "Error: Could not find any power supply.\n");
         return 1;
     }
+    if (adapters == 0) {
+        online = discharging == 0;
+    }
 
-    int status = 0;
-    fscanf(fp, "%d", &status);
-    fclose(fp);
-
-    if (status == 1) {
+    if (online) {
         printf("online\n");
     } else {
         printf("offline\n");
     }
     return 0;
-}
\ No newline at end of file
+}
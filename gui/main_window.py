@@ -1,6 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
+import queue
+
+from core.estimator import format_duration
+from core.sampler import Sampler
+from core.upower import CRITICAL_POWER_ACTIONS
+from gui.startup import StartupProbes
 
 # ------------------------------
 # --- IMPROVED APPLICATION GUI ---
@@ -10,9 +16,30 @@ class ApplicationGUI:
     Modernized Tkinter GUI for the Linux Power Manager
     """
 
-    def __init__(self, root, app_logic):
+    def __init__(self, root, app_logic, sampler=None, show_startup_timing=False):
         self.root = root
         self.logic = app_logic
+        self.show_startup_timing = show_startup_timing
+        # Initial state is probed concurrently; widgets start with placeholders.
+        self._probes = StartupProbes({
+            "brightness": app_logic.get_brightness,
+            "governor": app_logic.get_cpu_governor,
+            "wifi": app_logic.get_wifi_status,
+            "bluetooth": app_logic.get_bluetooth_status,
+            "usb": app_logic.get_usb_devices,
+            "upower": app_logic.get_upower_config,
+        })
+        self._probes.start()
+        self._updating_widgets = False
+        # Hardware is read on the sampler thread; the Tk thread only renders snapshots.
+        if sampler is None:
+            sampler = Sampler(app_logic)
+            app_logic.attach_sampler(sampler)
+        self.sampler = sampler
+        self._ui_queue = queue.Queue()
+        self._mainloop_running = False
+        self._timing_reported = False
+        self.root.bind("<<UiCallback>>", self._drain_ui_queue)
         self.root.title("⚡ Linux Power Manager")
         self.root.geometry("900x600")
         self.root.minsize(700, 500)
@@ -49,12 +76,15 @@ class ApplicationGUI:
         self.frames["UPower"] = ttk.LabelFrame(self.main_area, text="UPower Shutdown Config")
         self.frames["Profiles"] = ttk.LabelFrame(self.main_area, text="Settings Profiles")
 
-        # Populate frames
-        self._create_hardware_controls(self.frames["Hardware"])
-        self._create_connectivity_controls(self.frames["Connectivity"])
-        self._create_usb_controls(self.frames["USB"])
-        self._create_upower_controls(self.frames["UPower"])
-        self._create_profile_controls(self.frames["Profiles"])
+        # Frames are populated lazily, the first time each one is shown
+        self._frame_builders = {
+            "Hardware": self._create_hardware_controls,
+            "Connectivity": self._create_connectivity_controls,
+            "USB": self._create_usb_controls,
+            "UPower": self._create_upower_controls,
+            "Profiles": self._create_profile_controls,
+        }
+        self._built_frames = set()
 
         # --- Sidebar Navigation ---
         ttk.Label(self.sidebar, text="⚡ Control Panels", font=("Segoe UI", 11, "bold")).pack(pady=5)
@@ -71,21 +101,87 @@ class ApplicationGUI:
 
         # Show initial frame
         self._show_frame("Hardware")
+        self._probes.mark("widgets built")
+        for name in ("brightness", "governor", "wifi", "bluetooth", "usb", "upower"):
+            self._probes.on_done(name, lambda value, n=name: self._post_to_ui(self._on_probe_done, n, value))
+
+        # --- Snapshot Rendering ---
+        self.sampler.subscribe(lambda snap: self._post_to_ui(self._render_snapshot, snap))
+        self.sampler.start()
+        # AC transitions arrive as kernel uevents instead of being polled for.
+        self.logic.watch_power_status(self._on_power_event)
+        # Radio toggles (including hardware kill switches) come from /dev/rfkill.
+        self.logic.watch_radios(lambda kind, enabled: self._post_to_ui(self._on_radio_event, kind, enabled))
 
-        # --- Power Loop ---
-        self.last_power_status = self.logic.get_power_status()
-        self._check_power_loop()
-        self._update_status_bar()
+    # -----------------------------
+    # --- THREAD HAND-OFF ---
+    # -----------------------------
+    def _post_to_ui(self, fn, *args):
+        """Schedule fn(*args) on the Tk thread; safe to call from any thread."""
+        self._ui_queue.put((fn, args))
+        if not self._mainloop_running:
+            return  # drained once the mainloop starts
+        try:
+            self.root.event_generate("<<UiCallback>>", when="tail")
+        except (RuntimeError, tk.TclError):
+            pass  # shutting down
+
+    def _drain_ui_queue(self, event=None):
+        while True:
+            try:
+                fn, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                return
+            fn(*args)
 
     # -----------------------------
     # --- NAVIGATION & TOOLTIP ---
     # -----------------------------
     def _show_frame(self, name):
         """Switch between sections dynamically."""
+        if name not in self._built_frames:
+            self._built_frames.add(name)
+            self._frame_builders[name](self.frames[name])
         for f in self.frames.values():
             f.pack_forget()
         self.frames[name].pack(expand=True, fill="both", padx=15, pady=10)
 
+    def _rebuild_frame(self, name):
+        """Re-create a frame's widgets if it has been built already."""
+        if name in self._built_frames:
+            frame = self.frames[name]
+            for child in frame.winfo_children():
+                child.destroy()
+            self._frame_builders[name](frame)
+
+    # -----------------------------
+    # --- STARTUP PROBES ---
+    # -----------------------------
+    def _on_probe_done(self, name, value):
+        """Fill in a built frame once its probe finishes (Tk thread)."""
+        self._updating_widgets = True
+        try:
+            if name == "brightness" and "Hardware" in self._built_frames:
+                self.brightness_slider.set(value or 80)
+            elif name == "governor" and "Hardware" in self._built_frames:
+                self.governor_var.set(value)
+            elif name in ("wifi", "bluetooth") and "Connectivity" in self._built_frames:
+                self._load_connectivity_state()
+            elif name == "usb":
+                self._rebuild_frame("USB")
+            elif name == "upower" and "UPower" in self._built_frames:
+                for key, var in self.upower_vars.items():
+                    var.set((value or {}).get(key, "N/A"))
+        finally:
+            self._updating_widgets = False
+        self._maybe_report_startup()
+
+    def _maybe_report_startup(self):
+        """Print the startup breakdown once the window is up and every probe is in."""
+        if self.show_startup_timing and not self._timing_reported and self._mainloop_running and self._probes.all_done():
+            self._timing_reported = True
+            print(self._probes.report())
+
     def _tooltip(self, widget, text):
         """Lightweight tooltip hover helper."""
         tip = tk.Toplevel(widget)
@@ -107,16 +203,19 @@ class ApplicationGUI:
     def _create_hardware_controls(self, frame):
         ttk.Label(frame, text="Screen Brightness:").grid(row=0, column=0, sticky="w", pady=5)
         self.brightness_slider = ttk.Scale(frame, from_=0, to=100, orient="horizontal", command=self._on_brightness_change)
-        self.brightness_slider.set(self.logic.get_brightness() or 80)
+        self._updating_widgets = True
+        self.brightness_slider.set(self._probes.result("brightness") or 80)
+        self._updating_widgets = False
         self.brightness_slider.grid(row=0, column=1, sticky="ew", padx=5)
 
         ttk.Label(frame, text="CPU Governor:").grid(row=1, column=0, sticky="w", pady=5)
         self.governor_options = ["powersave", "schedutil", "performance"]
-        self.governor_var = tk.StringVar(value=self.logic.get_cpu_governor())
+        self.governor_var = tk.StringVar(value=self._probes.result("governor") or "schedutil")
         gov_menu = ttk.OptionMenu(frame, self.governor_var, self.governor_var.get(), *self.governor_options, command=self._on_governor_change)
         gov_menu.grid(row=1, column=1, sticky="ew", padx=5)
 
-        ttk.Label(frame, text="Fan Speed (N/A):").grid(row=2, column=0, sticky="w", pady=5)
+        self.fan_label = ttk.Label(frame, text="Fan Speed (N/A):")
+        self.fan_label.grid(row=2, column=0, sticky="w", pady=5)
         self.fan_slider = ttk.Scale(frame, from_=0, to=100, orient="horizontal")
         self.fan_slider.set(50)
         self.fan_slider.state(['disabled'])
@@ -129,20 +228,33 @@ class ApplicationGUI:
     # -----------------------------
     
     def _create_connectivity_controls(self, frame):
-        self.wifi_var = tk.BooleanVar(value=self.logic.get_wifi_status())
-        wifi_check = ttk.Checkbutton(frame, text="Enable Wi-Fi", variable=self.wifi_var, command=self._toggle_wifi)
-        wifi_check.pack(side="left", padx=20, expand=True)
-        self._tooltip(wifi_check, "Toggle wireless connectivity")
-
-        self.bt_var = tk.BooleanVar(value=self.logic.get_bluetooth_status())
-        bt_check = ttk.Checkbutton(frame, text="Enable Bluetooth", variable=self.bt_var, command=self._toggle_bluetooth)
-        bt_check.pack(side="left", padx=20, expand=True)
-        self._tooltip(bt_check, "Enable or disable Bluetooth adapter")
+        self.wifi_var = tk.BooleanVar(value=False)
+        self.wifi_check = ttk.Checkbutton(frame, text="Enable Wi-Fi", variable=self.wifi_var, command=self._toggle_wifi)
+        self.wifi_check.pack(side="left", padx=20, expand=True)
+        self._tooltip(self.wifi_check, "Toggle wireless connectivity")
+
+        self.bt_var = tk.BooleanVar(value=False)
+        self.bt_check = ttk.Checkbutton(frame, text="Enable Bluetooth", variable=self.bt_var, command=self._toggle_bluetooth)
+        self.bt_check.pack(side="left", padx=20, expand=True)
+        self._tooltip(self.bt_check, "Enable or disable Bluetooth adapter")
+        self._load_connectivity_state()
+
+    def _load_connectivity_state(self):
+        """Show probed radio state; keep a checkbox disabled until its probe is in."""
+        for key, var, check in (("wifi", self.wifi_var, self.wifi_check), ("bluetooth", self.bt_var, self.bt_check)):
+            if self._probes.done(key):
+                var.set(bool(self._probes.result(key)))
+                check.state(["!disabled"])
+            else:
+                check.state(["disabled"])
 
     # -----------------------------
     # --- USB CONTROLS ---
     # -----------------------------
     def _create_usb_controls(self, frame):
+        if not self._probes.done("usb"):
+            ttk.Label(frame, text="Scanning USB devices...").pack()
+            return
         devices = self.logic.get_usb_devices()
         if not devices:
             ttk.Label(frame, text="No controllable USB devices detected.").pack()
@@ -169,16 +281,20 @@ class ApplicationGUI:
                 command=lambda d=device['path']: self._disable_autosuspend_selected(d)
             ).pack(side="left", padx=5)
 
-        ttk.Button(frame, text="🔄 Refresh", command=self._refresh_usb_status).pack(pady=10)
+        bulk = ttk.Frame(frame)
+        bulk.pack(pady=10)
+        ttk.Button(bulk, text="Enable All", command=lambda: self._set_all_autosuspend(True)).pack(side="left", padx=5)
+        ttk.Button(bulk, text="Disable All", command=lambda: self._set_all_autosuspend(False)).pack(side="left", padx=5)
+        ttk.Button(bulk, text="🔄 Refresh", command=self._rescan_usb).pack(side="left", padx=5)
 
     # -----------------------------
     # --- UPOWER CONFIG ---
     # -----------------------------
     def _create_upower_controls(self, frame):
-        config = self.logic.get_upower_config()
+        config = self._probes.result("upower") or {}
         self.upower_vars = {}
         keys = ['PercentageLow', 'PercentageCritical', 'PercentageAction', 'CriticalPowerAction']
-        actions = ["HybridSleep", "Hibernate", "PowerOff", "Suspend", "None"]
+        actions = list(CRITICAL_POWER_ACTIONS)
 
         for i, key in enumerate(keys):
             ttk.Label(frame, text=f"{key}:").grid(row=i, column=0, sticky="w", pady=5)
@@ -212,8 +328,10 @@ class ApplicationGUI:
     # -----------------------------
     # --- CALLBACKS ---
     # -----------------------------
-    def _on_brightness_change(self, value): self.logic.set_brightness(int(float(value)))
-    def _on_governor_change(self, val): self.logic.set_cpu_governor(val)
+    def _on_brightness_change(self, value):
+        if not self._updating_widgets:
+            self.logic.submit_setting("brightness", int(float(value)))
+    def _on_governor_change(self, val): self.logic.submit_setting("governor", val)
     def _toggle_wifi(self): self.logic.set_wifi_status(self.wifi_var.get())
     def _toggle_bluetooth(self): self.logic.set_bluetooth_status(self.bt_var.get())
     def _enable_autosuspend_selected(self, device_path):
@@ -225,7 +343,16 @@ class ApplicationGUI:
         self._refresh_usb_status()
 
 
+    def _set_all_autosuspend(self, enable):
+        self.logic.set_usb_autosuspend(enable)
+        self._refresh_usb_status()
+
+    def _rescan_usb(self):
+        self.logic.refresh_usb_devices()
+        self._refresh_usb_status()
+
     def _refresh_usb_status(self):
+        self._rebuild_frame("USB")
         self._show_frame("USB")
 
     def _apply_upower_settings(self):
@@ -245,8 +372,17 @@ class ApplicationGUI:
         if not name:
             messagebox.showwarning("Input Error", "Enter a profile name.")
             return
-        data = [int(self.brightness_slider.get()), int(self.fan_slider.get()), int(self.keyboard_slider.get()), self.governor_var.get()]
-        self.logic.save_settings_to_profile(name, data)
+        data = {
+            "brightness": int(self.brightness_slider.get()),
+            "fan": int(self.fan_slider.get()),
+            "keyboard": int(self.keyboard_slider.get()),
+            "governor": self.governor_var.get(),
+        }
+        try:
+            self.logic.save_settings_to_profile(name, data)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Profile not saved: {e}")
+            return
         messagebox.showinfo("Saved", f"Profile '{name}' saved.")
         self.profiles = self.logic.get_all_profiles()
 
@@ -254,45 +390,86 @@ class ApplicationGUI:
         self.apply_profile(self.selected_profile.get())
 
     def apply_profile(self, name):
-        settings = self.profiles.get(name)
-        if not settings:
+        plan = self.logic.get_profile_plan(name)
+        if plan is None:
             messagebox.showerror("Error", f"Profile '{name}' not found.")
             return
-        b, f, kb, g = settings
-        self.brightness_slider.set(b)
-        self.fan_slider.set(f)
-        self.governor_var.set(g)
-        self.logic.set_brightness(b)
-        self.logic.set_cpu_governor(g)
-        messagebox.showinfo("Loaded", f"Profile '{name}' applied.")
+        self._updating_widgets = True
+        try:
+            if plan.brightness is not None:
+                self.brightness_slider.set(plan.brightness)
+            if plan.fan is not None:
+                self.fan_slider.set(plan.fan)
+            if plan.governor:
+                self.governor_var.set(plan.governor)
+        finally:
+            self._updating_widgets = False
+        report = self.logic.apply_profile(name)
+        if report is None:
+            return
+        if not report.ok:
+            failed = ", ".join(step.knob for step in report.steps if not step.ok)
+            messagebox.showwarning("Loaded", f"Profile '{name}' applied with errors: {failed}")
+        else:
+            messagebox.showinfo("Loaded", f"Profile '{name}' applied ({report.summary()}).")
 
     # -----------------------------
     # --- STATUS & POWER CHECK ---
     # -----------------------------
-    def _update_status_bar(self):
+    def _render_snapshot(self, snap):
+        """Render one sampler snapshot. Runs on the Tk thread and does no I/O."""
+        text = f"Power: {snap.power_status.upper()} | Battery: {snap.battery_percentage}%"
+        estimate = self.logic.get_battery_estimate()
+        if estimate.time_to_empty is not None:
+            text += f" ({format_duration(estimate.time_to_empty)} left, {abs(estimate.rate_watts):.1f} W)"
+        elif estimate.time_to_full is not None:
+            text += f" ({format_duration(estimate.time_to_full)} to full)"
+        thermal = snap.get("thermal") or {}
+        if thermal.get("cpu_temp") is not None:
+            text += f" | CPU: {thermal['cpu_temp']:.0f}°C"
+        self.status_bar.config(text=text)
+        if "Hardware" in self._built_frames:
+            self._render_fans(thermal)
+
+    def _render_fans(self, thermal):
+        """Show measured fan speed (and PWM duty) next to the fan control."""
+        fans = thermal.get("fans") or {}
+        if fans:
+            reading = ", ".join(f"{rpm} RPM" for rpm in fans.values())
+        elif thermal.get("pwm"):
+            reading = ", ".join(f"{duty}% PWM" for duty in thermal["pwm"].values())
+        else:
+            reading = "N/A"
+        self.fan_label.config(text=f"Fan Speed ({reading}):")
+
+    def _on_power_event(self, status):
+        """Called on the uevent thread when the AC state flips."""
+        # The next snapshot feeds the rule engine, which switches profiles.
+        self.sampler.request_sample()
+
+    def _on_radio_event(self, kind, enabled):
+        """Reflect an rfkill state change in the connectivity checkboxes (Tk thread)."""
+        if "Connectivity" not in self._built_frames:
+            return
+        var = {"wlan": self.wifi_var, "bluetooth": self.bt_var}.get(kind)
+        if var is None:
+            return
+        self._updating_widgets = True
         try:
-            power = self.logic.get_power_status()
-            battery = self.logic.get_battery_percentage()
-            self.status_bar.config(text=f"Power: {power.upper()} | Battery: {battery}%")
-        except Exception as e:
-            self.status_bar.config(text=f"Error reading status: {e}")
-        self.root.after(5000, self._update_status_bar)
+            var.set(enabled)
+        finally:
+            self._updating_widgets = False
 
-    def _check_power_loop(self):
-        try:
-            cur = self.logic.get_power_status()
-            if cur != self.last_power_status:
-                self.last_power_status = cur
-                if cur == "online":
-                    self.logic.send_notification("AC Power", "Plugged in, applying 'Balanced'")
-                    self.apply_profile("Balanced")
-                else:
-                    self.logic.send_notification("Battery", "Unplugged, applying 'Power Saver'")
-                    self.apply_profile("Power Saver")
-        except Exception as e:
-            print(f"Power check error: {e}")
-        self.root.after(10000, self._check_power_loop)
+    def _on_first_idle(self):
+        self._probes.mark("window shown")
+        self._mainloop_running = True
+        self._drain_ui_queue()
+        self._maybe_report_startup()
 
     def run(self):
-        self.root.mainloop()
+        self.root.after_idle(self._on_first_idle)
+        try:
+            self.root.mainloop()
+        finally:
+            self.sampler.stop()
 
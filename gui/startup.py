@@ -0,0 +1,76 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class StartupProbes:
+    """
+    Runs the GUI's initial state probes concurrently on a thread pool and
+    keeps a timing breakdown of startup (probes and named phases).
+    """
+
+    def __init__(self, probes: Dict[str, Callable[[], Any]]):
+        self.t0 = time.perf_counter()
+        self._probes = probes
+        self._results: Dict[str, Any] = {}
+        self._timings: Dict[str, Tuple[float, float]] = {}  # probe -> (start, end) offsets
+        self._phases: List[Tuple[str, float]] = []
+        self._callbacks: Dict[str, List[Callable[[Any], None]]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(probes)), thread_name_prefix="startup-probe")
+
+    def start(self):
+        for name, probe in self._probes.items():
+            self._executor.submit(self._run, name, probe)
+        self._executor.shutdown(wait=False)
+
+    def _run(self, name: str, probe: Callable[[], Any]):
+        start = time.perf_counter() - self.t0
+        try:
+            value = probe()
+        except Exception as e:
+            print(f"[STARTUP ERROR] probe {name}: {e}")
+            value = None
+        end = time.perf_counter() - self.t0
+        with self._lock:
+            self._results[name] = value
+            self._timings[name] = (start, end)
+            callbacks = self._callbacks.pop(name, [])
+        for callback in callbacks:
+            callback(value)
+
+    def done(self, name: str) -> bool:
+        return name in self._results
+
+    def result(self, name: str, default: Any = None) -> Any:
+        """The probe's value if it has finished, otherwise `default`."""
+        return self._results.get(name, default)
+
+    def on_done(self, name: str, callback: Callable[[Any], None]):
+        """Call back with the probe's value (immediately if it already finished)."""
+        with self._lock:
+            if name not in self._results:
+                self._callbacks.setdefault(name, []).append(callback)
+                return
+        callback(self._results[name])
+
+    def all_done(self) -> bool:
+        return len(self._results) == len(self._probes)
+
+    def mark(self, phase: str):
+        """Record the time at which a startup phase completed."""
+        self._phases.append((phase, time.perf_counter() - self.t0))
+
+    def report(self) -> str:
+        lines = ["Startup timing (ms since start):"]
+        for phase, at in self._phases:
+            lines.append(f"  phase {phase:<20} {at * 1000:8.1f}")
+        with self._lock:
+            timings = sorted(self._timings.items(), key=lambda item: item[1][1])
+        for name, (start, end) in timings:
+            lines.append(f"  probe {name:<20} {end * 1000:8.1f}  (took {(end - start) * 1000:.1f})")
+        pending = [name for name in self._probes if name not in self._results]
+        if pending:
+            lines.append(f"  still running: {', '.join(pending)}")
+        return "\n".join(lines)
@@ -1,16 +1,70 @@
-import tkinter as tk
-from gui.main_window import ApplicationGUI
+import argparse
+import os
 from core.app import AppLogic
+from core.daemon import (DEFAULT_SESSION_USER, DEFAULT_SOCKET_GROUP, DEFAULT_SOCKET_PATH, DaemonClient, PowerDaemon,
+                         RemoteSampler)
+from core.instrumentation import metrics
+from core.profile_manager import CONFIG_DIR
 
 if __name__ == "__main__":
-    # Creates the logic controller
-    logic = AppLogic()
+    parser = argparse.ArgumentParser(description="Linux Power Manager")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="print a breakdown of GUI startup time")
+    parser.add_argument("--daemon", action="store_true",
+                        help="run headless and serve state over a Unix socket")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH,
+                        help=f"daemon socket path (default: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--socket-group", default=DEFAULT_SOCKET_GROUP,
+                        help="daemon mode: group allowed to connect to the socket (mode 0660)")
+    parser.add_argument("--session-user", default=DEFAULT_SESSION_USER,
+                        help="daemon mode: user allowed to change settings besides root "
+                             "(default: the active session's user)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="record latency/error metrics for hardware access (see also LPM_METRICS=1)")
+    parser.add_argument("--metrics-file",
+                        help="daemon mode: keep a Prometheus textfile with the metrics up to date")
+    args = parser.parse_args()
+    if args.metrics or args.metrics_file:
+        metrics.enable()
+
+    if args.daemon:
+        logic = AppLogic(telemetry_dir=os.path.join(CONFIG_DIR, "telemetry"))
+        try:
+            PowerDaemon(logic, args.socket, metrics_file=args.metrics_file, socket_group=args.socket_group,
+                        session_user=args.session_user).run()
+        except (FileExistsError, PermissionError, LookupError) as e:
+            print(f"[DAEMON] {e}")
+            raise SystemExit(1)
+        finally:
+            logic.close()
+        raise SystemExit(0)
+
+    import tkinter as tk
+    from gui.main_window import ApplicationGUI
+
+    # With a daemon running, the GUI renders its snapshots instead of sampling
+    # the hardware itself, leaves rule-driven profile switching to the daemon,
+    # and sends its writes there too.
+    sampler = None
+    if DaemonClient.available(args.socket):
+        print(f"[GUI] Using daemon at {args.socket}")
+        logic = AppLogic()
+        client = DaemonClient(args.socket)
+        sampler = RemoteSampler(client)
+        logic.attach_sampler(sampler, automation=False)
+        logic.attach_daemon(client)
+    else:
+        # Creates the logic controller
+        logic = AppLogic(telemetry_dir=os.path.join(CONFIG_DIR, "telemetry"))
 
     # Creates the GUI window
     root_window = tk.Tk()
 
     # Passes the logic controller TO the GUI
-    app_gui = ApplicationGUI(root_window, logic)
+    app_gui = ApplicationGUI(root_window, logic, sampler=sampler, show_startup_timing=args.startup_timing)
 
     # Starts the application
-    app_gui.run()
+    try:
+        app_gui.run()
+    finally:
+        logic.close()
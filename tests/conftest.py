@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_tree import build_tree  # noqa: E402
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """The synthetic sysfs/procfs tree the benchmarks run against (4 CPUs, 2 policies)."""
+    return build_tree(str(tmp_path), cpus=4, usb_devices=2, cluster_size=2)
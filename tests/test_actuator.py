@@ -0,0 +1,57 @@
+import os
+
+from core.actuator import ActuatorQueue
+from core.app import AppLogic
+from core.helper import OpResult
+
+
+def _queue(apply_fn):
+    queue = ActuatorQueue(rate_hz=0)
+    queue.register("brightness", apply_fn)
+    return queue
+
+
+def test_latest_value_wins_and_repeats_are_dropped():
+    applied = []
+    queue = _queue(applied.append)
+    try:
+        queue.submit("brightness", 10)
+        queue.flush(2.0)
+        queue.submit("brightness", 10)
+        assert queue.flush(2.0)
+        assert applied == [10]
+        assert queue.stats()["brightness"]["dropped"] == 1
+    finally:
+        queue.stop()
+
+
+def test_failed_write_is_retried():
+    attempts, outcomes = [], [False, True]
+    queue = _queue(lambda value: attempts.append(value) or outcomes.pop(0))
+    try:
+        queue.submit("brightness", 40)
+        queue.flush(2.0)
+        # The first write failed, so the same value is not "already applied".
+        queue.submit("brightness", 40)
+        queue.flush(2.0)
+        assert attempts == [40, 40]
+        counters = queue.stats()["brightness"]
+        assert (counters["errors"], counters["applied"], counters["dropped"]) == (1, 1, 0)
+    finally:
+        queue.stop()
+
+
+def test_setters_report_failed_writes(tree, tmp_path):
+    logic = AppLogic(sysfs_root=tree["sys"], upower_config_path=tree["upower"], bin_path=tree["bin"],
+                     use_sudo=False, profiles_file=os.path.join(tmp_path, "profiles.json"), proc_root=tree["proc"])
+    results = {"ok": True}
+    logic.helper.execute = lambda ops: [OpResult(ok=results["ok"], error=None if results["ok"] else "EIO") for _ in ops]
+    try:
+        assert logic.set_brightness(30)
+        assert logic.set_cpu_epp("power")
+        results["ok"] = False
+        assert not logic.set_brightness(30)
+        assert not logic.set_cpu_governor("powersave")
+        assert not logic.set_cpu_freq_limits(max_freq=2000000)
+    finally:
+        logic.close()
@@ -0,0 +1,21 @@
+import os
+
+from core.cpufreq import Cpufreq
+from core.sysfs import SysfsReader
+
+
+def test_hybrid_pmus_label_clusters(tree):
+    cpufreq = Cpufreq(SysfsReader(tree["sys"]))
+    assert cpufreq.clusters() == {"performance": ["policy0"], "efficiency": ["policy2"]}
+    assert [p.name for p in cpufreq.resolve(["efficiency"])] == ["policy2"]
+
+
+def test_favoured_cores_stay_one_cluster(tree):
+    # No hybrid PMUs; peak frequencies within a few percent (ITMT "favoured" cores).
+    for pmu in ("cpu_core", "cpu_atom"):
+        os.remove(os.path.join(tree["sys"], f"devices/{pmu}/cpus"))
+    with open(os.path.join(tree["sys"], "devices/system/cpu/cpufreq/policy2/cpuinfo_max_freq"), "w") as f:
+        f.write("4600000\n")
+    cpufreq = Cpufreq(SysfsReader(tree["sys"]))
+    assert cpufreq.clusters() == {"all": ["policy0", "policy2"]}
+    assert not cpufreq.is_heterogeneous()
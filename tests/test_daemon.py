@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core.daemon import DaemonClient, PowerDaemon, _Client, check_client_op, peer_uid
+from core.helper import OpResult, SetBrightness, SetGovernor, SetRfkill, UpdateUPowerConfig, WriteSysfs
+
+SYS = "/sys"
+
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+
+    def write(self, data):
+        self.lines.append(json.loads(data))
+
+
+class _Sampler:
+    def request_sample(self):
+        pass
+
+
+@pytest.mark.parametrize("operation", [
+    SetBrightness(40, 200),
+    SetGovernor("powersave"),
+    SetRfkill("bluetooth", True),
+    WriteSysfs("/sys/devices/system/cpu/cpufreq/policy4/energy_performance_preference", "balance_power"),
+    WriteSysfs("/sys/devices/system/cpu/cpufreq/policy0/scaling_max_freq", "2400000"),
+    WriteSysfs("/sys/bus/usb/devices/1-2.3/power/control", "auto"),
+])
+def test_allowed_ops(operation):
+    check_client_op(operation, SYS)
+
+
+@pytest.mark.parametrize("operation", [
+    WriteSysfs("/sys/kernel/uevent_helper", "/tmp/x"),
+    WriteSysfs("/sys/devices/system/cpu/cpufreq/policy0/../../../../kernel/uevent_helper", "/tmp/x"),
+    WriteSysfs("/sys/devices/system/cpu/cpufreq/policy0/scaling_governor", "performance\n/tmp/x"),
+    WriteSysfs("/sys/devices/system/cpu/cpufreq/policy0/scaling_max_freq", "fast"),
+    WriteSysfs("/sys/bus/usb/devices/1-2/power/wakeup", "enabled"),
+    WriteSysfs("/etc/passwd", "root::0:0::/:/bin/sh"),
+    UpdateUPowerConfig({"CriticalPowerAction": "Ignore"}),
+    SetBrightness(400, 0),
+    SetBrightness(50, "slow"),
+    SetGovernor("../x"),
+    SetRfkill("all", "yes"),
+])
+def test_refused_ops(operation):
+    with pytest.raises(PermissionError):
+        check_client_op(operation, SYS)
+
+
+def test_peer_uid():
+    ours, theirs = socket.socketpair()
+    with ours, theirs:
+        assert peer_uid(ours) == os.geteuid()
+    assert peer_uid(None) is None
+
+
+def _dispatch(uid, method, params=None, seat_file=None, monkeypatch=None):
+    applied = []
+    logic = SimpleNamespace(sysfs=SimpleNamespace(root=SYS), reconciler=SimpleNamespace(invalidate=lambda: None),
+                            apply_batch=lambda ops: applied.extend(ops) or [OpResult(ok=True) for _ in ops])
+    daemon = PowerDaemon(logic, "unused", sampler=_Sampler())
+    client = _Client(_Writer())
+    client.uid = uid
+
+    async def run():
+        daemon._loop = asyncio.get_running_loop()
+        await daemon._dispatch(client, json.dumps({"id": 1, "method": method, "params": params or {}}).encode())
+
+    asyncio.run(run())
+    return client.writer.lines[0], applied
+
+
+@pytest.fixture
+def seat(tmp_path, monkeypatch):
+    path = tmp_path / "seat0"
+    path.write_text("ACTIVE=c2\nACTIVE_UID=4242\n")
+    monkeypatch.setattr("core.daemon.SEAT_FILE", str(path))
+
+
+def test_session_owner_may_apply_ops(seat):
+    ops = [{"op": "set_governor", "governor": "powersave"}]
+    response, applied = _dispatch(4242, "apply_ops", {"ops": ops})
+    assert response["result"] == [{"ok": True, "value": None, "error": None}]
+    assert applied == [SetGovernor("powersave")]
+
+
+def test_other_users_may_only_read(seat):
+    response, applied = _dispatch(4343, "apply_ops", {"ops": [{"op": "set_governor", "governor": "powersave"}]})
+    assert "only allowed" in response["error"] and applied == []
+    assert _dispatch(4343, "ping")[0]["result"] == "pong"
+    assert "error" in _dispatch(None, "set_metrics")[0]
+
+
+def test_refused_op_rejects_whole_batch(seat):
+    ops = [{"op": "set_governor", "governor": "powersave"},
+           {"op": "write_sysfs", "path": "/sys/kernel/uevent_helper", "value": "/tmp/x"}]
+    response, applied = _dispatch(4242, "apply_ops", {"ops": ops})
+    assert "not allowed" in response["error"] and applied == []
+
+
+def _daemon(path):
+    return PowerDaemon(SimpleNamespace(), str(path), sampler=_Sampler())
+
+
+def test_socket_dir_is_created_private(tmp_path):
+    directory = tmp_path / "lpm"
+    _daemon(directory / "daemon.sock")._prepare_socket_dir()
+    assert os.stat(directory).st_mode & 0o777 == 0o750
+
+
+def test_world_writable_socket_dir_is_refused(tmp_path):
+    directory = tmp_path / "shared"
+    directory.mkdir()
+    os.chmod(directory, 0o1777)
+    with pytest.raises(PermissionError):
+        _daemon(directory / "daemon.sock")._prepare_socket_dir()
+
+
+def test_socket_dir_of_another_user_is_refused(tmp_path, monkeypatch):
+    monkeypatch.setattr("os.geteuid", lambda: 4242)
+    with pytest.raises(PermissionError):
+        _daemon(tmp_path / "daemon.sock")._prepare_socket_dir()
+
+
+def test_client_fails_pending_calls_on_garbage(tmp_path):
+    path = str(tmp_path / "daemon.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+
+    def answer_with_garbage():
+        connection, _ = server.accept()
+        with connection:
+            connection.recv(4096)
+            connection.sendall(b'{"id": 1, "resu\n')
+            time.sleep(5)
+
+    threading.Thread(target=answer_with_garbage, daemon=True).start()
+    client = DaemonClient(path, timeout=5.0)
+    started = time.monotonic()
+    with pytest.raises(ConnectionError):
+        client.request("ping")
+    assert time.monotonic() - started < 2.0
+    with pytest.raises(ConnectionError):
+        client.request("ping")
+    server.close()
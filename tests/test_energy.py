@@ -0,0 +1,41 @@
+from core.energy import EnergyMeter, counter_delta
+from core.sysfs import SysfsReader
+
+
+def test_counter_delta():
+    assert counter_delta(100, 250, None) == 150
+    assert counter_delta(900, 100, 1000) == 200
+    assert counter_delta(900, 100, None) is None
+
+
+def _reading(timestamp, uj):
+    return {"timestamp": timestamp, "rapl_uj": {"package-0": uj}, "battery_watts": None}
+
+
+def test_account_attributes_intervals(tree):
+    meter = EnergyMeter(SysfsReader(tree["sys"]))
+    assert [d.key for d in meter.domains()] == ["package-0", "package-0/core"]
+    assert meter.account(_reading(100.0, 0), "Balanced") == {}
+    assert meter.account(_reading(110.0, 50_000_000), "Balanced") == {"package-0": 5.0}
+    assert meter.report()["Balanced"]["seconds"] == 10.0
+
+
+def test_stale_reading_is_not_double_counted(tree):
+    meter = EnergyMeter(SysfsReader(tree["sys"]))
+    meter.account(_reading(100.0, 0), "Balanced")
+    newer, older = _reading(110.0, 10_000_000), _reading(105.0, 5_000_000)
+    meter.account(newer, "Balanced")
+    # A reading taken before `newer` but accounted after it is dropped.
+    assert meter.account(older, "Balanced") == {}
+    meter.account(_reading(120.0, 20_000_000), "Balanced")
+    assert meter.report()["Balanced"]["seconds"] == 20.0
+
+
+def test_interval_spanning_suspend_is_not_attributed(tree, monkeypatch):
+    meter = EnergyMeter(SysfsReader(tree["sys"]))
+    boottime = iter([1000.0, 1005.0, 1005.0 + 3600])   # an hour asleep before the last reading
+    monkeypatch.setattr("core.energy.time.clock_gettime", lambda clock: next(boottime))
+    assert meter.account(meter.read(), "Balanced") == {}
+    meter.account(meter.read(), "Balanced")
+    assert meter.account(meter.read(), "Balanced") == {}
+    assert meter.report()["Balanced"]["seconds"] == 5.0
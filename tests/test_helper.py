@@ -0,0 +1,101 @@
+import os
+import sys
+
+from core.helper import (HelperClient, HelperServer, OpResult, SetGovernor, SetRfkill, WriteSysfs,
+                         decode_op, encode_op)
+
+from conftest import ROOT
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read().strip()
+
+
+def test_op_round_trip():
+    for op in (SetGovernor("performance"), WriteSysfs("/sys/x", "auto"), SetRfkill("wlan", True)):
+        assert decode_op(encode_op(op)) == op
+
+
+def test_server_applies_batch_in_order(tree):
+    server = HelperServer(tree["sys"], restart_upower=False)
+    policy = os.path.join(tree["sys"], "devices/system/cpu/cpufreq/policy0/energy_performance_preference")
+    response = server.handle({"id": 7, "ops": [
+        encode_op(SetGovernor("performance")),
+        encode_op(WriteSysfs(policy, "power")),
+        {"op": "reboot"},
+    ]})
+    assert response["id"] == 7
+    ok, written, unknown = response["results"]
+    assert ok == {"ok": True, "value": 2, "error": None}
+    assert written["ok"] and _read(policy) == "power"
+    assert not unknown["ok"] and "unknown operation" in unknown["error"]
+    assert _read(os.path.join(tree["sys"], "devices/system/cpu/cpufreq/policy2/scaling_governor")) == "performance"
+
+
+def test_server_refuses_paths_outside_sysfs(tree, tmp_path):
+    outside = tmp_path / "outside"
+    outside.write_text("keep\n")
+    result = HelperServer(tree["sys"]).apply(WriteSysfs(str(outside), "x"))
+    assert not result.ok and "refusing" in result.error
+    assert outside.read_text() == "keep\n"
+
+
+def _client(tree, **kwargs):
+    return HelperClient(ROOT, sysfs_root=tree["sys"], use_sudo=False, upower_config_path=tree["upower"], **kwargs)
+
+
+def test_client_round_trip(tree):
+    client = _client(tree)
+    try:
+        results = client.execute([SetRfkill("bluetooth", True), SetRfkill("nfc", True)])
+        assert results[0] == OpResult(ok=True, value=1)
+        assert not results[1].ok
+        assert _read(os.path.join(tree["sys"], "class/rfkill/rfkill0/soft")) == "1"
+        # The same process serves the next batch.
+        process = client._process
+        assert client.execute([SetGovernor("schedutil")])[0].ok
+        assert client._process is process
+    finally:
+        client.close()
+
+
+class ScriptedHelper(HelperClient):
+    """A helper that ignores requests and prints `script` instead."""
+
+    def __init__(self, tree, script):
+        super().__init__(ROOT, sysfs_root=tree["sys"], use_sudo=False)
+        self.script = script
+
+    def _command(self):
+        return [sys.executable, "-c", self.script]
+
+
+def test_client_drops_helper_on_garbage(tree):
+    client = ScriptedHelper(tree, "import sys; sys.stdin.readline(); print('Traceback: oops', flush=True); "
+                                  "sys.stdin.readline()")
+    try:
+        assert client.execute([SetGovernor("powersave")]) is None
+        assert client._process is None
+    finally:
+        client.close()
+
+
+def test_client_rejects_mismatched_response(tree):
+    client = ScriptedHelper(tree, "import sys; sys.stdin.readline(); "
+                                  "print('{\"id\": 99, \"results\": [{\"ok\": true}]}', flush=True); "
+                                  "sys.stdin.readline()")
+    try:
+        assert client.execute([SetGovernor("powersave")]) is None
+        assert client._process is None
+    finally:
+        client.close()
+
+
+def test_client_times_out_on_silent_helper(tree, monkeypatch):
+    monkeypatch.setattr("core.helper.STARTUP_TIMEOUT", 0.2)
+    client = ScriptedHelper(tree, "import sys, time; sys.stdin.readline(); time.sleep(30)")
+    try:
+        assert client.execute([SetGovernor("powersave")]) is None
+    finally:
+        client.close()
@@ -0,0 +1,99 @@
+import os
+
+from core.cpufreq import Cpufreq
+from core.helper import HelperServer, OpResult
+from core.load_governor import CpuStatReader, LoadGovernor
+from core.sysfs import SysfsReader
+
+
+def _write_stat(proc_root, rows):
+    lines = ["cpu  " + " ".join(str(sum(col)) for col in zip(*rows))]
+    lines += [f"cpu{i} " + " ".join(map(str, row)) for i, row in enumerate(rows)]
+    lines += ["intr 123456 " + " ".join(["0"] * 2000), "ctxt 999", "btime 1700000000"]
+    with open(os.path.join(proc_root, "stat"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _row(busy, idle):
+    # user nice system idle iowait irq softirq steal guest guest_nice
+    return [busy, 0, 0, idle, 0, 0, 0, 0, 0, 0]
+
+
+def test_sample_fractions(tree):
+    reader = CpuStatReader(tree["proc"])
+    try:
+        _write_stat(tree["proc"], [_row(100, 100), _row(100, 100)])
+        assert list(reader.sample()) == [0.0, 0.0]
+        _write_stat(tree["proc"], [_row(175, 125), _row(100, 200)])
+        assert list(reader.sample()) == [0.75, 0.0]
+    finally:
+        reader.close()
+
+
+def test_sample_grows_read_size(tree, monkeypatch):
+    monkeypatch.setattr("core.load_governor.INITIAL_READ_SIZE", 16)
+    reader = CpuStatReader(tree["proc"])
+    try:
+        _write_stat(tree["proc"], [_row(100, 100)] * 4)
+        assert len(reader.sample()) == 4
+    finally:
+        reader.close()
+
+
+def test_sample_sparse_cpu_ids(tree):
+    with open(os.path.join(tree["proc"], "stat"), "w") as f:
+        f.write("cpu  0 0 0 0 0 0 0 0\ncpu0 0 0 0 0 0 0 0 0\ncpu3 0 0 0 0 0 0 0 0\nintr 0\n")
+    reader = CpuStatReader(tree["proc"])
+    try:
+        assert len(reader.sample()) == 4
+    finally:
+        reader.close()
+
+
+def _governor(tree, fail=False):
+    sysfs = SysfsReader(tree["sys"])
+    server = HelperServer(tree["sys"])
+
+    def apply(ops):
+        if fail:
+            return [OpResult(ok=False, error="Device or resource busy") for _ in ops]
+        return [server.apply(op) for op in ops]
+
+    return LoadGovernor(Cpufreq(sysfs), apply, proc_root=tree["proc"], down_samples=1)
+
+
+def _epp(tree, policy):
+    with open(os.path.join(tree["sys"], "devices/system/cpu/cpufreq", policy, "energy_performance_preference")) as f:
+        return f.read().strip()
+
+
+def _set_epp(tree, policy, value):
+    with open(os.path.join(tree["sys"], "devices/system/cpu/cpufreq", policy, "energy_performance_preference"), "w") as f:
+        f.write(value)
+
+
+def test_switches_and_restores_only_own_writes(tree):
+    # The fake tree starts at balance_performance, i.e. the "high" level.
+    governor = _governor(tree)
+    _write_stat(tree["proc"], [_row(100, 100)] * 4)
+    assert governor.tick() == 2
+    assert _epp(tree, "policy0") == _epp(tree, "policy2") == "balance_power"
+    _write_stat(tree["proc"], [_row(500, 100), _row(100, 500), _row(100, 500), _row(100, 500)])
+    assert governor.tick() == 0          # one busy sample only smooths to 0.5
+    _write_stat(tree["proc"], [_row(900, 100), _row(100, 900), _row(100, 900), _row(100, 900)])
+    assert governor.tick() == 1
+    assert {p.policy: p.level for p in governor.policies()} == {"policy0": "high", "policy2": "low"}
+    # A profile switch changes policy2 behind the governor's back.
+    _set_epp(tree, "policy2", "power")
+    governor.stop()
+    assert _epp(tree, "policy0") == "balance_performance"
+    assert _epp(tree, "policy2") == "power"
+
+
+def test_failed_write_keeps_level(tree):
+    governor = _governor(tree, fail=True)
+    _write_stat(tree["proc"], [_row(100, 100)] * 4)
+    assert governor.tick() == 0
+    assert {p.level for p in governor.policies()} == {"high"}
+    assert governor.stats()["failed_writes"] == 2
+    governor.stop()
@@ -0,0 +1,45 @@
+from core.power_supply import PowerSupplies, aggregate, parse_uevent, supply_from_uevent
+from core.sysfs import SysfsReader
+
+
+def _supply(name, **values):
+    return supply_from_uevent(name, {k: str(v) for k, v in values.items()})
+
+
+def test_parse_uevent_strips_prefix():
+    values = parse_uevent("POWER_SUPPLY_NAME=BAT0\nPOWER_SUPPLY_ENERGY_NOW=1000\nDEVTYPE=x\ngarbage\n")
+    assert values == {"name": "BAT0", "energy_now": "1000"}
+
+
+def test_charge_reporting_battery_is_converted_to_energy():
+    battery = _supply("BAT1", type="Battery", charge_now=2_000_000, charge_full=4_000_000,
+                      voltage_min_design=11_000_000, current_now=-1_000_000, voltage_now=12_000_000)
+    assert battery.energy_now == 22_000_000
+    assert battery.energy_full == 44_000_000
+    assert battery.power_now == 12_000_000
+
+
+def test_aggregate_weights_by_energy():
+    big = _supply("BAT0", type="Battery", present=1, capacity=90, energy_now=45_000_000, energy_full=50_000_000)
+    small = _supply("BAT1", type="Battery", present=1, capacity=10, energy_now=1_000_000, energy_full=10_000_000)
+    mouse = _supply("hidpp_battery_0", type="Battery", scope="Device", capacity=5)
+    ac = _supply("AC", type="Mains", online=0)
+    state = aggregate((big, small, mouse, ac), 0.0)
+    assert abs(state.percentage - 46 / 60 * 100) < 1e-9
+    assert state.energy_full == 60_000_000
+    assert state.ac_online is False
+    assert [b.name for b in state.batteries] == ["BAT0", "BAT1"]
+
+
+def test_aggregate_falls_back_to_capacity():
+    a = _supply("BAT0", type="Battery", capacity=80)
+    b = _supply("BAT1", type="Battery", capacity=40)
+    assert aggregate((a, b), 0.0).percentage == 60
+    assert aggregate((), 0.0).ac_online is None
+
+
+def test_reads_fake_tree(tree):
+    state = PowerSupplies(SysfsReader(tree["sys"])).read()
+    assert state.ac_online is True
+    assert state.percentage == 76
+    assert state.power_now == 9_500_000
@@ -0,0 +1,28 @@
+from core.procstat import ProcessSampler, parse_stat
+
+
+def test_parse_stat():
+    line = b"42 (worker) S 1 42 42 0 -1 4194560 100 0 0 0 30 12 0 0 20 0 1 0 5000 12345678 1234"
+    assert parse_stat(line) == ("worker", 42, 5000)
+
+
+def test_parse_stat_comm_with_parentheses_and_spaces():
+    line = b"7 (a) (b c)) R 1 7 7 0 -1 0 0 0 0 0 3 4 0 0 20 0 1 0 99 0 0"
+    assert parse_stat(line) == ("a) (b c)", 7, 99)
+
+
+def test_parse_stat_malformed():
+    assert parse_stat(b"7 no-comm") is None
+    assert parse_stat(b"7 (short) R 1 2") is None
+    assert parse_stat(b"7 (bad) R 1 7 7 0 -1 0 0 0 0 0 x y 0 0 20 0 1 0 99") is None
+
+
+def test_sampler_tracks_fake_processes(tmp_path):
+    from benchmarks.fake_tree import build_tree
+    paths = build_tree(str(tmp_path), cpus=2, usb_devices=0, processes=5)
+    sampler = ProcessSampler(paths["proc"])
+    try:
+        sampler.sample()
+        assert sampler.tracked() == 5
+    finally:
+        sampler.close()
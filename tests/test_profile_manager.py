@@ -0,0 +1,47 @@
+import json
+import os
+
+import pytest
+
+from core.profile_manager import ProfileManager, migrate
+
+
+@pytest.mark.parametrize("document", [[], "profiles", {"version": 2, "profiles": ["Balanced"]},
+                                      {"version": "2", "profiles": {}}, {"version": None, "profiles": {}}])
+def test_migrate_rejects_non_mappings(document):
+    with pytest.raises(ValueError):
+        migrate(document)
+
+
+def test_save_keeps_file_mode(tmp_path):
+    path = tmp_path / "profiles.json"
+    manager = ProfileManager(str(path))
+    manager.save_profile("Quiet", {"governor": "powersave"})
+    os.chmod(path, 0o600)
+    manager.save_profile("Loud", {"governor": "performance"})
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert set(json.loads(path.read_text())["profiles"]) >= {"Quiet", "Loud"}
+
+
+@pytest.mark.parametrize("text", ["{not json", '{"version": 99, "profiles": {"Old": {}}}'])
+def test_unreadable_file_is_never_overwritten(tmp_path, text):
+    path = tmp_path / "profiles.json"
+    path.write_text(text)
+    manager = ProfileManager(str(path))
+    assert manager.get_profiles() == {}
+    with pytest.raises(ValueError):
+        manager.save_profile("New", {"governor": "powersave"})
+    assert path.read_text() == text
+    # Saving works again once the file is repaired.
+    path.write_text('{"version": 2, "profiles": {"Old": {"governor": "performance"}}}')
+    manager.save_profile("New", {"governor": "powersave"})
+    assert set(manager.get_profiles()) == {"Old", "New"}
+
+
+def test_invalid_profiles_survive_a_save(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text('{"version": 2, "profiles": {"Broken": {"governor": ""}}}')
+    manager = ProfileManager(str(path))
+    assert manager.get_profiles() == {}
+    manager.save_profile("New", {"governor": "powersave"})
+    assert set(json.loads(path.read_text())["profiles"]) == {"Broken", "New"}
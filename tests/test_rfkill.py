@@ -0,0 +1,40 @@
+import os
+
+from core.rfkill import EVENT_SIZE, OP_CHANGE_ALL, Rfkill, pack_event, unpack_event
+from core.sysfs import SysfsReader
+
+
+def _rfkill(tree, tmp_path):
+    device = tmp_path / "rfkill"
+    device.write_bytes(b"")
+    return Rfkill(SysfsReader(tree["sys"]), str(device)), device
+
+
+def test_event_round_trip():
+    event = unpack_event(pack_event("bluetooth", OP_CHANGE_ALL, True, index=3) + b"\0\0\0\0")
+    assert (event.index, event.kind, event.op, event.soft, event.hard) == (3, "bluetooth", OP_CHANGE_ALL, True, False)
+    assert unpack_event(b"\0" * (EVENT_SIZE - 1)) is None
+
+
+def test_set_blocked_writes_change_all(tree, tmp_path):
+    rfkill, device = _rfkill(tree, tmp_path)
+    assert rfkill.set_blocked("wlan", True)
+    assert unpack_event(device.read_bytes()).kind == "wlan"
+
+
+def test_set_blocked_without_such_radio(tree, tmp_path):
+    rfkill, device = _rfkill(tree, tmp_path)
+    assert rfkill.enabled("nfc") is None
+    assert not rfkill.set_blocked("nfc", True)
+    assert device.read_bytes() == b""
+
+
+def test_hotplugged_radio_is_found(tree, tmp_path):
+    rfkill, device = _rfkill(tree, tmp_path)
+    assert rfkill.enabled("wwan") is None
+    radio = os.path.join(tree["sys"], "class/rfkill/rfkill2")
+    os.makedirs(radio)
+    for attribute, value in {"type": "wwan", "name": "modem", "soft": 0, "hard": 0}.items():
+        with open(os.path.join(radio, attribute), "w") as f:
+            f.write(f"{value}\n")
+    assert rfkill.set_blocked("wwan", True)
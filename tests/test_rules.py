@@ -0,0 +1,100 @@
+import pytest
+
+from core.rules import RuleEngine, compile_conditions
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize("when", [{}, {"humidity": {"below": 3}}, {"battery": 20}, {"battery": {"hysteresis": 5}}])
+def test_compile_rejects(when):
+    with pytest.raises(ValueError):
+        compile_conditions(when)
+
+
+def test_threshold_hysteresis():
+    condition, = compile_conditions({"battery": {"below": 25, "hysteresis": 5}})
+    assert condition.test(24, False)
+    assert not condition.test(27, False)
+    assert condition.test(27, True)        # stays active until 30
+    assert not condition.test(31, True)
+
+
+def _engine(clock, switches, min_dwell=0.0):
+    specs = [
+        {"name": "on-ac", "profile": "Balanced", "when": {"ac": True}},
+        {"name": "low", "profile": "Power Saver", "priority": 10, "dwell": 30,
+         "when": {"battery": {"below": 20}}},
+    ]
+    return RuleEngine(specs, lambda profile, rule: switches.append(profile), min_dwell=min_dwell, clock=clock)
+
+
+def test_first_update_adopts_without_switching():
+    clock, switches = Clock(), []
+    engine = _engine(clock, switches)
+    assert engine.update({"ac": True, "battery": 80}).name == "on-ac"
+    assert switches == []
+
+
+def test_dwell_delays_switch():
+    clock, switches = Clock(), []
+    engine = _engine(clock, switches)
+    engine.update({"ac": True, "battery": 80})
+    engine.update({"battery": 15})
+    assert switches == []
+    clock.now += 29
+    engine.update({})
+    assert switches == []
+    clock.now += 1
+    # Re-checked without any input change because the rule is still waiting.
+    assert engine.update({}).name == "low"
+    assert switches == ["Power Saver"]
+
+
+def test_dwell_restarts_when_condition_breaks():
+    clock, switches = Clock(), []
+    engine = _engine(clock, switches)
+    engine.update({"ac": True, "battery": 80})
+    engine.update({"battery": 15})
+    clock.now += 20
+    engine.update({"battery": 50})
+    clock.now += 5
+    engine.update({"battery": 15})
+    clock.now += 25
+    engine.update({})
+    assert switches == []
+
+
+def test_rule_switches_again_after_deactivating():
+    clock, switches = Clock(), []
+    specs = [{"name": "hot", "profile": "Power Saver", "when": {"temperature": {"above": 90}}}]
+    engine = RuleEngine(specs, lambda profile, rule: switches.append(profile), min_dwell=10.0, clock=clock)
+    engine.update({"temperature": 50})
+    engine.update({"temperature": 95})
+    assert switches == ["Power Saver"]
+    clock.now += 20
+    assert engine.update({"temperature": 60}) is None
+    # (The user picks another profile by hand while it is cool.)
+    clock.now += 20
+    engine.update({"temperature": 95})
+    assert switches == ["Power Saver", "Power Saver"]
+
+
+def test_reactivation_still_respects_min_dwell():
+    clock, switches = Clock(), []
+    specs = [{"name": "hot", "profile": "Power Saver", "when": {"temperature": {"above": 90}}}]
+    engine = RuleEngine(specs, lambda profile, rule: switches.append(profile), min_dwell=10.0, clock=clock)
+    engine.update({"temperature": 50})
+    engine.update({"temperature": 95})
+    engine.update({"temperature": 60})
+    clock.now += 5
+    engine.update({"temperature": 95})
+    assert switches == ["Power Saver"]
+    clock.now += 5
+    engine.update({})
+    assert switches == ["Power Saver", "Power Saver"]
@@ -0,0 +1,44 @@
+import os
+
+from core.sysfs import SysfsReader
+from core.thermal import Thermal
+
+
+def _write(path, value):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(f"{value}\n")
+
+
+def test_throttle_limit_ignores_other_zones(tree):
+    zone = os.path.join(tree["sys"], "class/thermal/thermal_zone1")
+    for name, value in {"type": "iwlwifi_1", "temp": 40000, "trip_point_0_type": "passive",
+                        "trip_point_0_temp": 45000}.items():
+        _write(os.path.join(zone, name), value)
+    assert Thermal(SysfsReader(tree["sys"])).throttle_limit() == 95.0
+
+
+def test_throttle_limit_from_cpu_hwmon(tree):
+    os.remove(os.path.join(tree["sys"], "class/thermal/thermal_zone0/type"))
+    hwmon = os.path.join(tree["sys"], "class/hwmon/hwmon1")
+    for name, value in {"name": "coretemp", "temp1_input": 50000, "temp1_crit": 100000, "temp1_max": 98000}.items():
+        _write(os.path.join(hwmon, name), value)
+    assert Thermal(SysfsReader(tree["sys"])).throttle_limit() == 98.0
+
+
+def test_close_releases_thermal_caps(tree, tmp_path):
+    from core.app import AppLogic
+    from core.helper import HelperServer
+
+    logic = AppLogic(sysfs_root=tree["sys"], upower_config_path=tree["upower"], bin_path=tree["bin"],
+                     use_sudo=False, profiles_file=str(tmp_path / "profiles.json"), proc_root=tree["proc"])
+    server = HelperServer(tree["sys"])
+    logic.helper.execute = lambda ops: [server.apply(op) for op in ops]
+    max_freq = os.path.join(tree["sys"], "devices/system/cpu/cpufreq/policy0/scaling_max_freq")
+    controller = logic.enable_thermal_control()
+    assert controller.update(controller.limit_c) > 0
+    with open(max_freq) as f:
+        assert int(f.read()) < 4800000
+    logic.close()
+    with open(max_freq) as f:
+        assert int(f.read()) == 4800000
@@ -0,0 +1,67 @@
+import socket
+import threading
+
+from core.uevents import PowerSupplyWatcher, UeventMonitor, format_uevent, parse_uevent
+
+
+def test_parse_kernel_format():
+    data = format_uevent("change", "/devices/LNXSYSTM:00/ACPI0003:00/power_supply/AC",
+                         {"SUBSYSTEM": "power_supply", "POWER_SUPPLY_ONLINE": "0"})
+    event = parse_uevent(data)
+    assert event.action == "change"
+    assert event.devpath.endswith("/power_supply/AC")
+    assert event.subsystem == "power_supply"
+    assert event.properties["POWER_SUPPLY_ONLINE"] == "0"
+
+
+def test_parse_rejects_libudev_messages():
+    assert parse_uevent(b"libudev\0\xfe\xed\xca\xfe") is None
+
+
+def test_monitor_dispatches_by_subsystem():
+    ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    monitor = UeventMonitor(ours)
+    received, done = [], threading.Event()
+
+    def on_usb(event):
+        received.append(event)
+        done.set()
+
+    monitor.subscribe("power_supply", lambda event: received.append(event))
+    monitor.subscribe("usb", on_usb)
+    try:
+        theirs.send(format_uevent("add", "/devices/pci0000:00/usb1/1-1", {"SUBSYSTEM": "usb"}))
+        assert done.wait(2.0)
+        assert [e.action for e in received] == ["add"]
+    finally:
+        monitor.stop()
+        theirs.close()
+
+
+def test_watcher_reports_only_transitions():
+    ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    monitor = UeventMonitor(ours)
+    status = ["online"]
+    changes, seen, changed = [], threading.Semaphore(0), threading.Event()
+
+    def read_status():
+        seen.release()
+        return status[0]
+
+    def on_change(value):
+        changes.append(value)
+        changed.set()
+
+    PowerSupplyWatcher(monitor, read_status, on_change)
+    seen.acquire()  # the initial read
+    event = format_uevent("change", "/devices/power_supply/BAT0", {"SUBSYSTEM": "power_supply"})
+    try:
+        theirs.send(event)
+        assert seen.acquire(timeout=2.0)
+        status[0] = "offline"
+        theirs.send(event)
+        assert changed.wait(2.0)
+        assert changes == ["offline"]
+    finally:
+        monitor.stop()
+        theirs.close()
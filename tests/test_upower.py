@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from core.upower import UPowerDocument, apply_settings, validate
+
+CONFIG = """# Shipped by the distribution
+[UPower]
+EnableWattsUpPro=false
+PercentageLow=20   # warn here
+  PercentageCritical=5
+CriticalPowerAction=HybridSleep
+[Other]
+PercentageLow=99
+"""
+
+
+def test_round_trip_is_byte_identical():
+    assert UPowerDocument(CONFIG).serialize() == CONFIG
+
+
+def test_only_upower_section_is_indexed():
+    assert UPowerDocument(CONFIG).values["PercentageLow"] == "20"
+
+
+def test_set_keeps_indent_and_comment():
+    document = UPowerDocument(CONFIG)
+    assert document.set("PercentageLow", "25")
+    assert document.set("PercentageCritical", 7)
+    assert not document.set("CriticalPowerAction", "HybridSleep")
+    text = document.serialize()
+    assert "PercentageLow=25   # warn here\n" in text
+    assert "  PercentageCritical=7\n" in text
+    assert UPowerDocument(text).values["PercentageLow"] == "25"
+
+
+def test_new_key_goes_into_upower_section():
+    document = UPowerDocument(CONFIG)
+    document.set("PercentageAction", "3")
+    lines = document.serialize().splitlines()
+    assert lines.index("PercentageAction=3") < lines.index("[Other]")
+
+
+def test_missing_section_is_created():
+    document = UPowerDocument("# empty")
+    document.set("PercentageLow", "30")
+    assert document.serialize() == "# empty\n[UPower]\nPercentageLow=30\n"
+
+
+@pytest.mark.parametrize("values, error", [
+    ({}, None),
+    ({"CriticalPowerAction": "Ignore"}, None),
+    ({"CriticalPowerAction": "None"}, "CriticalPowerAction"),
+    ({"PercentageLow": "5"}, "below PercentageLow"),
+    ({"PercentageAction": "6"}, "must not exceed"),
+    ({"PercentageLow": "abc"}, "integers"),
+])
+def test_validate(values, error):
+    result = validate(values)
+    assert result is None if error is None else error in result
+
+
+def test_apply_settings_writes_only_on_change(tree):
+    path = tree["upower"]
+    os.chmod(path, 0o640)
+    assert apply_settings(path, {"PercentageLow": 20}, restart=False) == {"changed": False, "restarted": False}
+    assert apply_settings(path, {"PercentageLow": 30}, restart=False)["changed"]
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    with pytest.raises(ValueError):
+        apply_settings(path, {"PercentageCritical": 40}, restart=False)
+    assert UPowerDocument(open(path).read()).values["PercentageLow"] == "30"